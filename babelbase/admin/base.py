@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.db import models
 from django.forms import Textarea, TextInput
+
+from babelbase.admin.pagination import EstimatedCountPaginator, KeysetChangeList
 # from django_json_widget.widgets import JSONEditorWidget
 
 
@@ -26,6 +28,27 @@ class BabelBaseModelAdmin(admin.ModelAdmin):
         return f"{obj.content[:50]}..."
 
 
+class BabelBaseLargeTableModelAdmin(BabelBaseModelAdmin):
+    """
+    Base Model Admin for the large translation tables: estimated counts, "load more" keyset pagination and the
+    content is only searched (icontains) if the search term starts with "content:"
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/babelbase/keyset_change_list.html"
+    content_search_prefix = "content:"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term.startswith(self.content_search_prefix):
+            content = search_term[len(self.content_search_prefix) :].strip()
+            return queryset.filter(content__icontains=content), False
+        return super().get_search_results(request, queryset, search_term)
+
+
 class BabelBaseStackedInline(admin.StackedInline):
     formfield_overrides = {
         models.CharField: {"widget": TextInput(attrs={"style": "width:100%;"})},
@@ -0,0 +1,146 @@
+"""
+Translation grid of the admin: the sources of one namespace with the translation targets of one locale.
+
+A page of the grid is loaded with a single query joining the target of the locale to each source and is paged by
+identifier (keyset). All edits of a page are saved in one transaction with bulk_create/bulk_update, applying the same
+rules as TranslationTarget.save (see TranslationTarget.normalize_status).
+"""
+
+from django import forms
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+from django.utils import timezone
+
+from babelbase.models import TranslationSource, TranslationTarget
+from babelbase.signals import invalidate_translations
+
+
+class TranslationGridRowForm(forms.Form):
+    source_id = forms.IntegerField(widget=forms.HiddenInput)
+    content = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={"rows": 2, "style": "width:100%;"}),
+    )
+    translated = forms.BooleanField(required=False)
+    approved = forms.BooleanField(required=False)
+
+
+TranslationGridFormSet = forms.formset_factory(TranslationGridRowForm, extra=0)
+
+
+def load_grid(namespace, locale, after="", page_size=200):
+    """
+    Returns the rows of the sources of the namespace following the identifier after and whether more rows follow:
+    [{"source_id", "identifier", "source_content", "fingerprint", "target_id", "content", "translated", "approved",
+    "source_fingerprint"}]
+    """
+    queryset = (
+        TranslationSource.objects.filter(namespace=namespace, identifier__gt=after)
+        .annotate(
+            target=FilteredRelation(
+                "translation_target_qs",
+                condition=Q(translation_target_qs___lang=locale),
+            )
+        )
+        .order_by("identifier")
+        .values_list(
+            "id",
+            "identifier",
+            "content",
+            "fingerprint",
+            "target__id",
+            "target__content",
+            "target__translated",
+            "target__approved",
+            "target__source_fingerprint",
+        )[: page_size + 1]
+    )
+    rows = [
+        {
+            "source_id": source_id,
+            "identifier": identifier,
+            "source_content": source_content,
+            "fingerprint": fingerprint,
+            "target_id": target_id,
+            "content": content or "",
+            "translated": bool(translated),
+            "approved": bool(approved),
+            "source_fingerprint": source_fingerprint or "",
+        }
+        for (
+            source_id,
+            identifier,
+            source_content,
+            fingerprint,
+            target_id,
+            content,
+            translated,
+            approved,
+            source_fingerprint,
+        ) in queryset
+    ]
+    return rows[:page_size], len(rows) > page_size
+
+
+def grid_formset(rows, data=None):
+    initial = [
+        {
+            "source_id": row["source_id"],
+            "content": row["content"],
+            "translated": row["translated"],
+            "approved": row["approved"],
+        }
+        for row in rows
+    ]
+    return TranslationGridFormSet(data, initial=initial, prefix="grid")
+
+
+def save_grid(namespace, locale, rows, formset):
+    """Saves the changed rows of the valid formset in one transaction. Returns (created, updated)"""
+    rows_by_source = {row["source_id"]: row for row in rows}
+    now = timezone.now()
+    new_targets, changed_targets = [], []
+    for form in formset:
+        row = rows_by_source.get(form.cleaned_data.get("source_id"))
+        if row is None or not form.has_changed():
+            continue
+        target = TranslationTarget(
+            pk=row["target_id"],
+            source_id=row["source_id"],
+            _lang=locale,
+            content=form.cleaned_data["content"],
+            translated=form.cleaned_data["translated"],
+            approved=form.cleaned_data["approved"],
+            source_fingerprint=row["source_fingerprint"],
+        )
+        # Only a changed translation is recorded as translated from the current source content
+        translation_changed = (target.content, target.translated) != (
+            row["content"],
+            row["translated"],
+        )
+        target.normalize_status(
+            row["fingerprint"] if translation_changed else row["source_fingerprint"]
+        )
+        target.updated_at = now
+        if target.pk is None:
+            new_targets.append(target)
+        else:
+            changed_targets.append(target)
+    if not new_targets and not changed_targets:
+        return 0, 0
+    fields = ["content", "translated", "approved", "source_fingerprint", "updated_at"]
+    with transaction.atomic():
+        # A concurrent editor may have created the target in the meantime: the last save wins
+        TranslationTarget.objects.bulk_create(
+            new_targets,
+            update_conflicts=True,
+            unique_fields=["source", "_lang"],
+            update_fields=fields,
+        )
+        TranslationTarget.objects.bulk_update(changed_targets, fields)
+        # Bulk operations do not send signals
+        TranslationSource.objects.recompute_locale_status(
+            Q(pk__in=[target.source_id for target in new_targets + changed_targets])
+        )
+    invalidate_translations([namespace.namespace])
+    return len(new_targets), len(changed_targets)
@@ -0,0 +1,110 @@
+"""
+Changelist pagination for the large translation tables.
+
+EstimatedCountPaginator avoids the exact COUNT(*) of the full table: the unfiltered count is taken from the table
+statistics of the database, filtered counts are capped at BABELBASE_ADMIN_COUNT_LIMIT rows.
+
+KeysetChangeList adds "load more" pagination for the default ordering (-updated_at, -pk): the cursor of the last row
+on the page seeks to the following rows instead of an OFFSET, so deep pages cost as much as the first one.
+"""
+
+from datetime import datetime
+
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from babelbase.utils import get_setting
+
+CURSOR_VAR = "cursor"
+KEYSET_ORDERING = ("-updated_at", "-pk")
+
+
+def estimate_table_rows(model, using):
+    """Returns the estimated row count of the model table from the database statistics, None if not available"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # A table that was never analyzed has no (or a negative) estimate
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting the unfiltered table from its statistics and filtered querysets up to a limit"""
+
+    @cached_property
+    def count(self):
+        limit = get_setting("BABELBASE_ADMIN_COUNT_LIMIT")
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by().values("pk")[:limit].count()
+
+
+def encode_cursor(obj):
+    return f"{obj.updated_at.isoformat()}_{obj.pk}"
+
+
+def decode_cursor(cursor):
+    """Returns (updated_at, pk) of the cursor, None if it is malformed"""
+    updated_at, _, pk = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(updated_at), int(pk)
+    except ValueError:
+        return None
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList seeking to the rows after the cursor of the previous page for the default ordering"""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and paging links start from the first row again
+        return super().get_query_string(new_params, [*(remove or ()), CURSOR_VAR])
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        self.keyset = tuple(queryset.query.order_by) == KEYSET_ORDERING
+        cursor = decode_cursor(request.GET.get(CURSOR_VAR, ""))
+        if self.keyset and cursor:
+            updated_at, pk = cursor
+            queryset = queryset.filter(
+                Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, pk__lt=pk)
+            )
+            # The cursor replaces the OFFSET of the page
+            self.page_num = 1
+        return queryset
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.next_cursor_url = None
+        if self.keyset and self.multi_page and not self.show_all:
+            rows = self.result_list
+            if len(rows) == self.list_per_page:
+                self.next_cursor_url = self.get_query_string(
+                    {CURSOR_VAR: encode_cursor(rows[len(rows) - 1]), PAGE_VAR: None}
+                )
@@ -1,8 +1,21 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 
-from babelbase.admin.base import BabelBaseModelAdmin, BabelBaseStackedInline
+from babelbase.admin.base import (
+    BabelBaseLargeTableModelAdmin,
+    BabelBaseModelAdmin,
+    BabelBaseStackedInline,
+)
+from babelbase.admin.grid import grid_formset, load_grid, save_grid
 from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.utils import get_setting, translation_target_locales
 
 
 @admin.register(Namespace)
@@ -20,7 +33,7 @@ class TranslationTargetStackedInline(BabelBaseStackedInline):
     model = TranslationTarget
     fk_name = "source"
     extra = 0
-    readonly_fields = ("id", "source", "created_at", "updated_at")
+    readonly_fields = ("id", "source", "source_fingerprint", "created_at", "updated_at")
     fieldsets = (
         (
             None,
@@ -29,14 +42,27 @@ class TranslationTargetStackedInline(BabelBaseStackedInline):
                     ("_lang", "translated", "approved"),
                     ("content",),
                     ("id", "created_at", "updated_at"),
+                    ("source_fingerprint",),
                 ),
             },
         ),
     )
 
 
+def target_count_subquery(**filters):
+    """Counts the translation targets of the source row in a correlated subquery, which the changelist count skips"""
+    targets = (
+        TranslationTarget.objects.filter(source=OuterRef("pk"), **filters)
+        .order_by()
+        .values("source")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(targets), 0)
+
+
 @admin.register(TranslationSource)
-class TranslationSourceAdmin(BabelBaseModelAdmin):
+class TranslationSourceAdmin(BabelBaseLargeTableModelAdmin):
     """Translation Sources Model Admin"""
 
     list_display = (
@@ -46,11 +72,23 @@ class TranslationSourceAdmin(BabelBaseModelAdmin):
         "changed",
         "not_used",
         "get_translation_bitmask",
+        "get_target_count",
         "complete",
     )
-    search_fields = ("namespace", "identifier", "content")
+    list_select_related = ("namespace",)
+    search_fields = ("=namespace__namespace", "^identifier")
+    search_help_text = _(
+        "Exact namespace or identifier prefix. Start with content: to search the content."
+    )
     autocomplete_fields = ("namespace",)
-    readonly_fields = ("id", "created_at", "updated_at")
+    readonly_fields = (
+        "id",
+        "fingerprint",
+        "complete",
+        "locale_status",
+        "created_at",
+        "updated_at",
+    )
     list_filter = ("changed", "not_used", "complete")
     list_display_links = ("content_preview",)
     list_editable = ("changed",)
@@ -74,16 +112,148 @@ class TranslationSourceAdmin(BabelBaseModelAdmin):
             {
                 "classes": ("collapse",),
                 "fields": (
-                    ("id", "created_at", "updated_at"),
+                    ("id", "fingerprint", "created_at", "updated_at"),
+                    ("locale_status",),
                     ("template_registry", "duplicates_registry"),
                 ),
             },
         ),
     )
 
+    def get_urls(self):
+        grid_url = path(
+            "grid/",
+            self.admin_site.admin_view(self.grid_view),
+            name=f"{self.opts.app_label}_{self.opts.model_name}_grid",
+        )
+        return [grid_url, *super().get_urls()]
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            "grid_url": reverse(
+                f"{self.admin_site.name}:{self.opts.app_label}_{self.opts.model_name}_grid"
+            ),
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context)
+
+    def grid_view(self, request):
+        """Edits the translation targets of one namespace and locale as a grid, see babelbase.admin.grid"""
+        if not (
+            request.user.has_perm("babelbase.add_translationtarget")
+            and request.user.has_perm("babelbase.change_translationtarget")
+        ):
+            raise PermissionDenied
+        locales = translation_target_locales()
+        locale = request.GET.get("locale")
+        if locale not in locales:
+            locale = locales[0] if locales else None
+        namespace = Namespace.objects.filter(
+            namespace=request.GET.get("namespace", "")
+        ).first()
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": _("Translation grid"),
+            "namespaces": Namespace.objects.order_by("namespace").values_list(
+                "namespace", flat=True
+            ),
+            "namespace": namespace,
+            "locales": locales,
+            "locale": locale,
+        }
+        if namespace is not None and locale is not None:
+            rows, has_more = load_grid(
+                namespace,
+                locale,
+                after=request.GET.get("after", ""),
+                page_size=get_setting("BABELBASE_GRID_PAGE_SIZE"),
+            )
+            if request.method == "POST":
+                formset = grid_formset(rows, request.POST)
+                if formset.is_valid():
+                    created, updated = save_grid(namespace, locale, rows, formset)
+                    self.message_user(
+                        request,
+                        _("Created %(created)d and updated %(updated)d translations.")
+                        % {"created": created, "updated": updated},
+                    )
+                    return HttpResponseRedirect(request.get_full_path())
+            else:
+                formset = grid_formset(rows)
+            context["formset"] = formset
+            context["rows"] = list(zip(rows, formset.forms))
+            if has_more:
+                query = {
+                    "namespace": namespace.namespace,
+                    "locale": locale,
+                    "after": rows[-1]["identifier"],
+                }
+                context["next_url"] = f"?{urlencode(query)}"
+        return TemplateResponse(
+            request, "admin/babelbase/translation_grid.html", context
+        )
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                target_count=target_count_subquery(),
+                approved_count=target_count_subquery(approved=True),
+            )
+        )
+
+    @admin.display(
+        description=_("Approved"),
+        ordering="approved_count",
+    )
+    def get_target_count(self, obj):
+        """Returns the number of approved of all translation targets"""
+        return f"{obj.approved_count}/{obj.target_count}"
+
     @admin.display(
         description=_("Translations"),
     )
     def get_translation_bitmask(self, obj):
         """Returns a list of translated languages with their status"""
         return obj.translation_content_bitmask()
+
+
+@admin.register(TranslationTarget)
+class TranslationTargetAdmin(BabelBaseLargeTableModelAdmin):
+    """Translation Targets Model Admin"""
+
+    list_display = (
+        "source",
+        "_lang",
+        "content_preview",
+        "translated",
+        "approved",
+        "updated_at",
+    )
+    list_select_related = ("source__namespace",)
+    list_filter = ("_lang", "translated", "approved")
+    search_fields = ("=source__namespace__namespace", "^source__identifier")
+    search_help_text = TranslationSourceAdmin.search_help_text
+    raw_id_fields = ("source",)
+    readonly_fields = ("id", "source_fingerprint", "created_at", "updated_at")
+    fieldsets = (
+        (
+            None,
+            {
+                "fields": (
+                    ("source", "_lang"),
+                    ("translated", "approved"),
+                    ("content",),
+                ),
+            },
+        ),
+        (
+            _("System Information"),
+            {
+                "classes": ("collapse",),
+                "fields": (("id", "source_fingerprint", "created_at", "updated_at"),),
+            },
+        ),
+    )
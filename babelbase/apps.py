@@ -7,3 +7,7 @@ class BabelBaseConfig(AppConfig):
 
     name = "babelbase"
     verbose_name = _("BabelBase Translations")
+
+    def ready(self):
+        # Connects the cache invalidation receivers
+        from babelbase import signals  # noqa: F401
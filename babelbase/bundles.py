@@ -0,0 +1,201 @@
+"""
+Namespace/locale bundles stored in a Django cache backend.
+
+A bundle is the pre-resolved dict {identifier: (source_id, text)} of all sources of a namespace in a locale. Each
+namespace has a generation number in the cache that is part of the bundle key. Bumping the generation on any change
+of the namespace makes its bundles unreachable; they simply expire.
+
+A bundle is stored in chunks of at most BABELBASE_BUNDLE_CHUNK_BYTES (approximately), so large namespaces stay below
+the item size limit of the cache backend (1 MB for memcached). The identifiers are hashed into the chunks, the bundle
+key holds the number of chunks. A lookup costs one get_many for the generations, one for the chunk counts and one for
+the chunks holding the requested identifiers. Missing bundles (or chunks) are rebuilt single-flight: only the worker
+that acquires the rebuild lock queries the database, all others wait for its bundle.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import caches
+
+from babelbase.models import TranslationSource
+from babelbase.utils import get_setting
+
+KEY_PREFIX = "babelbase"
+POLL_INTERVAL = 0.05
+
+
+def get_bundle_cache():
+    """Returns the configured cache backend of the bundles or None if disabled"""
+    alias = get_setting("BABELBASE_BUNDLE_CACHE")
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def namespace_key_part(namespace):
+    # Namespaces are unicode slugs up to 255 chars: hashed to stay a valid memcached key
+    return hashlib.md5(namespace.encode(), usedforsecurity=False).hexdigest()
+
+
+def generation_key(namespace):
+    return f"{KEY_PREFIX}:generation:{namespace_key_part(namespace)}"
+
+
+def bundle_key(namespace, locale, generation):
+    return f"{KEY_PREFIX}:bundle:{namespace_key_part(namespace)}:{locale}:{generation}"
+
+
+def chunk_key(key, index):
+    return f"{key}:chunk:{index}"
+
+
+def chunk_index(identifier, chunks):
+    digest = hashlib.md5(identifier.encode(), usedforsecurity=False).digest()
+    return int.from_bytes(digest[:4], "little") % chunks
+
+
+def split_bundle(bundle):
+    """Splits the bundle into chunks of approximately at most BABELBASE_BUNDLE_CHUNK_BYTES"""
+    size = sum(
+        len(identifier.encode()) + len(text.encode()) + 32
+        for identifier, (_, text) in bundle.items()
+    )
+    chunks = [
+        {}
+        for _ in range(max(1, -(-size // get_setting("BABELBASE_BUNDLE_CHUNK_BYTES"))))
+    ]
+    for identifier, record in bundle.items():
+        chunks[chunk_index(identifier, len(chunks))][identifier] = record
+    return chunks
+
+
+def new_generation():
+    # A timestamp, so a generation evicted from the cache never restarts at a previously used number
+    return time.time_ns()
+
+
+def get_generations(cache, namespaces):
+    """Returns {namespace: generation}, initializing missing generations"""
+    keys = {generation_key(namespace): namespace for namespace in namespaces}
+    generations = {}
+    found = cache.get_many(keys)
+    for key, namespace in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            cache.add(key, new_generation(), timeout=None)
+            generation = cache.get(key)
+        generations[namespace] = generation
+    return generations
+
+
+def bump_generations(namespaces):
+    """Invalidates all bundles of the namespaces"""
+    cache = get_bundle_cache()
+    if cache is None:
+        return
+    for namespace in set(namespaces):
+        key = generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_generation(), timeout=None)
+
+
+def build_bundles(cache, keys, locale):
+    """Builds the bundles of {bundle_key: namespace} with a single query, stores their chunks and returns them"""
+    records = TranslationSource.objects.namespace_records(keys.values(), locale)
+    bundles = {key: records[namespace] for key, namespace in keys.items()}
+    values = {}
+    for key, bundle in bundles.items():
+        chunks = split_bundle(bundle)
+        values.update(
+            (chunk_key(key, index), chunk) for index, chunk in enumerate(chunks)
+        )
+        values[key] = len(chunks)
+    cache.set_many(values, timeout=get_setting("BABELBASE_BUNDLE_CACHE_TIMEOUT"))
+    return bundles
+
+
+def read_bundles(cache, counts, identifiers):
+    """
+    Returns {bundle_key: records} of the identifiers {bundle_key: identifiers} from the chunks of the bundles with the
+    chunk counts {bundle_key: count}. Bundles with a missing chunk are left out.
+    """
+    chunk_keys = {
+        chunk_key(key, chunk_index(identifier, count)): key
+        for key, count in counts.items()
+        # Bundles cached by a previous version hold the records instead of the chunk count
+        if isinstance(count, int)
+        for identifier in identifiers[key]
+    }
+    chunks = cache.get_many(chunk_keys)
+    bundles = {key: {} for key, count in counts.items() if isinstance(count, int)}
+    for key_of_chunk, key in chunk_keys.items():
+        chunk = chunks.get(key_of_chunk)
+        if chunk is None:
+            bundles.pop(key, None)
+        elif key in bundles:
+            bundles[key].update(chunk)
+    return bundles
+
+
+def rebuild_bundles(cache, keys, locale, identifiers):
+    """Rebuilds the missing bundles {bundle_key: namespace} single-flight and returns {bundle_key: records}"""
+    lock_timeout = get_setting("BABELBASE_BUNDLE_LOCK_TIMEOUT")
+    owned = {
+        key: namespace
+        for key, namespace in keys.items()
+        if cache.add(f"{key}:lock", True, timeout=lock_timeout)
+    }
+    bundles = {}
+    if owned:
+        try:
+            bundles.update(build_bundles(cache, owned, locale))
+        finally:
+            cache.delete_many([f"{key}:lock" for key in owned])
+
+    # Wait for the bundles rebuilt by other workers
+    waiting = {key: namespace for key, namespace in keys.items() if key not in owned}
+    deadline = time.monotonic() + lock_timeout
+    while waiting and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        for key, bundle in read_bundles(
+            cache, cache.get_many(waiting), identifiers
+        ).items():
+            del waiting[key]
+            bundles[key] = bundle
+    if waiting:
+        # The other rebuild takes too long or failed: take over
+        bundles.update(build_bundles(cache, waiting, locale))
+    return bundles
+
+
+def resolve_records(keys, locale):
+    """Returns a dict {(namespace, identifier): record} of all keys found in the bundles"""
+    cache = get_bundle_cache()
+    identifiers_by_namespace = {}
+    for namespace, identifier in keys:
+        identifiers_by_namespace.setdefault(namespace, set()).add(identifier)
+    generations = get_generations(cache, identifiers_by_namespace)
+    namespaces = {
+        bundle_key(namespace, locale, generation): namespace
+        for namespace, generation in generations.items()
+    }
+    identifiers = {
+        key: identifiers_by_namespace[namespace]
+        for key, namespace in namespaces.items()
+    }
+    bundles = read_bundles(cache, cache.get_many(namespaces), identifiers)
+    missing = {
+        key: namespace for key, namespace in namespaces.items() if key not in bundles
+    }
+    if missing:
+        bundles.update(rebuild_bundles(cache, missing, locale, identifiers))
+    records = {}
+    for key, bundle in bundles.items():
+        namespace = namespaces[key]
+        for identifier in identifiers[key]:
+            record = bundle.get(identifier)
+            if record is not None:
+                records[(namespace, identifier)] = record
+    return records
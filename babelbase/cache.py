@@ -0,0 +1,127 @@
+"""
+Process-local translation cache.
+
+Records (source_id, text) are cached per (namespace, identifier, locale) in a thread-safe LRU dict, bounded by the
+number of entries and the approximate memory of the cached texts. Entries are invalidated by the post_save and
+post_delete signals of the translation models (see babelbase.signals).
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from babelbase.utils import get_setting
+
+# Approximate overhead of an entry (key tuple, record tuple, dict slot) in bytes
+ENTRY_OVERHEAD = 200
+
+
+class TranslationCache:
+    """Thread-safe LRU cache with hit/miss/eviction counters"""
+
+    def __init__(self, max_entries, max_bytes, timeout=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_source = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def entry_size(key, record):
+        namespace, identifier, _ = key
+        size = ENTRY_OVERHEAD + sys.getsizeof(record[1])
+        return size + sys.getsizeof(namespace) + sys.getsizeof(identifier)
+
+    def get_many(self, keys):
+        """Returns a dict of the cached records of the (namespace, identifier, locale) keys"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[2] is not None and entry[2] < now:
+                    self._remove(key)
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[key] = entry[0]
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, records):
+        """Caches a dict of {(namespace, identifier, locale): record}"""
+        expires = time.monotonic() + self.timeout if self.timeout else None
+        with self._lock:
+            for key, record in records.items():
+                if key in self._entries:
+                    self._remove(key)
+                size = self.entry_size(key, record)
+                if size > self.max_bytes:
+                    continue
+                self._entries[key] = (record, size, expires)
+                self._keys_by_source.setdefault(record[0], set()).add(key)
+                self._size += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def set(self, key, record):
+        self.set_many({key: record})
+
+    def _remove(self, key):
+        record, size, _ = self._entries.pop(key)
+        self._size -= size
+        source_keys = self._keys_by_source.get(record[0])
+        if source_keys is not None:
+            source_keys.discard(key)
+            if not source_keys:
+                del self._keys_by_source[record[0]]
+
+    def invalidate_source(self, source_id):
+        """Removes all cached locales of a translation source"""
+        with self._lock:
+            for key in list(self._keys_by_source.get(source_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_source.clear()
+            self._size = 0
+
+    def stats(self):
+        """Returns the counters and the current size to monitor and size the cache"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+translation_cache = TranslationCache(
+    max_entries=get_setting("BABELBASE_LOCAL_CACHE_MAX_ENTRIES"),
+    max_bytes=get_setting("BABELBASE_LOCAL_CACHE_MAX_BYTES"),
+    timeout=get_setting("BABELBASE_LOCAL_CACHE_TIMEOUT"),
+)
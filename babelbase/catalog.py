@@ -0,0 +1,192 @@
+"""
+Compiled, memory-mapped translation catalogs.
+
+A catalog file holds the final text of every source of one locale (approved translation, otherwise source content).
+Like a gettext .mo file it consists of a sorted key table and a value table pointing into the string data:
+
+    header:  magic, version, count, offset of the key table, offset of the value table, offset of the id table
+    keys:    count x (length, offset) of "namespace\\x04identifier" in UTF-8, sorted bytewise
+    values:  count x (length, offset) of the text in UTF-8
+    ids:     count x source id
+    data:    the strings
+
+The file is mmap-ed read-only, so all worker processes share the same pages of the OS page cache and keys are
+resolved with a binary search without any query. Catalogs reflect the database at compile time and need to be
+recompiled (python manage.py compile_babelbase_catalog) to pick up changes. Running processes reload recompiled files.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.db.models import Q
+
+from babelbase.models import TranslationSource
+from babelbase.utils import get_setting
+
+MAGIC = b"BBCT"
+VERSION = 1
+HEADER = struct.Struct("<4sIIQQQ")
+ENTRY = struct.Struct("<IQ")
+ID = struct.Struct("<Q")
+KEY_SEPARATOR = b"\x04"
+
+
+def encode_key(namespace, identifier):
+    return namespace.encode() + KEY_SEPARATOR + identifier.encode()
+
+
+def catalog_path(directory, locale):
+    return os.path.join(directory, f"{locale}.bbcat")
+
+
+def write_catalog(path, entries):
+    """
+    Writes the catalog of the entries [(namespace, identifier, source_id, text), ...] to path. The file is replaced
+    atomically, so processes that have mapped the previous version keep reading a consistent file.
+    """
+    rows = sorted(
+        (encode_key(namespace, identifier), source_id, text.encode())
+        for namespace, identifier, source_id, text in entries
+    )
+    count = len(rows)
+    keys_offset = HEADER.size
+    values_offset = keys_offset + count * ENTRY.size
+    ids_offset = values_offset + count * ENTRY.size
+    data_offset = ids_offset + count * ID.size
+
+    key_table, value_table, id_table, data = [], [], [], []
+    position = data_offset
+    for key, source_id, value in rows:
+        key_table.append(ENTRY.pack(len(key), position))
+        data.append(key)
+        position += len(key)
+        value_table.append(ENTRY.pack(len(value), position))
+        data.append(value)
+        position += len(value)
+        id_table.append(ID.pack(source_id))
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(
+            HEADER.pack(MAGIC, VERSION, count, keys_offset, values_offset, ids_offset)
+        )
+        for table in (key_table, value_table, id_table, data):
+            file.writelines(table)
+    os.replace(temporary_path, path)
+    return count
+
+
+def compile_catalog(directory, locale):
+    """Compiles the catalog of the locale from the database and returns the number of entries"""
+    entries = (
+        (
+            namespace,
+            identifier,
+            source_id,
+            target_text if target_text is not None else source_text,
+        )
+        for source_id, namespace, identifier, source_text, target_text in (
+            TranslationSource.objects.records_queryset(Q(), locale).iterator(
+                chunk_size=2000
+            )
+        )
+    )
+    return write_catalog(catalog_path(directory, locale), entries)
+
+
+class CompiledCatalog:
+    """Read-only view of a memory-mapped catalog file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.stat = os.fstat(file.fileno())
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.count,
+            self.keys_offset,
+            self.values_offset,
+            self.ids_offset,
+        ) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a babelbase catalog of version {VERSION}")
+
+    def find(self, key):
+        """Returns the index of the encoded key by binary search or None"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            length, offset = ENTRY.unpack_from(
+                self.data, self.keys_offset + middle * ENTRY.size
+            )
+            candidate = self.data[offset : offset + length]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def get(self, namespace, identifier):
+        """Returns the record (source_id, text) of the key or None"""
+        index = self.find(encode_key(namespace, identifier))
+        if index is None:
+            return None
+        length, offset = ENTRY.unpack_from(
+            self.data, self.values_offset + index * ENTRY.size
+        )
+        (source_id,) = ID.unpack_from(self.data, self.ids_offset + index * ID.size)
+        return source_id, self.data[offset : offset + length].decode()
+
+    def is_outdated(self, path):
+        """Checks whether the file at path has been replaced since it was mapped"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_ino, stat.st_mtime_ns) != (
+            self.stat.st_ino,
+            self.stat.st_mtime_ns,
+        )
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(locale):
+    """Returns the mapped catalog of the locale, or None if catalogs are disabled or not compiled"""
+    directory = get_setting("BABELBASE_CATALOG_DIR")
+    if not directory:
+        return None
+    path = catalog_path(directory, locale)
+    now = time.monotonic()
+    catalog, checked_at = _catalogs.get(path, (None, 0))
+    if now - checked_at < get_setting("BABELBASE_CATALOG_CHECK_INTERVAL"):
+        return catalog
+    with _catalogs_lock:
+        if catalog is None or catalog.is_outdated(path):
+            try:
+                catalog = CompiledCatalog(path)
+            except FileNotFoundError:
+                catalog = None
+        _catalogs[path] = (catalog, now)
+    return catalog
+
+
+def resolve_records(keys, locale):
+    """Returns a dict {(namespace, identifier): record} of all keys found in the catalog of the locale"""
+    catalog = get_catalog(locale)
+    if catalog is None:
+        return {}
+    records = {}
+    for namespace, identifier in keys:
+        record = catalog.get(namespace, identifier)
+        if record is not None:
+            records[(namespace, identifier)] = record
+    return records
@@ -5,3 +5,65 @@ DB_TRANSLATION_DEFAULT_IDENTIFIER = [
     "general",
 ]
 ALLOW_DB_CONTENT_FRONTEND_EDIT = True
+
+# Locale fallback chains {locale: [fallback locales]}, e.g. {"de-ch": ["de-at", "de"]}. Locales of settings.LANGUAGES
+# without a chain fall back to their generic language if available (de-at -> de), finally to the source content.
+BABELBASE_LOCALE_FALLBACKS = {}
+
+# Process-local translation cache: keyed by (namespace, identifier, locale) with LRU eviction
+BABELBASE_LOCAL_CACHE = True
+BABELBASE_LOCAL_CACHE_MAX_ENTRIES = 20000
+BABELBASE_LOCAL_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# Signals only invalidate the current process, the timeout bounds staleness in other processes. None: no expiry
+BABELBASE_LOCAL_CACHE_TIMEOUT = 300
+
+# Namespace/locale bundles in a Django cache backend: the alias in settings.CACHES, None disables the bundles
+BABELBASE_BUNDLE_CACHE = None
+BABELBASE_BUNDLE_CACHE_TIMEOUT = 24 * 60 * 60
+# Maximum time in seconds a bundle rebuild may take before waiting workers resolve on their own
+BABELBASE_BUNDLE_LOCK_TIMEOUT = 10
+# Approximate maximum size in bytes of a cached bundle chunk, below the 1 MB item limit of memcached
+BABELBASE_BUNDLE_CHUNK_BYTES = 512 * 1024
+
+# Compiled translation catalogs (see compile_babelbase_catalog): directory of the catalog files, None disables them
+BABELBASE_CATALOG_DIR = None
+# Interval in seconds to check for a recompiled catalog file
+BABELBASE_CATALOG_CHECK_INTERVAL = 5
+
+# Maximum number of records per locale in a DatabaseTranslationBuffer
+BABELBASE_BUFFER_MAX_ENTRIES = 5000
+
+# Negative lookup cache: seconds a missing key is remembered as missing, None disables it
+BABELBASE_MISSING_KEY_TIMEOUT = 60
+BABELBASE_MISSING_KEY_MAX_ENTRIES = 10000
+# Missing keys are logged aggregated at most once per interval in seconds
+BABELBASE_MISSING_KEY_REPORT_INTERVAL = 60
+
+# Maximum number of compiled snippet templates of get_content kept per process
+BABELBASE_SNIPPET_TEMPLATE_CACHE_SIZE = 1000
+
+# Maximum number of compiled messages of db_gettext_lazy kept per process
+BABELBASE_MESSAGE_CACHE_SIZE = 2000
+
+# Manifest of the template scanner (manage_content_i18n_translations) to skip unchanged templates. The path defaults
+# to scan_manifest.json in BABELBASE_CACHE_DIR, an empty string disables the manifest
+BABELBASE_SCAN_MANIFEST = None
+# Extensions of the scanned template files
+BABELBASE_SCAN_EXTENSIONS = (".html",)
+# Template tags whose keys are ingested as translation sources: the content tags and the babelbase tags
+BABELBASE_SCAN_TAGS = ("get_content", "blockcontent_i18n", "babel", "babelblock")
+
+# Directory of the files of the management commands (scan manifest, duplicate index). None: ".babelbase" in
+# settings.BASE_DIR if defined, otherwise "babelbase" in the user cache directory
+BABELBASE_CACHE_DIR = None
+
+# Near-duplicate detection: index of the MinHash signatures and minimal similarity of potential duplicates. The index
+# path defaults to duplicate_index.json in BABELBASE_CACHE_DIR, an empty string disables the index
+BABELBASE_DUPLICATE_INDEX = None
+BABELBASE_DUPLICATE_THRESHOLD = 0.8
+BABELBASE_DUPLICATE_MAX_ENTRIES = 20
+
+# Admin changelists: filtered counts are capped, unfiltered tables above it are counted from the table statistics
+BABELBASE_ADMIN_COUNT_LIMIT = 10000
+# Number of sources per page of the translation grid of the admin
+BABELBASE_GRID_PAGE_SIZE = 200
@@ -0,0 +1,166 @@
+"""
+Deferred two-phase resolution for the babel template tag.
+
+While a DeferredCollector is active, the babel tag does not hit the database. It emits a cheap marker of the requested
+(namespace, identifier) key instead. Once rendering is done, the keys of all markers are resolved with one query per
+locale and the markers are substituted with the final text.
+
+The DeferredBabelMiddleware activates the collector only while the template of a TemplateResponse is rendered. Every
+other rendering of the request (e.g. emails, JSON payloads) resolves the babel tags in place. To defer the tags of
+another rendering use the context manager:
+
+with deferred_resolution() as collector:
+    html = collector.substitute(render_to_string("mail/welcome.html", context))
+
+A marker encodes the key, the placeholder, the escaping and the locale of the tag and is signed with the SECRET_KEY.
+Any request can resolve it, so output cached with its markers (e.g. {% cache %} fragments) is resolved when it is
+replayed, while markers injected by foreign content are not valid and stay untouched. The babel tag with "as variable"
+and babel tags within block tags that transform their body (e.g. {% filter upper %}) resolve the translation in place,
+since the transformation needs the text.
+"""
+
+import base64
+import json
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from babelbase.lookup import resolve_records
+from babelbase.missing import report_missing_key
+from babelbase.utils import get_current_locale
+
+MARKER_PREFIX = "<!--babel:"
+MARKER_PATTERN = re.compile(r"<!--babel:([\w-]+):([0-9a-f]{16})-->")
+MARKER_SALT = "babelbase.deferred.marker"
+# Block tags that output their body unchanged, the babel tags within other block tags are resolved in place
+PASS_THROUGH_TAGS = {
+    "autoescape",
+    "babelblock",
+    "block",
+    "cache",
+    "for",
+    "if",
+    "ifchanged",
+    "language",
+    "localize",
+    "localtime",
+    "timezone",
+    "with",
+}
+
+
+def sign_payload(payload):
+    return salted_hmac(MARKER_SALT, payload).hexdigest()[:16]
+
+
+def encode_marker(namespace, identifier, placeholder, autoescape, locale):
+    """Returns the signed marker of the entry"""
+    data = json.dumps(
+        [namespace, identifier, placeholder, autoescape, locale], separators=(",", ":")
+    )
+    payload = base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+    return f"{MARKER_PREFIX}{payload}:{sign_payload(payload)}-->"
+
+
+def decode_marker(payload, signature):
+    """Returns the entry (namespace, identifier, placeholder, autoescape, locale) of the marker, None if invalid"""
+    if not constant_time_compare(signature, sign_payload(payload)):
+        return None
+    try:
+        data = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        namespace, identifier, placeholder, autoescape, locale = json.loads(data)
+    except ValueError:
+        return None
+    return namespace, identifier, placeholder, autoescape, locale
+
+
+def resolve_entries(entries):
+    """Returns the output of each entry, resolving all keys with a single query per locale"""
+    keys_by_locale = {}
+    for namespace, identifier, _, _, locale in entries:
+        keys_by_locale.setdefault(locale, set()).add((namespace, identifier))
+    texts = {}
+    for locale, keys in keys_by_locale.items():
+        records = resolve_records(keys, locale)
+        for key, (_, text) in records.items():
+            texts[(locale, key)] = text
+    outputs = []
+    for namespace, identifier, placeholder, autoescape, locale in entries:
+        text = texts.get((locale, (namespace, identifier)))
+        if text is None:
+            report_missing_key(namespace, identifier)
+            text = placeholder
+        outputs.append(conditional_escape(text) if autoescape else text)
+    return outputs
+
+
+def substitute_markers(content):
+    """Replaces all valid markers in the content with their resolved output"""
+    if MARKER_PREFIX not in content:
+        return content
+    entries = {}
+    for match in MARKER_PATTERN.finditer(content):
+        if match.group(0) not in entries:
+            entries[match.group(0)] = decode_marker(*match.groups())
+    entries = {marker: entry for marker, entry in entries.items() if entry}
+    if not entries:
+        return content
+    outputs = dict(zip(entries, resolve_entries(list(entries.values()))))
+    return MARKER_PATTERN.sub(
+        lambda match: outputs.get(match.group(0), match.group(0)), content
+    )
+
+
+_active_collector = ContextVar("babelbase_deferred_collector", default=None)
+
+
+def get_active_collector():
+    """Returns the DeferredCollector of the current context, or None if deferred resolution is not active"""
+    return _active_collector.get()
+
+
+class DeferredCollector:
+    """Emits the markers of the babel tags during rendering and substitutes them in bulk afterwards"""
+
+    def __init__(self):
+        self.markers = {}
+
+    def defer(self, namespace, identifier, placeholder="", autoescape=True):
+        """Returns the marker of the key to be placed in the output"""
+        entry = (namespace, identifier, placeholder, autoescape, get_current_locale())
+        marker = self.markers.get(entry)
+        if marker is None:
+            marker = self.markers[entry] = encode_marker(*entry)
+        return mark_safe(marker)
+
+    def substitute(self, content):
+        """Replaces all markers in the rendered content with their resolved output"""
+        return substitute_markers(content)
+
+
+@contextmanager
+def deferred_resolution():
+    """Activates a DeferredCollector for the enclosed rendering"""
+    collector = DeferredCollector()
+    token = _active_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _active_collector.reset(token)
+
+
+class DeferredTemplate:
+    """Wraps a template to render it with deferred resolution and substitute the markers of its output"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def render(self, context=None, request=None):
+        with deferred_resolution() as collector:
+            return mark_safe(
+                collector.substitute(self.template.render(context, request))
+            )
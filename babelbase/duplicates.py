@@ -0,0 +1,277 @@
+"""
+Incremental near-duplicate detection of translation sources.
+
+The content of each source is normalized (tags, punctuation and case removed) and hashed. Changed sources are
+detected by their normalized hash and only those are (re-)indexed with a MinHash signature of their character
+shingles. The signatures are split into bands (locality-sensitive hashing): sources sharing a band are candidates,
+their similarity is estimated from the signatures. This avoids comparing all pairs of sources.
+
+Sources with the same normalized content are exact duplicates, so the signatures are compared per distinct content.
+
+The index is stored as JSON between runs (BABELBASE_DUPLICATE_INDEX): the sources {source_id: [normalized hash,
+signature]} and the bands {band key: [normalized hash, ...]}, hashes and signatures hex encoded. Only the bands of the
+changed contents are updated and looked up. An index that can not be read is rebuilt.
+
+The duplicates_registry of a source lists the most similar sources as [{"id": source_id, "score": similarity}, ...],
+ordered by score and bounded by BABELBASE_DUPLICATE_MAX_ENTRIES.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+from array import array
+
+from django.db import transaction
+
+from babelbase.ingest import batched
+from babelbase.models import TranslationSource
+from babelbase.utils import get_cache_file, get_setting
+
+# Bump to invalidate the indexes when the signature parameters change
+INDEX_VERSION = 2
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+HASH_VALUES = struct.Struct("<16I")
+SALTS = [index.to_bytes(16, "little") for index in range(NUM_PERM // 16)]
+TAG_PATTERN = re.compile(r"<[^>]*>|{[{%#].*?[}%#]}")
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_content(content):
+    """Removes html and template tags, punctuation, surrounding whitespace and case"""
+    content = TAG_PATTERN.sub(" ", content)
+    return NON_WORD_PATTERN.sub(" ", content).strip().lower()
+
+
+def content_hash(normalized_content):
+    return hashlib.blake2b(normalized_content.encode(), digest_size=16).hexdigest()
+
+
+def shingles(normalized_content):
+    if len(normalized_content) <= SHINGLE_SIZE:
+        return {normalized_content}
+    return {
+        normalized_content[index : index + SHINGLE_SIZE]
+        for index in range(len(normalized_content) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(normalized_content):
+    """Returns the MinHash signature of the shingles as hex of NUM_PERM unsigned 32bit ints"""
+    signature = [0xFFFFFFFF] * NUM_PERM
+    for shingle in shingles(normalized_content):
+        data = shingle.encode()
+        values = []
+        for salt in SALTS:
+            digest = hashlib.blake2b(data, digest_size=64, salt=salt).digest()
+            values.extend(HASH_VALUES.unpack(digest))
+        signature = list(map(min, signature, values))
+    return array("I", signature).tobytes().hex()
+
+
+def band_keys(signature):
+    band_size = ROWS * 8
+    return [
+        f"{band}:{signature[band * band_size : (band + 1) * band_size]}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(signature, other_signature):
+    """Estimated Jaccard similarity of the shingles"""
+    values = memoryview(bytes.fromhex(signature)).cast("I")
+    other_values = memoryview(bytes.fromhex(other_signature)).cast("I")
+    return sum(map(int.__eq__, values, other_values)) / NUM_PERM
+
+
+def load_index(index_path):
+    """Returns (sources, bands) of the index file, empty if it is missing or can not be read"""
+    try:
+        with open(index_path, encoding="utf-8") as file:
+            index = json.load(file)
+        if index["version"] != INDEX_VERSION:
+            return {}, {}
+        sources = {
+            int(pk): (normalized_hash, signature)
+            for pk, (normalized_hash, signature) in index["sources"].items()
+        }
+        bands = index["bands"]
+        if not isinstance(bands, dict):
+            return {}, {}
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return {}, {}
+    return sources, bands
+
+
+def save_index(index_path, sources, bands):
+    temporary_path = f"{index_path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        json.dump(
+            {"version": INDEX_VERSION, "sources": sources, "bands": bands},
+            file,
+            separators=(",", ":"),
+        )
+    os.replace(temporary_path, index_path)
+
+
+def top_entries(pk, scores, pks_by_hash, max_entries):
+    """Returns up to max_entries registry entries of the most similar sources, excluding the source itself"""
+    entries = []
+    for normalized_hash, score in sorted(scores.items(), key=lambda item: -item[1]):
+        for other_pk in pks_by_hash.get(normalized_hash, ()):
+            if other_pk == pk:
+                continue
+            if len(entries) == max_entries:
+                return entries
+            entries.append({"id": other_pk, "score": score})
+    return entries
+
+
+def find_duplicates(index_path=None, threshold=None, batch_size=1000, chunk_size=5000):
+    """
+    Updates the index with the changed sources and writes the duplicates_registry of all affected sources.
+    Returns the statistics {"sources", "indexed", "removed", "duplicates", "updated"}.
+    """
+    if index_path is None:
+        index_path = get_cache_file("BABELBASE_DUPLICATE_INDEX", "duplicate_index.json")
+    if threshold is None:
+        threshold = get_setting("BABELBASE_DUPLICATE_THRESHOLD")
+    index, bands = load_index(index_path) if index_path else ({}, {})
+
+    # Stream the sources and re-index the changed ones, remembering the previous entries
+    seen = set()
+    changed = set()
+    previous_entries = []
+    registries = {}
+    queryset = (
+        TranslationSource.objects.order_by()
+        .values_list("id", "content", "duplicates_registry")
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, content, registry in queryset:
+        seen.add(pk)
+        if registry:
+            registries[pk] = registry
+        normalized_content = normalize_content(content)
+        entry = index.get(pk)
+        if not normalized_content:
+            if entry is not None:
+                previous_entries.append(index.pop(pk))
+                changed.add(pk)
+            continue
+        normalized_hash = content_hash(normalized_content)
+        if entry is None or entry[0] != normalized_hash:
+            if entry is not None:
+                previous_entries.append(entry)
+            index[pk] = (normalized_hash, minhash_signature(normalized_content))
+            changed.add(pk)
+    removed = set(index).difference(seen)
+    for pk in removed:
+        previous_entries.append(index.pop(pk))
+    changed_or_removed = changed | removed
+
+    # Sources with the same normalized content are exact duplicates: LSH works on the distinct contents
+    pks_by_hash = {}
+    signatures = {}
+    for pk, (normalized_hash, signature) in sorted(index.items()):
+        pks_by_hash.setdefault(normalized_hash, []).append(pk)
+        signatures[normalized_hash] = signature
+    changed_hashes = {index[pk][0] for pk in changed if pk in index}
+
+    # Update the bands of the contents that disappeared and of the changed contents
+    for normalized_hash, signature in previous_entries:
+        if normalized_hash in pks_by_hash:
+            continue
+        for key in band_keys(signature):
+            band = bands.get(key, [])
+            if normalized_hash in band:
+                band.remove(normalized_hash)
+                if not band:
+                    del bands[key]
+    for normalized_hash in changed_hashes:
+        for key in band_keys(signatures[normalized_hash]):
+            band = bands.setdefault(key, [])
+            if normalized_hash not in band:
+                band.append(normalized_hash)
+
+    # Collect the similar contents of the changed contents sharing a band
+    similar = {}
+    for changed_hash in changed_hashes:
+        scores = similar[changed_hash] = {changed_hash: 1.0}
+        for key in band_keys(signatures[changed_hash]):
+            for normalized_hash in bands[key]:
+                if normalized_hash in scores or normalized_hash not in signatures:
+                    continue
+                score = round(
+                    similarity(signatures[changed_hash], signatures[normalized_hash]), 3
+                )
+                if score >= threshold:
+                    scores[normalized_hash] = score
+
+    # Rebuild the registries of the changed sources, add the changed sources to the registries of their partners
+    max_entries = get_setting("BABELBASE_DUPLICATE_MAX_ENTRIES")
+    changed_pks_by_hash = {}
+    for pk in sorted(changed):
+        if pk in index:
+            changed_pks_by_hash.setdefault(index[pk][0], []).append(pk)
+    similar_to_changed = {}
+    for changed_hash, scores in similar.items():
+        for normalized_hash, score in scores.items():
+            similar_to_changed.setdefault(normalized_hash, {})[changed_hash] = score
+
+    updated_registries = {}
+    for pk, registry in registries.items():
+        if pk in changed_or_removed:
+            updated_registries[pk] = []
+        elif any(entry["id"] in changed_or_removed for entry in registry):
+            updated_registries[pk] = [
+                entry for entry in registry if entry["id"] not in changed_or_removed
+            ]
+    duplicates = 0
+    for pk, (normalized_hash, _signature) in index.items():
+        if pk in changed:
+            entries = top_entries(
+                pk, similar[normalized_hash], pks_by_hash, max_entries
+            )
+            duplicates += len(entries)
+        elif normalized_hash in similar_to_changed:
+            entries = top_entries(
+                pk,
+                similar_to_changed[normalized_hash],
+                changed_pks_by_hash,
+                max_entries,
+            )
+            entries.extend(updated_registries.get(pk, registries.get(pk, [])))
+        else:
+            continue
+        updated_registries[pk] = entries
+
+    # Write the registries that differ
+    changed_sources = []
+    for pk, registry in updated_registries.items():
+        if pk in removed:
+            continue
+        registry.sort(key=lambda entry: (-entry["score"], entry["id"]))
+        del registry[max_entries:]
+        if registry != registries.get(pk, []):
+            changed_sources.append(
+                TranslationSource(pk=pk, duplicates_registry=registry)
+            )
+    with transaction.atomic():
+        for batch in batched(changed_sources, batch_size):
+            TranslationSource.objects.bulk_update(batch, ["duplicates_registry"])
+
+    if index_path:
+        save_index(index_path, index, bands)
+    return {
+        "sources": len(seen),
+        "indexed": len(changed),
+        "removed": len(removed),
+        "duplicates": duplicates,
+        "updated": len(changed_sources),
+    }
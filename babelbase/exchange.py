@@ -0,0 +1,317 @@
+"""
+Streaming JSONL export and import of the translations.
+
+Each line holds one source with its translation targets, identified by natural keys:
+{"namespace": slug, "identifier": slug, "lang": code, "content": text,
+ "targets": {locale: {"content": text, "translated": bool, "approved": bool, "source_fingerprint": digest}}}
+
+The export reads the sources in chunks (keyset on the primary key) with one query for the targets of each chunk. The
+import reads batches of lines and writes them with batched upserts, skipping the sources whose fingerprint and the
+targets whose values did not change. Both run with constant memory, independent of the size of the file.
+
+A target without "approved" (e.g. from a PO file imported without approval) keeps the approval and source fingerprint
+of the existing target if its content did not change, otherwise it is not approved.
+"""
+
+import gzip
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.signals import invalidate_translations
+from babelbase.utils import content_fingerprint, identifier_bucket
+
+TARGET_FIELDS = ("content", "translated", "approved", "source_fingerprint")
+
+
+@contextmanager
+def open_text(path, mode):
+    """Opens the path ("-" for stdin/stdout) as text, gzip compressed if it ends with .gz"""
+    if path == "-":
+        yield sys.stdout if mode == "w" else sys.stdin
+    elif path.endswith(".gz"):
+        with gzip.open(path, f"{mode}t", encoding="utf-8") as file:
+            yield file
+    else:
+        with open(path, mode, encoding="utf-8") as file:
+            yield file
+
+
+def export_records(
+    namespaces=None,
+    locales=None,
+    chunk_size=1000,
+    fingerprints=False,
+    source_filter=None,
+    target_filter=None,
+):
+    """
+    Yields the records (see module) of the sources of the namespaces with their targets of the locales (all if None).
+    With fingerprints, the records include the "fingerprint" of the source content. The optional Q objects
+    source_filter and target_filter narrow down the exported sources and targets.
+    """
+    condition = source_filter or Q()
+    if namespaces:
+        condition &= Q(namespace__namespace__in=namespaces)
+    target_condition = target_filter or Q()
+    if locales is not None:
+        target_condition &= Q(_lang__in=locales)
+    last_pk = 0
+    while True:
+        sources = list(
+            TranslationSource.objects.filter(condition, pk__gt=last_pk)
+            .order_by("pk")
+            .values_list(
+                "pk",
+                "namespace__namespace",
+                "identifier",
+                "_lang",
+                "content",
+                "fingerprint",
+            )[:chunk_size]
+        )
+        if not sources:
+            return
+        last_pk = sources[-1][0]
+        targets = {}
+        queryset = (
+            TranslationTarget.objects.filter(
+                target_condition, source_id__in=[source[0] for source in sources]
+            )
+            .order_by("_lang")
+            .values_list("source_id", "_lang", *TARGET_FIELDS)
+        )
+        for source_id, locale, *values in queryset:
+            targets.setdefault(source_id, {})[locale] = dict(zip(TARGET_FIELDS, values))
+        for pk, namespace, identifier, lang, content, fingerprint in sources:
+            record = {
+                "namespace": namespace,
+                "identifier": identifier,
+                "lang": lang,
+                "content": content,
+                "targets": targets.get(pk, {}),
+            }
+            if fingerprints:
+                record["fingerprint"] = fingerprint
+            yield record
+
+
+def write_records(path, records):
+    """Writes the records as JSON lines. Returns the number of written records"""
+    count = 0
+    with open_text(path, "w") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def export_translations(path, namespaces=None, locales=None, chunk_size=1000):
+    """Writes the translations to the JSONL file. Returns the number of exported sources"""
+    return write_records(path, export_records(namespaces, locales, chunk_size))
+
+
+class TranslationImport:
+    """Applies the lines of a JSONL export to the database in batches and counts the written rows"""
+
+    def __init__(
+        self, namespaces=None, locales=None, batch_size=1000, create_sources=True
+    ):
+        self.namespaces = set(namespaces) if namespaces else None
+        self.locales = set(locales) if locales else None
+        self.batch_size = batch_size
+        # Otherwise only the targets of existing sources are written
+        self.create_sources = create_sources
+        self.namespace_ids = {}
+        self.touched_namespaces = set()
+        self.lines = 0
+        self.skipped = 0
+        self.sources_written = 0
+        self.targets_written = 0
+
+    def resolve_namespaces(self, namespaces):
+        missing = set(namespaces).difference(self.namespace_ids)
+        if not missing:
+            return
+        self.namespace_ids.update(
+            Namespace.objects.filter(namespace__in=missing).values_list(
+                "namespace", "id"
+            )
+        )
+        missing.difference_update(self.namespace_ids)
+        if missing and self.create_sources:
+            Namespace.objects.bulk_create(
+                [Namespace(namespace=namespace) for namespace in missing],
+                ignore_conflicts=True,
+            )
+            self.namespace_ids.update(
+                Namespace.objects.filter(namespace__in=missing).values_list(
+                    "namespace", "id"
+                )
+            )
+
+    def load_sources(self, keys):
+        """Returns {(namespace_id, identifier): (pk, fingerprint)} of the existing sources"""
+        condition = Q(pk__in=[])
+        identifiers_by_namespace = {}
+        for namespace_id, identifier in keys:
+            identifiers_by_namespace.setdefault(namespace_id, []).append(identifier)
+        for namespace_id, identifiers in identifiers_by_namespace.items():
+            condition |= Q(namespace_id=namespace_id, identifier__in=identifiers)
+        queryset = TranslationSource.objects.filter(condition).values_list(
+            "pk", "namespace_id", "identifier", "fingerprint"
+        )
+        return {
+            (namespace_id, identifier): (pk, fingerprint)
+            for pk, namespace_id, identifier, fingerprint in queryset
+        }
+
+    def write_sources(self, lines):
+        """Upserts the new and changed sources. Returns {(namespace_id, identifier): (pk, fingerprint)}"""
+        keys = [
+            (self.namespace_ids[line["namespace"]], line["identifier"])
+            for line in lines
+        ]
+        existing = self.load_sources(keys)
+        sources = []
+        for key, line in zip(keys, lines):
+            fingerprint = content_fingerprint(line["content"])
+            previous = existing.get(key)
+            if previous is not None and previous[1] == fingerprint:
+                continue
+            sources.append(
+                TranslationSource(
+                    namespace_id=key[0],
+                    identifier=key[1],
+                    sync_bucket=identifier_bucket(key[1]),
+                    _lang=line.get("lang") or settings.LANGUAGE_CODE,
+                    content=line["content"],
+                    fingerprint=fingerprint,
+                    changed=True,
+                )
+            )
+        if sources:
+            TranslationSource.objects.bulk_create(
+                sources,
+                update_conflicts=True,
+                unique_fields=["namespace", "identifier"],
+                update_fields=["content", "fingerprint", "changed", "updated_at"],
+            )
+            self.sources_written += len(sources)
+            # Not every database returns the primary keys of upserted rows
+            existing = self.load_sources(keys)
+        return existing
+
+    def write_targets(self, lines, sources):
+        source_ids = []
+        targets = {}
+        # Targets that keep the approval of the existing target if their content did not change
+        keep_approval = set()
+        for line in lines:
+            pk, fingerprint = sources[
+                (self.namespace_ids[line["namespace"]], line["identifier"])
+            ]
+            source_ids.append(pk)
+            for locale, values in line.get("targets", {}).items():
+                if self.locales is None or locale in self.locales:
+                    target = TranslationTarget(
+                        source_id=pk,
+                        _lang=locale,
+                        content=values.get("content", ""),
+                        translated=values.get("translated", False),
+                        approved=bool(values.get("approved")),
+                        source_fingerprint=values.get("source_fingerprint") or "",
+                    )
+                    target.normalize_status(target.source_fingerprint or fingerprint)
+                    targets[(pk, locale)] = target
+                    if values.get("approved") is None:
+                        keep_approval.add((pk, locale))
+        if not targets:
+            return set()
+        queryset = TranslationTarget.objects.filter(
+            source_id__in=source_ids, _lang__in={locale for _, locale in targets}
+        ).values_list("source_id", "_lang", *TARGET_FIELDS)
+        for source_id, locale, *values in queryset:
+            target = targets.get((source_id, locale))
+            if target is None:
+                continue
+            existing = dict(zip(TARGET_FIELDS, values))
+            if (source_id, locale) in keep_approval and (
+                target.content,
+                target.translated,
+            ) == (existing["content"], existing["translated"]):
+                target.approved = existing["approved"]
+                target.source_fingerprint = existing["source_fingerprint"]
+            if values == [getattr(target, field) for field in TARGET_FIELDS]:
+                del targets[(source_id, locale)]
+        if targets:
+            TranslationTarget.objects.bulk_create(
+                targets.values(),
+                update_conflicts=True,
+                unique_fields=["source", "_lang"],
+                update_fields=[*TARGET_FIELDS, "updated_at"],
+            )
+            self.targets_written += len(targets)
+        return {target.source_id for target in targets.values()}
+
+    def import_batch(self, lines):
+        # The last line of a key wins, an upsert can not write the same row twice
+        lines = list(
+            {
+                (line["namespace"], line["identifier"]): line
+                for line in lines
+                if self.namespaces is None or line["namespace"] in self.namespaces
+            }.values()
+        )
+        if not lines:
+            return
+        self.resolve_namespaces({line["namespace"] for line in lines})
+        with transaction.atomic():
+            if self.create_sources:
+                sources = self.write_sources(lines)
+            else:
+                sources = self.load_sources(
+                    (self.namespace_ids[line["namespace"]], line["identifier"])
+                    for line in lines
+                    if line["namespace"] in self.namespace_ids
+                )
+                existing_lines = [
+                    line
+                    for line in lines
+                    if (
+                        self.namespace_ids.get(line["namespace"]),
+                        line["identifier"],
+                    )
+                    in sources
+                ]
+                self.skipped += len(lines) - len(existing_lines)
+                lines = existing_lines
+            changed_source_ids = self.write_targets(lines, sources)
+            # Bulk operations do not send signals
+            if changed_source_ids:
+                TranslationSource.objects.recompute_locale_status(
+                    Q(pk__in=changed_source_ids)
+                )
+        self.touched_namespaces.update(line["namespace"] for line in lines)
+
+    def import_records(self, records):
+        """Imports the records (see module) of the iterable in batches"""
+        records = iter(records)
+        while batch := list(islice(records, self.batch_size)):
+            self.lines += len(batch)
+            self.import_batch(batch)
+        invalidate_translations(self.touched_namespaces)
+        return self
+
+    def run(self, path):
+        with open_text(path, "r") as file:
+            return self.import_records(
+                json.loads(line) for line in file if line.strip()
+            )
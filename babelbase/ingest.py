@@ -0,0 +1,286 @@
+"""
+Bulk ingestion of the translation sources discovered in the templates (see babelbase.scanner).
+
+The matches of all templates are merged in memory per (namespace, identifier). Within a single transaction, the
+namespaces are resolved at once, the existing sources are loaded in batches, new sources are inserted with batched
+bulk_create(update_conflicts=True) and sources with changed template appearances are written with bulk_update.
+
+The text of a tag in the templates (placeholder, fallback body) is the content of a new source. Its fingerprint is
+stored as template_fingerprint, independent of the content that may be edited in the admin. Only if the template text
+changed since the last ingestion, the content and fingerprint of the existing source are updated, so its translations
+become outdated. With update_content=False the drifted sources are only reported. The template text of sources that
+were not ingested from templates before is only recorded.
+
+Sources of the templates that are no longer referenced in any template are flagged as not_used by mark_stale_sources.
+Sources without template appearances (used from Python or created in the admin or by an import) are never stale.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from babelbase.models import Namespace, TranslationSource
+from babelbase.signals import invalidate_translations
+from babelbase.utils import content_fingerprint, identifier_bucket
+
+
+def collect_sources(templates):
+    """
+    Merges the matches of the scanned templates into {(namespace, identifier): {"content": text, "templates": set}}.
+    The content is the text of the first appearance.
+    """
+    sources = {}
+    for template in templates.values():
+        for tag, namespace, identifier, text in template["matches"]:
+            source = sources.setdefault(
+                (namespace, identifier), {"content": text, "templates": set()}
+            )
+            source["templates"].add(template["name"])
+    return sources
+
+
+def collect_keys(templates):
+    """Returns the set of (namespace, identifier) keys referenced in the scanned templates"""
+    return {
+        (namespace, identifier)
+        for template in templates.values()
+        for tag, namespace, identifier, text in template["matches"]
+    }
+
+
+def template_fingerprint(text):
+    """Returns the fingerprint of the text of a tag in the templates, empty for tags without a text"""
+    return content_fingerprint(text) if text.strip() else ""
+
+
+def batched(items, batch_size):
+    items = list(items)
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
+
+class SourceIngestion:
+    """Applies the discovered sources to the database and records the timing and row count of each phase"""
+
+    def __init__(self, batch_size=1000, update_content=True):
+        self.batch_size = batch_size
+        # Otherwise sources whose template content changed are only reported in drifted
+        self.update_content = update_content
+        self.phases = []
+        self.found = 0
+        self.created = 0
+        self.updated = 0
+        self.drifted = []
+
+    def record_phase(self, name, rows, start):
+        self.phases.append((name, rows, time.perf_counter() - start))
+
+    def resolve_namespaces(self, namespaces):
+        """Returns {namespace: id}, creating the missing namespaces"""
+        start = time.perf_counter()
+        namespace_ids = dict(
+            Namespace.objects.filter(namespace__in=namespaces).values_list(
+                "namespace", "id"
+            )
+        )
+        missing = namespaces.difference(namespace_ids)
+        if missing:
+            Namespace.objects.bulk_create(
+                [Namespace(namespace=namespace) for namespace in missing],
+                ignore_conflicts=True,
+            )
+            namespace_ids.update(
+                Namespace.objects.filter(namespace__in=missing).values_list(
+                    "namespace", "id"
+                )
+            )
+        self.record_phase("Resolve namespaces", len(missing), start)
+        return namespace_ids
+
+    def load_existing(self, keys, namespace_ids):
+        """
+        Returns {(namespace, identifier): (id, template_registry, fingerprint, template_fingerprint)} of the existing
+        sources
+        """
+        start = time.perf_counter()
+        identifiers_by_namespace = {}
+        for namespace, identifier in keys:
+            identifiers_by_namespace.setdefault(namespace, []).append(identifier)
+        namespaces_by_id = {pk: namespace for namespace, pk in namespace_ids.items()}
+        existing = {}
+        for namespace, identifiers in identifiers_by_namespace.items():
+            for identifier_batch in batched(identifiers, self.batch_size):
+                queryset = TranslationSource.objects.filter(
+                    Q(namespace_id=namespace_ids[namespace])
+                    & Q(identifier__in=identifier_batch)
+                ).values_list(
+                    "id",
+                    "namespace_id",
+                    "identifier",
+                    "template_registry",
+                    "fingerprint",
+                    "template_fingerprint",
+                )
+                for pk, namespace_id, identifier, *values in queryset:
+                    existing[(namespaces_by_id[namespace_id], identifier)] = (
+                        pk,
+                        *values,
+                    )
+        self.record_phase("Load existing sources", len(existing), start)
+        return existing
+
+    def create_sources(self, sources, namespace_ids):
+        start = time.perf_counter()
+        new_sources = [
+            TranslationSource(
+                namespace_id=namespace_ids[namespace],
+                identifier=identifier,
+                sync_bucket=identifier_bucket(identifier),
+                _lang=settings.LANGUAGE_CODE,
+                content=source["content"],
+                fingerprint=content_fingerprint(source["content"]),
+                template_fingerprint=template_fingerprint(source["content"]),
+                template_registry=sorted(source["templates"]),
+            )
+            for (namespace, identifier), source in sources.items()
+        ]
+        TranslationSource.objects.bulk_create(
+            new_sources,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["namespace", "identifier"],
+            update_fields=["template_registry"],
+        )
+        self.created = len(new_sources)
+        self.record_phase("Create sources", self.created, start)
+
+    def update_sources(self, sources, existing):
+        """Writes the template appearances and the content of the sources whose template text changed"""
+        start = time.perf_counter()
+        now = timezone.now()
+        changed_registries, changed_contents = [], []
+        for key, source in sources.items():
+            pk, registry, fingerprint, previous_template_fingerprint = existing[key]
+            template_registry = sorted(source["templates"])
+            text_fingerprint = template_fingerprint(source["content"])
+            # Tags without a text (e.g. babel without placeholder) do not define the content. The content of a source
+            # seen for the first time in the templates or already matching the text is kept
+            drifted = (
+                text_fingerprint
+                and previous_template_fingerprint
+                and text_fingerprint != previous_template_fingerprint
+                and text_fingerprint != fingerprint
+            )
+            if drifted:
+                self.drifted.append(key)
+                if not self.update_content:
+                    # Reported until the content is updated
+                    text_fingerprint = previous_template_fingerprint
+            if drifted and self.update_content:
+                changed_contents.append(
+                    TranslationSource(
+                        pk=pk,
+                        template_registry=template_registry,
+                        template_fingerprint=text_fingerprint,
+                        content=source["content"],
+                        fingerprint=text_fingerprint,
+                        changed=True,
+                        updated_at=now,
+                    )
+                )
+            elif registry != template_registry or (
+                text_fingerprint and text_fingerprint != previous_template_fingerprint
+            ):
+                changed_registries.append(
+                    TranslationSource(
+                        pk=pk,
+                        template_registry=template_registry,
+                        template_fingerprint=text_fingerprint
+                        or previous_template_fingerprint,
+                    )
+                )
+        TranslationSource.objects.bulk_update(
+            changed_registries,
+            ["template_registry", "template_fingerprint"],
+            batch_size=self.batch_size,
+        )
+        TranslationSource.objects.bulk_update(
+            changed_contents,
+            [
+                "template_registry",
+                "template_fingerprint",
+                "content",
+                "fingerprint",
+                "changed",
+                "updated_at",
+            ],
+            batch_size=self.batch_size,
+        )
+        self.updated = len(changed_registries) + len(changed_contents)
+        self.record_phase("Update sources", self.updated, start)
+
+    def run(self, templates):
+        """Ingests the matches of the scanned templates {path: {"name": name, "matches": [...]}}"""
+        start = time.perf_counter()
+        sources = collect_sources(templates)
+        self.found = sum(len(template["matches"]) for template in templates.values())
+        self.record_phase("Merge matches", len(sources), start)
+        namespaces = {namespace for namespace, _ in sources}
+        with transaction.atomic():
+            namespace_ids = self.resolve_namespaces(namespaces)
+            existing = self.load_existing(sources.keys(), namespace_ids)
+            self.create_sources(
+                {key: source for key, source in sources.items() if key not in existing},
+                namespace_ids,
+            )
+            self.update_sources(
+                {key: source for key, source in sources.items() if key in existing},
+                existing,
+            )
+        # Bulk operations do not send signals
+        invalidate_translations(namespaces)
+        return self
+
+
+def mark_stale_sources(found_keys, batch_size=1000, chunk_size=5000):
+    """
+    Flags the sources of the templates not referenced by the found keys as not_used and unflags the ones that
+    reappeared. Only sources with template appearances are checked, the keys used from Python or created by the admin
+    and the imports have none. The sources are streamed in chunks, so only the ids of the sources to change are held
+    in memory. Returns the report:
+    {"sources": count, "stale": count, "flagged": [[namespace, identifier], ...], "unflagged": [...]}
+    """
+    namespaces_by_id = dict(Namespace.objects.values_list("id", "namespace"))
+    flagged, unflagged = [], []
+    sources = stale = 0
+    queryset = (
+        TranslationSource.objects.exclude(template_registry=[])
+        .order_by()
+        .values_list("id", "namespace_id", "identifier", "not_used")
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, namespace_id, identifier, not_used in queryset:
+        key = (namespaces_by_id[namespace_id], identifier)
+        sources += 1
+        if key in found_keys:
+            if not_used:
+                unflagged.append((pk, key))
+        else:
+            stale += 1
+            if not not_used:
+                flagged.append((pk, key))
+    with transaction.atomic():
+        for not_used, changes in ((True, flagged), (False, unflagged)):
+            for batch in batched(changes, batch_size):
+                TranslationSource.objects.filter(
+                    pk__in=[pk for pk, key in batch]
+                ).update(not_used=not_used)
+    return {
+        "sources": sources,
+        "stale": stale,
+        "flagged": [list(key) for pk, key in flagged],
+        "unflagged": [list(key) for pk, key in unflagged],
+    }
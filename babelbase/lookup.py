@@ -0,0 +1,91 @@
+"""
+Lookup of translation records used by the template tags and the deferred resolution.
+
+A record is the tuple (source_id, text), where text is the approved translation of the locale if available,
+otherwise the source content. A missing key resolves to None.
+
+Lookups are answered by the compiled catalog of the locale if available. Remaining keys pass through the negative
+lookup cache of missing keys, the process-local translation cache and, if configured, the namespace/locale bundles
+before hitting the database.
+"""
+
+from babelbase import bundles, catalog
+from babelbase.cache import translation_cache
+from babelbase.manifest import get_template_manifest
+from babelbase.missing import missing_key_cache, report_missing_key
+from babelbase.models import TranslationSource
+from babelbase.utils import get_current_locale, get_setting
+
+RENDER_CONTEXT_KEY = "babelbase_manifest_records"
+
+
+def fetch_records(keys, locale):
+    """Fetches the records from the bundles if configured, otherwise from the database"""
+    if bundles.get_bundle_cache() is not None:
+        return bundles.resolve_records(keys, locale)
+    return TranslationSource.objects.resolve_records(keys, locale)
+
+
+def resolve_records(keys, locale=None):
+    """Returns a dict {(namespace, identifier): record} of all keys found, resolving cache misses in one query"""
+    if not locale:
+        locale = get_current_locale()
+    keys = set(keys)
+    records = catalog.resolve_records(keys, locale)
+    keys.difference_update(records)
+    keys.difference_update(missing_key_cache.filter_missing(keys, locale))
+    if not keys:
+        return records
+    if get_setting("BABELBASE_LOCAL_CACHE"):
+        cached = translation_cache.get_many(
+            (namespace, identifier, locale) for namespace, identifier in keys
+        )
+        records.update((key[:2], record) for key, record in cached.items())
+        keys.difference_update(records)
+    if keys:
+        fetched = fetch_records(keys, locale)
+        if get_setting("BABELBASE_LOCAL_CACHE"):
+            translation_cache.set_many(
+                {(*key, locale): record for key, record in fetched.items()}
+            )
+        missing_key_cache.add(keys.difference(fetched), locale)
+        records.update(fetched)
+    return records
+
+
+def get_prefetched_records(context):
+    """
+    Returns the records of the manifest keys of the template being rendered for the current locale. On first access
+    within the render, the whole manifest is bulk-loaded. Keys of the manifest missing in the database map to None.
+    Returns None if the context is not bound to a template.
+    """
+    template = getattr(context, "template", None)
+    if template is None:
+        return None
+    locale = get_current_locale()
+    # Stored in the root scope of the render context, as each include pushes an isolated scope
+    render_scope = context.render_context.dicts[0]
+    records_by_locale = render_scope.setdefault(RENDER_CONTEXT_KEY, {})
+    if locale not in records_by_locale:
+        manifest = get_template_manifest(template)
+        records = dict.fromkeys(manifest)
+        if manifest:
+            records.update(resolve_records(manifest, locale))
+        records_by_locale[locale] = records
+    return records_by_locale[locale]
+
+
+def lookup_record(namespace, identifier, context=None):
+    """
+    Returns the record of the key in the current locale, checking the manifest prefetch of the context first.
+    Missing keys are reported.
+    """
+    key = (namespace, identifier)
+    records = get_prefetched_records(context) if context is not None else None
+    if records is not None and key in records:
+        record = records[key]
+    else:
+        record = resolve_records([key]).get(key)
+    if record is None:
+        report_missing_key(namespace, identifier)
+    return record
@@ -0,0 +1,47 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from babelbase.catalog import catalog_path, compile_catalog
+from babelbase.utils import all_locales, get_setting
+
+
+class Command(BaseCommand):
+    """
+    This management command compiles the translations of every locale into a memory-mapped catalog file, which is
+    used as zero-query read path by the template tags and db_gettext_lazy.
+
+    RUN: python manage.py compile_babelbase_catalog
+    """
+
+    help = "Compile the translations into memory-mapped catalog files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--locale",
+            action="append",
+            dest="locales",
+            help="Locale to compile (repeatable). Defaults to all locales in settings.LANGUAGES",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=get_setting("BABELBASE_CATALOG_DIR"),
+            help="Directory of the catalog files. Defaults to settings.BABELBASE_CATALOG_DIR",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["output_dir"]
+        if not directory:
+            raise CommandError(
+                "Set BABELBASE_CATALOG_DIR or pass --output-dir to compile the catalogs"
+            )
+        os.makedirs(directory, exist_ok=True)
+        print("===\nCompile babelbase catalogs:\n===")
+        for locale in options["locales"] or all_locales():
+            start = time.perf_counter()
+            count = compile_catalog(directory, locale)
+            duration = time.perf_counter() - start
+            print(
+                f"{catalog_path(directory, locale)}: {count} entries in {duration:.2f}s"
+            )
@@ -0,0 +1,57 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from babelbase.sync import export_delta
+
+
+class Command(BaseCommand):
+    """
+    This management command compares the digest tree of this environment with the digest file of another environment
+    (see write_babelbase_digest) and exports only the differing translations as JSONL. Apply the file in the other
+    environment with import_babelbase_translations.
+
+    RUN: python manage.py export_babelbase_delta production_digest.json delta.jsonl.gz
+    """
+
+    help = "Export the translations differing from a digest file as JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "digest", help="Path of the digest file of the other environment"
+        )
+        parser.add_argument("path", help="Path of the JSONL file, - for stdout")
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            dest="namespaces",
+            help="Namespace to compare (repeatable). Defaults to all namespaces",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sources per query",
+        )
+
+    def handle(self, *args, **options):
+        # Keep stdout clean for the exported lines
+        log = sys.stderr if options["path"] == "-" else sys.stdout
+        print("===\nExport babelbase delta:\n===", file=log)
+        start = time.perf_counter()
+        try:
+            buckets, count = export_delta(
+                options["digest"],
+                options["path"],
+                namespaces=options["namespaces"],
+                chunk_size=options["batch_size"],
+            )
+        except ValueError as e:
+            raise CommandError(e) from e
+        duration = time.perf_counter() - start
+        print(
+            f"Exported {count} translations of {buckets} differing buckets "
+            f"in {duration:.2f}s",
+            file=log,
+        )
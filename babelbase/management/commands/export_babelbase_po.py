@@ -0,0 +1,62 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from babelbase.po import export_mo, export_po
+
+
+class Command(BaseCommand):
+    """
+    This management command streams the sources with the translations of a locale into a gettext PO file
+    (msgctxt = namespace, msgid = identifier), a PO template without --locale. With --mo, the approved translations
+    are compiled into a MO file.
+
+    RUN: python manage.py export_babelbase_po de.po --locale de
+    """
+
+    help = "Export the translations as gettext PO or MO file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the PO/MO file, - for stdout")
+        parser.add_argument(
+            "--locale",
+            default=None,
+            help="Locale of the translations. Without a locale a PO template is written",
+        )
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            dest="namespaces",
+            help="Namespace to export (repeatable). Defaults to all namespaces",
+        )
+        parser.add_argument(
+            "--mo",
+            action="store_true",
+            help="Write a compiled MO file of the approved translations",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sources per query",
+        )
+
+    def handle(self, *args, **options):
+        if options["mo"] and not options["locale"]:
+            raise CommandError("A MO file requires --locale")
+        if options["mo"] and options["path"] == "-":
+            raise CommandError("A MO file can not be written to stdout")
+        # Keep stdout clean for the exported file
+        log = sys.stderr if options["path"] == "-" else sys.stdout
+        print("===\nExport babelbase PO file:\n===", file=log)
+        export = export_mo if options["mo"] else export_po
+        start = time.perf_counter()
+        count = export(
+            options["path"],
+            options["locale"],
+            namespaces=options["namespaces"],
+            chunk_size=options["batch_size"],
+        )
+        duration = time.perf_counter() - start
+        print(f"Exported {count} entries in {duration:.2f}s", file=log)
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from babelbase.exchange import export_translations
+
+
+class Command(BaseCommand):
+    """
+    This management command streams the translations into a JSONL file (gzip compressed if it ends with .gz), one
+    source with its translation targets per line.
+
+    RUN: python manage.py export_babelbase_translations translations.jsonl.gz
+    """
+
+    help = "Export the translations as JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the JSONL file, - for stdout")
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            dest="namespaces",
+            help="Namespace to export (repeatable). Defaults to all namespaces",
+        )
+        parser.add_argument(
+            "--locale",
+            action="append",
+            dest="locales",
+            help="Locale of the translation targets to export (repeatable). Defaults to all locales",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sources per query",
+        )
+
+    def handle(self, *args, **options):
+        # Keep stdout clean for the exported lines
+        log = sys.stderr if options["path"] == "-" else sys.stdout
+        print("===\nExport babelbase translations:\n===", file=log)
+        start = time.perf_counter()
+        count = export_translations(
+            options["path"],
+            namespaces=options["namespaces"],
+            locales=options["locales"],
+            chunk_size=options["batch_size"],
+        )
+        duration = time.perf_counter() - start
+        print(f"Exported {count} translations in {duration:.2f}s", file=log)
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from babelbase.po import import_po
+
+
+class Command(BaseCommand):
+    """
+    This management command streams the translations of a gettext PO file (msgctxt = namespace, msgid = identifier)
+    into the translation targets of the locale. Entries of unknown sources are skipped.
+
+    RUN: python manage.py import_babelbase_po de.po --locale de
+    """
+
+    help = "Import the translations of a gettext PO file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the PO file, - for stdin")
+        parser.add_argument(
+            "--locale", required=True, help="Locale of the translations"
+        )
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            dest="namespaces",
+            help="Namespace to import (repeatable). Defaults to all namespaces",
+        )
+        parser.add_argument(
+            "--approve",
+            action="store_true",
+            help="Approve the imported translations that are not marked fuzzy",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of entries per bulk query",
+        )
+
+    def handle(self, *args, **options):
+        print("===\nImport babelbase PO file:\n===")
+        start = time.perf_counter()
+        result = import_po(
+            options["path"],
+            options["locale"],
+            namespaces=options["namespaces"],
+            approve=options["approve"],
+            batch_size=options["batch_size"],
+        )
+        duration = time.perf_counter() - start
+        print(f"Read {result.lines} translations in {duration:.2f}s")
+        print(
+            f"Wrote {result.targets_written} translation targets, "
+            f"skipped {result.skipped} entries of unknown sources."
+        )
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from babelbase.exchange import TranslationImport
+
+
+class Command(BaseCommand):
+    """
+    This management command streams the translations from a JSONL file of export_babelbase_translations into the
+    database. Only new and changed sources and translation targets are written.
+
+    RUN: python manage.py import_babelbase_translations translations.jsonl.gz
+    """
+
+    help = "Import the translations from JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the JSONL file, - for stdin")
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            dest="namespaces",
+            help="Namespace to import (repeatable). Defaults to all namespaces",
+        )
+        parser.add_argument(
+            "--locale",
+            action="append",
+            dest="locales",
+            help="Locale of the translation targets to import (repeatable). Defaults to all locales",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of lines per bulk query",
+        )
+
+    def handle(self, *args, **options):
+        print("===\nImport babelbase translations:\n===")
+        start = time.perf_counter()
+        result = TranslationImport(
+            namespaces=options["namespaces"],
+            locales=options["locales"],
+            batch_size=options["batch_size"],
+        ).run(options["path"])
+        duration = time.perf_counter() - start
+        print(f"Read {result.lines} translations in {duration:.2f}s")
+        print(
+            f"Wrote {result.sources_written} sources and "
+            f"{result.targets_written} translation targets."
+        )
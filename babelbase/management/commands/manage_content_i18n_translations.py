@@ -1,127 +1,130 @@
-import os
-import re
+import json
+import time
 
-from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db.models import Count
 
-from babelbase.models import Content
+from babelbase.duplicates import find_duplicates
+from babelbase.ingest import SourceIngestion, collect_keys, mark_stale_sources
+from babelbase.scanner import scan_templates
 
 
 class Command(BaseCommand):
     """
-    This management command iterates through all templates and get_or_creates the translations from the
-    templates. This way, it's easy to update the translation state of an instance.
+    This management command iterates through all templates and creates or updates the translation sources from
+    the templates in bulk. This way, it's easy to update the translation state of an instance.
 
     RUN: python manage.py manage_content_i18n_translations
     """
 
-    all_matches = {}
-    found_matches = 0
-    new_matches = 0
-
-    pattern_any_thing = r'[\s\w"\']+'
-    pattern_slug_param = r'\s+["\']([a-zA-Z0-9_-]+)["\']\s+'
-    pattern_unicode = r'["\']([\p{L}]+)["\']'
-    negative_lookahead_until_pattern = r"(?!{%)(.*?)"
-
-    pattern_get_content = r"""
-    {%\s*                           # Open brackets
-    (get_content)\s+                # keyword
-    ["\']([a-zA-Z0-9_-]+)["\']\s+   # first param   (namespace)
-    ["\']([a-zA-Z0-9_-]+)["\']\s+   # second param  (key)
-    ["\']([^"\']+)["\']             # third param  (free text)
-    \s*%}
-    """
-
-    pattern_blockcontent_i18n = r"""
-    {%\s*
-    (blockcontent_i18n)\s+                      # keyword
-    ["\']([a-zA-Z0-9_-]+)["\']\s+               # first param   (namespace)
-    ["\']([a-zA-Z0-9_-]+)["\']\s*%}             # second param  (key)
-    (.*?)(?={%\s*endblockcontent_i18n\s*%}|$)    # third param  (free text)
-    """
-
-    def get_template_path_list(self):
-        template_paths = []
-        directory_path = settings.TEMPLATES[0]["DIRS"][0]
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                if file.endswith(".html"):
-                    template_paths.append(os.path.join(root, file))
-        return template_paths
-
-    def match_template_tags(self, content):
-        # matches the get_content and bkockcontent_i18n tags
-        matches = []
-        matches_get_content = re.findall(
-            self.pattern_get_content, content, re.DOTALL | re.VERBOSE
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--manifest",
+            default=None,
+            help="Path of the scan manifest to skip unchanged templates. Defaults to BABELBASE_SCAN_MANIFEST, "
+            "empty string disables it",
         )
-        matches.extend(matches_get_content)
-        matches_blockcontent_i18n = re.findall(
-            self.pattern_blockcontent_i18n, content, re.DOTALL | re.VERBOSE
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows per bulk query",
+        )
+        parser.add_argument(
+            "--keep-content",
+            action="store_true",
+            help="Only report the sources whose content in the templates changed instead of updating them",
+        )
+        parser.add_argument(
+            "--duplicate-index",
+            default=None,
+            help="Path of the index of the near-duplicate detection. Defaults to BABELBASE_DUPLICATE_INDEX, "
+            "empty string disables it",
+        )
+        parser.add_argument(
+            "--stale-report",
+            default=None,
+            help="Path of a JSON report of the stale translations",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help="Number of scanner processes. Defaults to the number of CPUs",
         )
-        matches.extend(matches_blockcontent_i18n)
-        return matches
-
-    def get_or_create_content(self):
-        # Fetches the content object and
-        for path, match_list in self.all_matches.items():
-            relative_template_path = path.split(
-                "kinderwunschpraxis_stuttgart_villa_haag/templates/"
-            )[1]
-            # TODO: only if command is verbose
-            # print(relative_template_path)
-            for match in match_list:
-                object, created = Content.objects.get_or_create(
-                    view_identifier=match[1],
-                    key_identifier=match[2],
-                    defaults={"snippet_de": match[3]},
-                )
-                if object:
-                    object.found_in(relative_template_path)
-                    object.save()
-                    self.found_matches += 1
-                    self.new_matches += created
 
-    def makedbtranslations(self):
-        self.all_matches = {}
-        for template_path in self.get_template_path_list():
-            self.all_matches[template_path] = []
-            with open(template_path) as file:
-                self.all_matches[template_path].extend(
-                    self.match_template_tags(file.read())
-                )
+    def makedbtranslations(
+        self, manifest=None, jobs=None, batch_size=1000, update_content=True
+    ):
+        start = time.perf_counter()
+        scan = scan_templates(manifest_path=manifest, jobs=jobs)
+        print(
+            f"Scanned {scan.scanned} changed of {len(scan.templates)} templates "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
         # Update the database
-        self.get_or_create_content()
+        ingestion = SourceIngestion(
+            batch_size=batch_size, update_content=update_content
+        ).run(scan.templates)
+        for phase, rows, duration in ingestion.phases:
+            print(f"{phase}: {rows} rows in {duration:.2f}s")
         # Print statistics
-        print(f"Found {self.found_matches} translation in total.")
-        print(f"Found {self.new_matches} new translations.")
-
-    def finddbtranslations_duplicates(self):
-        duplicates = (
-            Content.objects.values("snippet_en")
-            .annotate(text_count=Count("snippet_en"))
-            .filter(text_count__gt=1)
+        print(f"Found {ingestion.found} translation in total.")
+        print(f"Found {ingestion.created} new translations.")
+        print(f"Updated {ingestion.updated} translations.")
+        if ingestion.drifted:
+            action = "Updated" if update_content else "Kept"
+            print(
+                f"{action} the content of {len(ingestion.drifted)} translations changed in the templates:"
+            )
+            for namespace, identifier in ingestion.drifted:
+                print(f"  {namespace}: {identifier}")
+        return scan
+
+    def finddbtranslations_duplicates(self, index=None, batch_size=1000):
+        start = time.perf_counter()
+        result = find_duplicates(index_path=index, batch_size=batch_size)
+        print(
+            f"Indexed {result['indexed']} changed of {result['sources']} translations "
+            f"in {time.perf_counter() - start:.2f}s"
         )
-        if not duplicates:
-            print("No duplicates found")
-            return len(duplicates)
-        for duplicate in duplicates:
-            text_value = duplicate["snippet_en"]
-            count = duplicate["text_count"]
-            print(f"Text: {text_value}, Count: {count}")
-
-    def finddbtranslations_stale(self):
-        print("NOT IMPLEMENTED YET")
+        if not result["duplicates"]:
+            print("No new duplicates found")
+        else:
+            print(f"Found {result['duplicates']} potential duplicates.")
+        print(f"Updated the duplicates registry of {result['updated']} translations.")
+        return result
+
+    def finddbtranslations_stale(self, scan, batch_size=1000, report=None):
+        start = time.perf_counter()
+        result = mark_stale_sources(collect_keys(scan.templates), batch_size=batch_size)
+        print(
+            f"Found {result['stale']} stale of {result['sources']} translations "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        print(f"Flagged {len(result['flagged'])} translations as not used.")
+        print(f"Unflagged {len(result['unflagged'])} translations in use again.")
+        if report:
+            with open(report, "w") as file:
+                json.dump(result, file, indent=2)
+            print(f"Report written to {report}")
+        return result
 
     def handle(self, *args, **options):
         print("===\nManage content_i18n translations:\n===")
         print("\nFind new translations in templates...")
-        self.makedbtranslations()
+        scan = self.makedbtranslations(
+            manifest=options["manifest"],
+            jobs=options["jobs"],
+            batch_size=options["batch_size"],
+            update_content=not options["keep_content"],
+        )
         print("\nFind potential duplicate translations in the database...")
-        self.finddbtranslations_duplicates()
+        self.finddbtranslations_duplicates(
+            index=options["duplicate_index"], batch_size=options["batch_size"]
+        )
         print(
             "\nFind potential stale translations in the database, but not in the template.."
         )
-        self.finddbtranslations_stale()
+        self.finddbtranslations_stale(
+            scan, batch_size=options["batch_size"], report=options["stale_report"]
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from babelbase.models import TranslationSource
+
+
+class Command(BaseCommand):
+    """
+    This management command recomputes the translation status per locale and the complete flag of all sources with one
+    aggregate query, e.g. after bulk imports or a change of settings.LANGUAGES.
+
+    RUN: python manage.py recompute_babelbase_status
+    """
+
+    help = "Recompute the translation status of the sources"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows per bulk query",
+        )
+
+    def handle(self, *args, **options):
+        print("===\nRecompute babelbase translation status:\n===")
+        start = time.perf_counter()
+        updated = TranslationSource.objects.recompute_locale_status(
+            batch_size=options["batch_size"]
+        )
+        duration = time.perf_counter() - start
+        print(f"Updated the status of {updated} translations in {duration:.2f}s")
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from babelbase.sync import write_digest_file
+
+
+class Command(BaseCommand):
+    """
+    This management command writes the digest tree of the translations of this environment, e.g. on production. It is
+    compared by export_babelbase_delta in the environment with the changes.
+
+    RUN: python manage.py write_babelbase_digest production_digest.json
+    """
+
+    help = "Write the digest tree of the translations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the digest file")
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            dest="namespaces",
+            help="Namespace to digest (repeatable). Defaults to all namespaces",
+        )
+
+    def handle(self, *args, **options):
+        print("===\nWrite babelbase digest tree:\n===")
+        start = time.perf_counter()
+        count = write_digest_file(options["path"], namespaces=options["namespaces"])
+        duration = time.perf_counter() - start
+        print(f"Digested {count} namespaces in {duration:.2f}s")
@@ -0,0 +1,82 @@
+"""
+Compile-time key manifest for templates using the babelbase tags.
+
+The manifest of a compiled template is the set of literal (namespace, identifier) keys its babel, babelblock,
+get_content and blockcontent_i18n tags reference, including the templates it extends or includes by literal name. It is computed once
+and stored on the compiled Template object, so with the cached.Loader the cost is paid once per template per process.
+
+On the first lookup within a render, all keys of the manifest are bulk-loaded for the current locale (see
+babelbase.lookup).
+"""
+
+from django.template import TemplateDoesNotExist
+from django.template.library import SimpleNode
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+
+def literal_value(filter_expression):
+    """Returns the value of a literal string argument or None if it is a variable or filtered"""
+    if isinstance(filter_expression.var, str) and not filter_expression.filters:
+        return str(filter_expression.var)
+    return None
+
+
+def get_template_manifest(template):
+    """Returns the set of literal keys the template and its extends/includes chain will need"""
+    manifest = getattr(template, "_babelbase_manifest", None)
+    if manifest is None:
+        manifest = frozenset(collect_template_keys(template, seen=set()))
+        template._babelbase_manifest = manifest
+    return manifest
+
+
+def collect_template_keys(template, seen):
+    """Walks the compiled nodelist of the template and collects all literal keys"""
+    # Avoid circular lookup, i.e. recursive includes
+    if id(template) in seen:
+        return set()
+    seen.add(id(template))
+    manifest = getattr(template, "_babelbase_manifest", None)
+    if manifest is not None:
+        return set(manifest)
+
+    # Imported here, since the template tags depend on the lookup of this module
+    from babelbase.templatetags.babelbase import BabelBlockNode, babel
+    from babelbase.templatetags.translate_content import (
+        BlockContentI18NNode,
+        get_content,
+    )
+
+    keys = set()
+    nodes = template.nodelist.get_nodes_by_type(
+        (SimpleNode, BabelBlockNode, BlockContentI18NNode, ExtendsNode, IncludeNode)
+    )
+    for node in nodes:
+        if isinstance(node, SimpleNode):
+            if node.func not in (babel, get_content) or len(node.args) < 2:
+                continue
+            namespace = literal_value(node.args[0])
+            identifier = literal_value(node.args[1])
+            if namespace is not None and identifier is not None:
+                keys.add((namespace, identifier))
+        elif isinstance(node, BabelBlockNode):
+            namespace = literal_value(node.namespace)
+            identifier = literal_value(node.identifier)
+            if namespace is not None and identifier is not None:
+                keys.add((namespace, identifier))
+        elif isinstance(node, BlockContentI18NNode):
+            keys.add((node.view_id, node.key_id))
+        else:
+            name_expression = (
+                node.parent_name if isinstance(node, ExtendsNode) else node.template
+            )
+            template_name = literal_value(name_expression)
+            if template_name is None:
+                continue
+            try:
+                related_template = template.engine.get_template(template_name)
+            except TemplateDoesNotExist:
+                # The render itself will raise the proper error
+                continue
+            keys |= collect_template_keys(related_template, seen)
+    return keys
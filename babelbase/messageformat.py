@@ -0,0 +1,278 @@
+"""
+Precompiled message formatter for the interpolation of database translations (see db_gettext_lazy).
+
+A message is compiled once into fragments of literal text and slots. Rendering is a join of the fragments with the
+rendered slots, no parsing or regex is involved.
+
+Syntax:
+    {{ name }}                                                     variable
+    {{ count, plural, =0 {no files} one {# file} other {# files} }}   plural, # is the number
+    {{ gender, select, female {her} male {his} other {their} }}       select
+    \\{ \\} \\#                                                   literal {, } and #
+
+Plural selectors are exact values (=N), "one" (the value 1) and "other", numeric values are compared by their number
+(1, 1.0, Decimal(1) and "1" select "one"). Every plural and select requires an "other" form. Missing variables render
+the original tag, malformed tags are kept as literal text.
+
+Messages without plural or select also interpolate single-brace {name} variables, like the str.format interpolation
+of the stored translations before.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from babelbase.utils import get_setting
+
+MISSING = object()
+ESCAPE_PATTERN = re.compile(r"\\([{}#])")
+NUMBER_SIGN_PATTERN = re.compile(r"(?<!\\)#")
+LEGACY_VARIABLE_PATTERN = re.compile(r"(?<![\\{])\{(\w+)\}(?!\})")
+
+
+def plural_number(value):
+    """Returns the numeric value as int if integral, otherwise as normalized Decimal, or None if not numeric"""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    if not number.is_finite():
+        return None
+    if number == number.to_integral_value():
+        return int(number)
+    return number.normalize()
+
+
+class Message:
+    """A compiled message: len(fragments) == len(slots) + 1"""
+
+    __slots__ = ("fragments", "slots")
+
+    def __init__(self, fragments, slots):
+        self.fragments = fragments
+        self.slots = slots
+
+    def format(self, context, number=None):
+        if not self.slots:
+            return self.fragments[0]
+        parts = [self.fragments[0]]
+        for slot, fragment in zip(self.slots, self.fragments[1:]):
+            parts.append(slot.render(context, number))
+            parts.append(fragment)
+        return "".join(parts)
+
+
+class VariableSlot:
+    __slots__ = ("name", "source")
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+
+    def render(self, context, number=None):
+        value = context.get(self.name, MISSING)
+        if value is MISSING:
+            return self.source
+        return str(value)
+
+
+class NumberSlot:
+    """The # within a plural form"""
+
+    __slots__ = ()
+
+    def render(self, context, number=None):
+        return "#" if number is None else str(number)
+
+
+class SelectSlot(VariableSlot):
+    __slots__ = ("forms",)
+
+    def __init__(self, name, source, forms):
+        super().__init__(name, source)
+        self.forms = forms
+
+    def select(self, value):
+        return self.forms.get(str(value), self.forms["other"])
+
+    def render(self, context, number=None):
+        value = context.get(self.name, MISSING)
+        if value is MISSING:
+            return self.source
+        return self.select(value).format(context, number)
+
+
+class PluralSlot(SelectSlot):
+    __slots__ = ()
+
+    def select(self, value):
+        number = plural_number(value)
+        if number is None:
+            return self.forms["other"]
+        form = self.forms.get(f"={number}")
+        if form is None and number == 1:
+            form = self.forms.get("one")
+        return form or self.forms["other"]
+
+    def render(self, context, number=None):
+        value = context.get(self.name, MISSING)
+        if value is MISSING:
+            return self.source
+        return self.select(value).format(context, value)
+
+
+def build_message(parts):
+    """Builds the message from a list of literal strings (with escapes) and slots"""
+    fragments, slots = [""], []
+    for part in parts:
+        if isinstance(part, str):
+            fragments[-1] += ESCAPE_PATTERN.sub(r"\1", part)
+        else:
+            slots.append(part)
+            fragments.append("")
+    return Message(tuple(fragments), tuple(slots))
+
+
+def find_unescaped(text, token, start):
+    """Returns the index of the first token at or after start that is not escaped, or -1"""
+    index = text.find(token, start)
+    while index > 0 and text[index - 1] == "\\":
+        index = text.find(token, index + 1)
+    return index
+
+
+def find_closing_brace(text, start):
+    """Returns the index of the brace closing the one at start, or -1"""
+    depth = 0
+    for index in range(start, len(text)):
+        if text[index - 1] == "\\" and index > start:
+            continue
+        if text[index] == "{":
+            depth += 1
+        elif text[index] == "}":
+            depth -= 1
+            if depth == 0:
+                return index
+    return -1
+
+
+def find_tag_end(text, start):
+    """Returns the index of the closing }} of a tag whose body starts at start, or -1"""
+    depth = 0
+    for index in range(start, len(text)):
+        if text[index - 1] == "\\":
+            continue
+        if text[index] == "{":
+            depth += 1
+        elif text[index] == "}":
+            if depth:
+                depth -= 1
+            elif text.startswith("}}", index):
+                return index
+            else:
+                return -1
+    return -1
+
+
+def parse_forms(text, plural):
+    """Parses 'selector {form} selector {form} ...' into {selector: message} or returns None if malformed"""
+    forms = {}
+    position = 0
+    while True:
+        open_index = find_unescaped(text, "{", position)
+        if open_index == -1:
+            return forms if not text[position:].strip() else None
+        selector = text[position:open_index].strip()
+        close_index = find_closing_brace(text, open_index)
+        if not selector or " " in selector or close_index == -1:
+            return None
+        forms[selector] = build_message(
+            compile_parts(text[open_index + 1 : close_index], plural)
+        )
+        position = close_index + 1
+
+
+def compile_tag(body, source, plural):
+    """Compiles the body of a {{ }} tag into a slot or returns None if malformed"""
+    name, _, arguments = body.partition(",")
+    name = name.strip()
+    if not name.isidentifier():
+        return None
+    if not arguments:
+        return VariableSlot(name, source)
+    kind, _, arguments = arguments.partition(",")
+    kind = kind.strip()
+    if kind not in ("plural", "select"):
+        return None
+    forms = parse_forms(arguments, plural or kind == "plural")
+    if not forms or "other" not in forms:
+        return None
+    slot_class = PluralSlot if kind == "plural" else SelectSlot
+    return slot_class(name, source, forms)
+
+
+def split_number_signs(literal, plural):
+    """Splits the literal at # into number slots within plural forms"""
+    if not plural or "#" not in literal:
+        return [literal]
+    parts = []
+    for index, piece in enumerate(NUMBER_SIGN_PATTERN.split(literal)):
+        if index:
+            parts.append(NumberSlot())
+        parts.append(piece)
+    return parts
+
+
+def split_legacy_variables(literal):
+    """Splits the literal at single-brace {name} variables into variable slots"""
+    parts = []
+    position = 0
+    for match in LEGACY_VARIABLE_PATTERN.finditer(literal):
+        if not match.group(1).isidentifier():
+            continue
+        parts.append(literal[position : match.start()])
+        parts.append(VariableSlot(match.group(1), match.group(0)))
+        position = match.end()
+    parts.append(literal[position:])
+    return parts
+
+
+def compile_parts(text, plural):
+    """Compiles the text into a list of literal strings (with escapes) and slots"""
+    parts = []
+    literal_start = position = 0
+    while True:
+        start = find_unescaped(text, "{{", position)
+        if start == -1:
+            break
+        end = find_tag_end(text, start + 2)
+        if end == -1:
+            break
+        slot = compile_tag(text[start + 2 : end], text[start : end + 2], plural)
+        if slot is None:
+            # Not a valid tag: kept as literal text
+            position = start + 2
+            continue
+        parts.extend(split_number_signs(text[literal_start:start], plural))
+        parts.append(slot)
+        literal_start = position = end + 2
+    parts.extend(split_number_signs(text[literal_start:], plural))
+    return parts
+
+
+@lru_cache(maxsize=get_setting("BABELBASE_MESSAGE_CACHE_SIZE"))
+def compile_message(text):
+    """Compiles the text once into a Message, bounded by BABELBASE_MESSAGE_CACHE_SIZE"""
+    parts = compile_parts(text, plural=False)
+    if not any(isinstance(part, SelectSlot) for part in parts):
+        # No plural or select: single-brace variables of the stored translations
+        parts = [
+            legacy_part
+            for part in parts
+            for legacy_part in (
+                split_legacy_variables(part) if isinstance(part, str) else [part]
+            )
+        ]
+    return build_message(parts)
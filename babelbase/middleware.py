@@ -0,0 +1,39 @@
+from babelbase.deferred import MARKER_PREFIX, DeferredTemplate, substitute_markers
+
+
+class DeferredBabelMiddleware:
+    """
+    Activates the deferred resolution of the babel template tag for the template of a TemplateResponse. All babel tags
+    of the response are resolved with a single query when it is rendered. Other renderings of the request (e.g.
+    emails) resolve the tags in place.
+
+    Add 'babelbase.middleware.DeferredBabelMiddleware' to the middleware list (after the LocaleMiddleware)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Cached fragments replay markers of earlier responses
+        if (
+            self.is_substitutable(response)
+            and MARKER_PREFIX.encode() in response.content
+        ):
+            content = response.content.decode(response.charset)
+            response.content = substitute_markers(content)
+            if response.has_header("Content-Length"):
+                response.headers["Content-Length"] = str(len(response.content))
+        return response
+
+    def process_template_response(self, request, response):
+        response.template_name = DeferredTemplate(
+            response.resolve_template(response.template_name)
+        )
+        return response
+
+    def is_substitutable(self, response):
+        """Only fully rendered textual responses can carry markers"""
+        if getattr(response, "streaming", False):
+            return False
+        return response.get("Content-Type", "").startswith("text/")
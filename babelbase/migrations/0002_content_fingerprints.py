@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def set_fingerprints(apps, schema_editor):
+    """Fingerprints the existing sources, the existing translations are considered up to date"""
+    TranslationSource = apps.get_model("babelbase", "TranslationSource")
+    TranslationTarget = apps.get_model("babelbase", "TranslationTarget")
+    sources = []
+    for pk, content in TranslationSource.objects.values_list(
+        "id", "content"
+    ).iterator():
+        fingerprint = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+        sources.append(TranslationSource(pk=pk, fingerprint=fingerprint))
+    TranslationSource.objects.bulk_update(sources, ["fingerprint"], batch_size=1000)
+    TranslationTarget.objects.filter(translated=True).update(
+        source_fingerprint=models.Subquery(
+            TranslationSource.objects.filter(pk=models.OuterRef("source_id")).values(
+                "fingerprint"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("babelbase", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="translationsource",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=32,
+                verbose_name="Content Fingerprint",
+            ),
+        ),
+        migrations.AddField(
+            model_name="translationtarget",
+            name="source_fingerprint",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=32,
+                verbose_name="Translated from Source Fingerprint",
+            ),
+        ),
+        migrations.RunPython(set_fingerprints, migrations.RunPython.noop),
+    ]
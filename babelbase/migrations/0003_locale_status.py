@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+import babelbase.utils
+
+
+def set_locale_status(apps, schema_editor):
+    """Computes the translation status per locale and the complete flag of the existing sources"""
+    TranslationSource = apps.get_model("babelbase", "TranslationSource")
+    TranslationTarget = apps.get_model("babelbase", "TranslationTarget")
+    locales = babelbase.utils.translation_target_locales()
+    status_by_source = {}
+    targets = TranslationTarget.objects.filter(translated=True).values_list(
+        "source_id", "_lang", "approved"
+    )
+    for source_id, locale, approved in targets.iterator():
+        status = "approved" if approved else "translated"
+        status_by_source.setdefault(source_id, {})[locale] = status
+    sources = [
+        TranslationSource(
+            pk=source_id,
+            locale_status=locale_status,
+            complete=all(locale_status.get(locale) == "approved" for locale in locales),
+        )
+        for source_id, locale_status in status_by_source.items()
+    ]
+    TranslationSource.objects.bulk_update(
+        sources, ["locale_status", "complete"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("babelbase", "0002_content_fingerprints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="translationsource",
+            name="locale_status",
+            field=models.JSONField(
+                blank=True,
+                default=babelbase.utils.default_json_dict,
+                verbose_name="Translation Status per Locale",
+            ),
+        ),
+        migrations.RunPython(set_locale_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("babelbase", "0003_locale_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="translationtarget",
+            index=models.Index(
+                fields=["source", "_lang", "approved"],
+                name="source-lang-approved-index",
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import babelbase.utils
+
+
+def set_sync_buckets(apps, schema_editor):
+    """Computes the bucket of the identifier of the existing sources"""
+    TranslationSource = apps.get_model("babelbase", "TranslationSource")
+    sources = [
+        TranslationSource(
+            pk=pk, sync_bucket=babelbase.utils.identifier_bucket(identifier)
+        )
+        for pk, identifier in TranslationSource.objects.values_list(
+            "id", "identifier"
+        ).iterator()
+    ]
+    TranslationSource.objects.bulk_update(sources, ["sync_bucket"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("babelbase", "0004_target_approved_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NamespaceDigest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stamp", models.CharField(max_length=255, verbose_name="Stamp")),
+                (
+                    "tree",
+                    models.JSONField(
+                        default=babelbase.utils.default_json_dict,
+                        verbose_name="Digests per Locale and Bucket",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Namespace Digest",
+                "verbose_name_plural": "Namespace Digests",
+            },
+        ),
+        migrations.AddField(
+            model_name="translationsource",
+            name="sync_bucket",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="Bucket of the Identifier"
+            ),
+        ),
+        migrations.RunPython(set_sync_buckets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="translationsource",
+            index=models.Index(
+                fields=["namespace", "sync_bucket"], name="namespace-sync-bucket-index"
+            ),
+        ),
+        migrations.AddField(
+            model_name="namespacedigest",
+            name="namespace",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="digest",
+                to="babelbase.namespace",
+            ),
+        ),
+    ]
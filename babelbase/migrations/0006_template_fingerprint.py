@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("babelbase", "0005_sync_digests"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="translationsource",
+            name="template_fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=32,
+                verbose_name="Template Text Fingerprint",
+            ),
+        ),
+    ]
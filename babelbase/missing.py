@@ -0,0 +1,118 @@
+"""
+Handling of missing translation keys.
+
+The MissingKeyCache remembers keys that do not exist in the database for a timeout, so repeated lookups of undefined
+keys do not query the database on every render. Keys are discarded when a matching source is saved (see
+babelbase.signals), the timeout bounds staleness in other processes.
+
+The MissingKeyReporter aggregates the reports of missing keys into a single log line per interval.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from babelbase.utils import get_setting
+
+logger = logging.getLogger("babelbase")
+
+# Number of keys listed in an aggregated report
+REPORTED_KEYS = 20
+
+
+class MissingKeyCache:
+    """Thread-safe negative lookup cache of (namespace, identifier) keys per locale with a timeout"""
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # {(namespace, identifier): {locale: expires}}
+        self._entries = OrderedDict()
+
+    def filter_missing(self, keys, locale):
+        """Returns the subset of the keys known to be missing in the locale"""
+        if not self.timeout:
+            return set()
+        now = time.monotonic()
+        missing = set()
+        with self._lock:
+            for key in keys:
+                expires = self._entries.get(key, {}).get(locale)
+                if expires is not None and expires > now:
+                    missing.add(key)
+        return missing
+
+    def add(self, keys, locale):
+        """Remembers the keys as missing in the locale"""
+        if not self.timeout:
+            return
+        expires = time.monotonic() + self.timeout
+        with self._lock:
+            for key in keys:
+                self._entries.setdefault(key, {})[locale] = expires
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, namespace, identifier):
+        """Forgets the key in all locales, i.e. when a matching source is created"""
+        with self._lock:
+            self._entries.pop((namespace, identifier), None)
+
+    def discard_identifier(self, identifier):
+        """Forgets the identifier in all namespaces, when the namespace of the source is not loaded"""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == identifier]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class MissingKeyReporter:
+    """Aggregates the reports of missing keys and logs them at most once per interval"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._lookups = Counter()
+        self._reported_at = None
+
+    def report(self, namespace, identifier):
+        now = time.monotonic()
+        with self._lock:
+            self._lookups[(namespace, identifier)] += 1
+            if (
+                self._reported_at is not None
+                and now - self._reported_at < self.interval
+            ):
+                return
+            lookups = self._lookups
+            self._lookups = Counter()
+            self._reported_at = now
+        keys = ", ".join(
+            f"{namespace}---{identifier}"
+            for namespace, identifier in list(lookups)[:REPORTED_KEYS]
+        )
+        if len(lookups) > REPORTED_KEYS:
+            keys += ", ..."
+        logger.info(
+            f"Translatable Content is missing for {len(lookups)} keys "
+            f"({sum(lookups.values())} lookups): {keys}"
+        )
+
+
+missing_key_cache = MissingKeyCache(
+    timeout=get_setting("BABELBASE_MISSING_KEY_TIMEOUT"),
+    max_entries=get_setting("BABELBASE_MISSING_KEY_MAX_ENTRIES"),
+)
+missing_key_reporter = MissingKeyReporter(
+    interval=get_setting("BABELBASE_MISSING_KEY_REPORT_INTERVAL")
+)
+
+
+def report_missing_key(namespace, identifier):
+    missing_key_reporter.report(namespace, identifier)
@@ -1,6 +1,7 @@
 # ruff: noqa: F401
 from .translation import (
     Namespace,
+    NamespaceDigest,
     TranslationSource,
     TranslationTarget,
 )
@@ -1,4 +1,24 @@
+from itertools import islice
+
 from django.db import models
+from django.db.models import Case, F, FilteredRelation, Max, Q, Value, When
+from django.db.models.functions import Coalesce
+
+from babelbase.utils import (
+    get_current_locale,
+    locale_fallback_chain,
+    translation_target_locales,
+)
+
+# Status of the translation target of a locale in TranslationSource.locale_status, ordered by progress
+LOCALE_STATUS = {1: "translated", 2: "approved"}
+
+
+def is_complete(locale_status, locales=None):
+    """Returns True if the translations of all target locales are approved"""
+    if locales is None:
+        locales = translation_target_locales()
+    return all(locale_status.get(locale) == "approved" for locale in locales)
 
 
 class TranslationSourceManager(models.Manager):
@@ -10,6 +30,173 @@ class TranslationSourceManager(models.Manager):
             instance = None
         return instance
 
+    def records_queryset(self, condition, locale):
+        """
+        Returns the values of the sources matching the condition joined with the approved translation targets of the
+        fallback chain of the locale: (source_id, namespace, identifier, source content, target content or None)
+        """
+        relations = {
+            f"approved_target_{index}": FilteredRelation(
+                "translation_target_qs",
+                condition=Q(
+                    translation_target_qs___lang=chain_locale,
+                    translation_target_qs__approved=True,
+                ),
+            )
+            for index, chain_locale in enumerate(locale_fallback_chain(locale))
+        }
+        target_contents = [F(f"{relation}__content") for relation in relations]
+        if not target_contents:
+            target_content = Value(None, output_field=models.TextField())
+        elif len(target_contents) == 1:
+            target_content = target_contents[0]
+        else:
+            target_content = Coalesce(*target_contents)
+        return (
+            self.filter(condition)
+            .annotate(**relations)
+            .annotate(target_content=target_content)
+            .order_by()
+            .values_list(
+                "id",
+                "namespace__namespace",
+                "identifier",
+                "content",
+                "target_content",
+            )
+        )
+
+    def resolve_records(self, keys, locale=None):
+        """
+        Resolves many (namespace, identifier) keys at once with a single query that joins the approved translation
+        targets of the locale. Returns a dict {(namespace, identifier): (source_id, text)} for every key found in the
+        database, where text is the approved translation if available, otherwise the source content.
+        """
+        if not locale:
+            locale = get_current_locale()
+        identifiers_by_namespace = {}
+        for namespace, identifier in keys:
+            identifiers_by_namespace.setdefault(namespace, set()).add(identifier)
+        if not identifiers_by_namespace:
+            return {}
+        key_condition = Q()
+        for namespace, identifiers in identifiers_by_namespace.items():
+            key_condition |= Q(
+                namespace__namespace=namespace, identifier__in=identifiers
+            )
+        records = {}
+        for row in self.records_queryset(key_condition, locale):
+            source_id, namespace, identifier, source_text, target_text = row
+            text = target_text if target_text is not None else source_text
+            records[(namespace, identifier)] = (source_id, text)
+        return records
+
+    def resolve_many(self, keys, locale=None):
+        """
+        Resolves many (namespace, identifier) keys with a single query. Returns a dict {(namespace, identifier): text}
+        for every key found in the database, where text is the approved translation of the locale if available,
+        otherwise the source content.
+        """
+        records = self.resolve_records(keys, locale)
+        return {key: text for key, (source_id, text) in records.items()}
+
+    def namespace_records(self, namespaces, locale=None, limit=None):
+        """
+        Resolves all sources of the namespaces with a single query, at most limit sources if given. Returns a dict
+        {namespace: {identifier: (source_id, text)}} with an entry for every requested namespace.
+        """
+        if not locale:
+            locale = get_current_locale()
+        namespaces = set(namespaces)
+        records = {namespace: {} for namespace in namespaces}
+        if not namespaces:
+            return records
+        queryset = self.records_queryset(Q(namespace__namespace__in=namespaces), locale)
+        if limit is not None:
+            queryset = queryset[:limit]
+        for row in queryset:
+            source_id, namespace, identifier, source_text, target_text = row
+            text = target_text if target_text is not None else source_text
+            records[namespace][identifier] = (source_id, text)
+        return records
+
+    def locale_status_queryset(self, condition, locales):
+        """
+        Aggregates the status of the translation targets of the sources matching the condition in a single query
+        grouped by the source: (source_id, status code per locale)
+        """
+        annotations = {}
+        for index, locale in enumerate(locales):
+            annotations[f"status_{index}"] = Max(
+                Case(
+                    When(
+                        translation_target_qs___lang=locale,
+                        translation_target_qs__approved=True,
+                        then=Value(2),
+                    ),
+                    When(
+                        translation_target_qs___lang=locale,
+                        translation_target_qs__translated=True,
+                        then=Value(1),
+                    ),
+                    default=Value(0),
+                )
+            )
+        return (
+            self.filter(condition)
+            .order_by()
+            .values("id")
+            .annotate(**annotations)
+            .values_list("id", *annotations)
+        )
+
+    def recompute_locale_status(self, condition=None, batch_size=1000):
+        """
+        Recomputes the locale_status and complete flag of the sources matching the condition (all by default) and
+        writes the sources that differ. The current status is read per batch. Returns the number of updated sources.
+        """
+        locales = translation_target_locales()
+        rows = self.locale_status_queryset(condition or Q(), locales).iterator(
+            chunk_size=batch_size
+        )
+        updated = 0
+        while batch := list(islice(rows, batch_size)):
+            current = {
+                source_id: (locale_status, complete)
+                for source_id, locale_status, complete in self.filter(
+                    pk__in=[row[0] for row in batch]
+                ).values_list("id", "locale_status", "complete")
+            }
+            changed_sources = []
+            for source_id, *codes in batch:
+                status = {
+                    locale: LOCALE_STATUS[code]
+                    for locale, code in zip(locales, codes)
+                    if code
+                }
+                complete = is_complete(status, locales)
+                if current.get(source_id) != (status, complete):
+                    changed_sources.append(
+                        self.model(
+                            pk=source_id, locale_status=status, complete=complete
+                        )
+                    )
+            self.bulk_update(changed_sources, ["locale_status", "complete"])
+            updated += len(changed_sources)
+        return updated
+
+
+class TranslationTargetQuerySet(models.QuerySet):
+    def outdated(self):
+        """Returns the translated targets whose source content changed since they were translated"""
+        return self.filter(translated=True).exclude(
+            source_fingerprint=F("source__fingerprint")
+        )
+
+    def up_to_date(self):
+        """Returns the translated targets of the current source content"""
+        return self.filter(translated=True, source_fingerprint=F("source__fingerprint"))
+
 
 class ContentManager(models.Manager):
     def get_translatables(self, view_id, key_id=None):
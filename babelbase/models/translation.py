@@ -3,10 +3,17 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from babelbase.models.base import TimestampMixin
-from babelbase.models.manager import TranslationSourceManager
+from babelbase.models.manager import (
+    TranslationSourceManager,
+    TranslationTargetQuerySet,
+)
 from babelbase.utils import (
+    content_fingerprint,
+    default_json_dict,
     default_json_list,
     get_current_locale,
+    identifier_bucket,
+    locale_fallback_chain,
     translation_target_locales,
 )
 
@@ -40,6 +47,13 @@ class TranslationSource(TimestampMixin, models.Model):
                 name="namespace-identifier-constraint",
             )
         ]
+        indexes = [
+            # Export of the sources in differing buckets of the delta sync (see babelbase.sync)
+            models.Index(
+                fields=["namespace", "sync_bucket"],
+                name="namespace-sync-bucket-index",
+            )
+        ]
 
     namespace = models.ForeignKey(
         Namespace, related_name="translation_source_qs", on_delete=models.CASCADE
@@ -47,13 +61,26 @@ class TranslationSource(TimestampMixin, models.Model):
     identifier = models.SlugField(
         _("Identifier Slug"), max_length=255, allow_unicode=True, unique=False
     )
+    sync_bucket = models.PositiveSmallIntegerField(
+        _("Bucket of the Identifier"), default=0, editable=False
+    )
     _lang = models.CharField(_("Language Code"), max_length=7)
 
     content = models.TextField(_("Content Source"), blank=True)
+    fingerprint = models.CharField(
+        _("Content Fingerprint"), max_length=32, blank=True, db_index=True
+    )
+    # Fingerprint of the text of the tag in the templates when it was last ingested (see babelbase.ingest)
+    template_fingerprint = models.CharField(
+        _("Template Text Fingerprint"), max_length=32, blank=True, editable=False
+    )
 
     changed = models.BooleanField(_("Has changed"), default=True)
     not_used = models.BooleanField(_("Not in use"), default=False)
     complete = models.BooleanField(_("Complete Translation"), default=False)
+    locale_status = models.JSONField(
+        _("Translation Status per Locale"), default=default_json_dict, blank=True
+    )
 
     template_registry = models.JSONField(
         _("Appearances in Templates"), default=default_json_list, blank=True
@@ -65,39 +92,27 @@ class TranslationSource(TimestampMixin, models.Model):
     objects = TranslationSourceManager()
 
     def get_translation(self, locale=None):
-        """Returns the source translation of the content if available, otherwise returns the source content"""
+        """Returns the approved translation of the first locale of the fallback chain that has one, otherwise None"""
         if not locale:
             locale = get_current_locale()
-        translation = self.translation_target_qs.filter(
-            _lang=locale, approved=True
-        ).first()
-        if translation:
-            return translation
+        chain = locale_fallback_chain(locale)
+        translations = {
+            translation.lang: translation
+            for translation in self.translation_target_qs.filter(
+                _lang__in=chain, approved=True
+            )
+        }
+        for chain_locale in chain:
+            if chain_locale in translations:
+                return translations[chain_locale]
         return None
 
     def translation_content_bitmask(self):
-        locales = translation_target_locales()
-        return locales
-        return ",".join(locales)
-
-    """
-    def check_translation_completeness(self):
-        # Checks if all possible translation targets have been approved
-        for locale in translation_target_locales():
-            if self.translation_target_qs.filter(_lang=locale)
-
-
-    def translation_content_bitmask(self):
-        bitmask = []
-        for translation in self.translatables:
-            if getattr(self, translation[1], None) != "":
-                bitmask.append(translation[0])
-        return bitmask
-
-    def found_in(self, relative_path):
-        if relative_path not in self.found_in_files:
-            self.found_in_files.append(relative_path)
-    """
+        """Returns the target locales with the status of their translation"""
+        return ", ".join(
+            f"{locale}: {self.locale_status.get(locale, '-')}"
+            for locale in translation_target_locales()
+        )
 
     @property
     def lang(self):
@@ -107,11 +122,35 @@ class TranslationSource(TimestampMixin, models.Model):
         return f"{self.namespace}-{self.identifier}"
 
     def save(self, *args, **kwargs):
+        """Sets the fingerprint of the content and flags the source as changed if the content differs"""
         if not self._lang:
             self._lang = settings.LANGUAGE_CODE
+        self.sync_bucket = identifier_bucket(self.identifier)
+        fingerprint = content_fingerprint(self.content)
+        if fingerprint != self.fingerprint:
+            if self.fingerprint:
+                self.changed = True
+            self.fingerprint = fingerprint
         return super().save(*args, **kwargs)
 
 
+class NamespaceDigest(models.Model):
+    """Digest subtree of a namespace cached by the delta sync (see babelbase.sync)"""
+
+    class Meta:
+        verbose_name = _("Namespace Digest")
+        verbose_name_plural = _("Namespace Digests")
+
+    namespace = models.OneToOneField(
+        Namespace, related_name="digest", on_delete=models.CASCADE
+    )
+    # Changes with every insert, update and delete of the sources and targets of the namespace
+    stamp = models.CharField(_("Stamp"), max_length=255)
+    tree = models.JSONField(
+        _("Digests per Locale and Bucket"), default=default_json_dict
+    )
+
+
 class TranslationTarget(TimestampMixin, models.Model):
     """Translation Target - See: LANGUAGES"""
 
@@ -125,6 +164,13 @@ class TranslationTarget(TimestampMixin, models.Model):
                 name="source-lang-constraint",
             )
         ]
+        indexes = [
+            # Joins of the approved translation of a locale (see TranslationSourceManager.records_queryset)
+            models.Index(
+                fields=["source", "_lang", "approved"],
+                name="source-lang-approved-index",
+            )
+        ]
 
     source = models.ForeignKey(
         TranslationSource,
@@ -134,18 +180,70 @@ class TranslationTarget(TimestampMixin, models.Model):
     _lang = models.CharField(_("Language Code"), max_length=7)
 
     content = models.TextField(_("Content Translation"), blank=True)
+    source_fingerprint = models.CharField(
+        _("Translated from Source Fingerprint"),
+        max_length=32,
+        blank=True,
+        db_index=True,
+    )
 
     translated = models.BooleanField(_("Is translated"), default=False)
     approved = models.BooleanField(_("Translation approved"), default=False)
 
+    objects = TranslationTargetQuerySet.as_manager()
+
     @property
     def lang(self):
         return self._lang
 
-    def save(self, *args, **kwargs):
-        """Checks if translated and approved are set correctly"""
+    @property
+    def outdated(self):
+        """Returns True if the source content changed since the target was translated"""
+        return self.source_fingerprint != self.source.fingerprint
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_translation = instance.loaded_translation()
+        return instance
+
+    def loaded_translation(self):
+        # Deferred fields are not in __dict__ and count as unknown
+        return self.__dict__.get("content"), self.__dict__.get("translated")
+
+    def translation_changed(self):
+        """Returns True if the content or translated flag differ from the values loaded from the database"""
+        loaded = getattr(self, "_loaded_translation", None)
+        return loaded is None or None in loaded or loaded != self.loaded_translation()
+
+    def current_source_fingerprint(self):
+        if TranslationTarget.source.is_cached(self):
+            return self.source.fingerprint
+        return (
+            TranslationSource.objects.filter(pk=self.source_id)
+            .values_list("fingerprint", flat=True)
+            .first()
+        )
+
+    def normalize_status(self, source_fingerprint=None):
+        """
+        Checks if translated and approved are set correctly. Records the source fingerprint the target is translated
+        from if given or if the translation changed, otherwise the recorded fingerprint is kept (an outdated
+        translation stays outdated when only approved changes).
+        """
         if self.translated and not self.content:
             self.translated = False
         if self.approved and not self.translated:
             self.approved = False
-        return super().save(*args, **kwargs)
+        if not self.translated:
+            return
+        if source_fingerprint is None and self.translation_changed():
+            source_fingerprint = self.current_source_fingerprint()
+        if source_fingerprint is not None:
+            self.source_fingerprint = source_fingerprint
+
+    def save(self, *args, **kwargs):
+        self.normalize_status()
+        result = super().save(*args, **kwargs)
+        self._loaded_translation = self.loaded_translation()
+        return result
@@ -0,0 +1,203 @@
+"""
+Streaming gettext PO/MO interchange of the translations.
+
+An entry is keyed by msgctxt = namespace and msgid = identifier, the msgstr is the translation of the locale. The
+source content and its fingerprint are written as extracted comments (#.), so the translator sees the source text and
+the import records which source content was translated. Translations that are not approved are marked fuzzy.
+
+The export streams the records of babelbase.exchange. The import parses the file line by line and writes the
+translation targets of existing sources in batches with TranslationImport. The MO file of a locale holds the approved
+translations under the keys "namespace\\x04identifier" (gettext's context separator). Only the keys of the locale are
+held in memory while the MO file is written, the translations are spooled to a temporary file.
+"""
+
+import shutil
+import struct
+import tempfile
+
+from babelbase.exchange import TranslationImport, export_records, open_text
+
+FINGERPRINT_COMMENT = "babelbase-fingerprint: "
+ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\t": "\\t", "\r": "\\r"}
+UNESCAPES = {"\\": "\\", '"': '"', "n": "\n", "t": "\t", "r": "\r"}
+
+
+def escape(text):
+    return "".join(ESCAPES.get(character, character) for character in text)
+
+
+def unescape(text):
+    result = []
+    characters = iter(text)
+    for character in characters:
+        if character == "\\":
+            escaped = next(characters, "")
+            result.append(UNESCAPES.get(escaped, escaped))
+        else:
+            result.append(character)
+    return "".join(result)
+
+
+def po_string(keyword, text):
+    """Returns the PO lines of the keyword, splitting multi-line texts after each newline"""
+    if "\n" not in text.rstrip("\n"):
+        return f'{keyword} "{escape(text)}"\n'
+    lines = text.splitlines(keepends=True)
+    return f'{keyword} ""\n' + "".join(f'"{escape(line)}"\n' for line in lines)
+
+
+def po_header(locale):
+    header = "Content-Type: text/plain; charset=UTF-8\n"
+    if locale:
+        header += f"Language: {locale}\n"
+    return po_string("msgid", "") + po_string("msgstr", header)
+
+
+def po_entry(record, locale):
+    target = record["targets"].get(locale) if locale else None
+    lines = [f"#. {line}\n" for line in record["content"].splitlines()]
+    lines.append(f"#. {FINGERPRINT_COMMENT}{record['fingerprint']}\n")
+    # Translations to review: not approved or translated from a previous source content
+    if target and target["content"]:
+        outdated = target["source_fingerprint"] != record["fingerprint"]
+        if outdated or not target["approved"]:
+            lines.append("#, fuzzy\n")
+    lines.append(po_string("msgctxt", record["namespace"]))
+    lines.append(po_string("msgid", record["identifier"]))
+    lines.append(po_string("msgstr", target["content"] if target else ""))
+    return "".join(lines)
+
+
+def export_po(path, locale=None, namespaces=None, chunk_size=1000):
+    """
+    Writes the sources of the namespaces with the translations of the locale as PO file, as PO template without a
+    locale. Returns the number of entries.
+    """
+    count = 0
+    with open_text(path, "w") as file:
+        file.write(po_header(locale))
+        records = export_records(
+            namespaces, [locale] if locale else [], chunk_size, fingerprints=True
+        )
+        for record in records:
+            file.write("\n")
+            file.write(po_entry(record, locale))
+            count += 1
+    return count
+
+
+def parse_po(file):
+    """Yields the entries of the PO file as dicts with msgctxt, msgid, msgstr, fuzzy and fingerprint"""
+    entry, keyword = {}, None
+    for line in file:
+        line = line.strip()
+        if line.startswith('"') and keyword not in (None, "comment"):
+            entry[keyword] += unescape(line[1:-1])
+            continue
+        if not line or line.startswith("#"):
+            if "msgid" in entry and keyword != "comment":
+                yield entry
+                entry = {}
+            keyword = "comment"
+            if line.startswith("#,") and "fuzzy" in line:
+                entry["fuzzy"] = True
+            elif line.startswith(f"#. {FINGERPRINT_COMMENT}"):
+                entry["fingerprint"] = line[len(FINGERPRINT_COMMENT) + 3 :]
+            continue
+        name, _, value = line.partition(" ")
+        if name in ("msgctxt", "msgid") and "msgstr" in entry:
+            yield entry
+            entry = {}
+        # The first form of plural entries
+        keyword = "msgstr" if name == "msgstr[0]" else name
+        entry[keyword] = unescape(value.strip()[1:-1])
+    if "msgid" in entry:
+        yield entry
+
+
+def po_records(entries, locale, approve=False):
+    """Yields the import records of the translated entries"""
+    for entry in entries:
+        if (
+            not entry.get("msgid")
+            or not entry.get("msgctxt")
+            or not entry.get("msgstr")
+        ):
+            continue
+        yield {
+            "namespace": entry["msgctxt"],
+            "identifier": entry["msgid"],
+            "targets": {
+                locale: {
+                    "content": entry["msgstr"],
+                    "translated": True,
+                    # Without approve, unchanged translations keep their approval
+                    "approved": (not entry.get("fuzzy", False)) if approve else None,
+                    "source_fingerprint": entry.get("fingerprint", ""),
+                }
+            },
+        }
+
+
+def import_po(path, locale, namespaces=None, approve=False, batch_size=1000):
+    """Imports the translations of the PO file into the targets of the locale of existing sources"""
+    translation_import = TranslationImport(
+        namespaces=namespaces,
+        locales=[locale],
+        batch_size=batch_size,
+        create_sources=False,
+    )
+    with open_text(path, "r") as file:
+        return translation_import.import_records(
+            po_records(parse_po(file), locale, approve)
+        )
+
+
+def export_mo(path, locale, namespaces=None, chunk_size=1000):
+    """Writes the approved translations of the locale as compiled gettext MO file. Returns the number of entries"""
+    with tempfile.TemporaryFile() as strings_file:
+        # (id, length of the translation, position in the strings file), the translations are read back in a copy
+        entries = []
+
+        def add_entry(key, text):
+            data = text.encode()
+            entries.append((key.encode(), len(data), strings_file.tell()))
+            strings_file.write(data + b"\0")
+
+        add_entry("", f"Content-Type: text/plain; charset=UTF-8\nLanguage: {locale}\n")
+        for record in export_records(namespaces, [locale], chunk_size):
+            target = record["targets"].get(locale)
+            if target and target["approved"]:
+                add_entry(
+                    f"{record['namespace']}\x04{record['identifier']}",
+                    target["content"],
+                )
+        entries.sort()
+        # Header, the two tables of (length, offset), the NUL terminated ids and the translations
+        header_size = 7 * 4
+        ids_offset = header_size + 2 * 8 * len(entries)
+        strings_offset = ids_offset + sum(len(key) + 1 for key, _, _ in entries)
+        with open(path, "wb") as file:
+            file.write(
+                struct.pack(
+                    "<7I",
+                    0x950412DE,
+                    0,
+                    len(entries),
+                    header_size,
+                    header_size + 8 * len(entries),
+                    0,
+                    0,
+                )
+            )
+            offset = ids_offset
+            for key, _, _ in entries:
+                file.write(struct.pack("<2I", len(key), offset))
+                offset += len(key) + 1
+            for _, length, position in entries:
+                file.write(struct.pack("<2I", length, strings_offset + position))
+            for key, _, _ in entries:
+                file.write(key + b"\0")
+            strings_file.seek(0)
+            shutil.copyfileobj(strings_file, file)
+    return len(entries) - 1
@@ -0,0 +1,229 @@
+"""
+Parallel, incremental scanner of the templates for translation tags.
+
+All template directories of the Django template engines are scanned, including the app directories. The manifest
+on disk stores the mtime, size, content hash and matches of every template. Templates with unchanged mtime and size
+are skipped, templates with an unchanged hash are not scanned again. Changed templates are scanned in a process pool.
+
+The content tags of the legacy Content model (get_content, blockcontent_i18n) and the babelbase tags (babel,
+babelblock) are matched by separate pattern groups. The manifest holds the matches of all tags, the result only the
+matches of the tags in BABELBASE_SCAN_TAGS.
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.template import engines
+
+from babelbase.utils import get_cache_file, get_setting
+
+try:
+    # Private API of the template autoreloader, it also covers the directories of the cached and custom loaders
+    from django.template.autoreload import (
+        get_template_directories as get_django_template_directories,
+    )
+except ImportError:
+    get_django_template_directories = None
+
+# Bump to invalidate the manifests when the patterns change
+SCANNER_VERSION = 2
+
+# Below this number of changed templates, starting a process pool costs more than it saves
+PARALLEL_THRESHOLD = 50
+
+PATTERN_GET_CONTENT = re.compile(
+    r"""
+    {%\s*                           # Open brackets
+    (get_content)\s+                # keyword
+    ["\']([a-zA-Z0-9_-]+)["\']\s+   # first param   (namespace)
+    ["\']([a-zA-Z0-9_-]+)["\']\s+   # second param  (key)
+    ["\']([^"\']+)["\']             # third param  (free text)
+    \s*%}
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+PATTERN_BLOCKCONTENT_I18N = re.compile(
+    r"""
+    {%\s*
+    (blockcontent_i18n)\s+                      # keyword
+    ["\']([a-zA-Z0-9_-]+)["\']\s+               # first param   (namespace)
+    ["\']([a-zA-Z0-9_-]+)["\']\s*%}             # second param  (key)
+    (.*?)(?={%\s*endblockcontent_i18n\s*%}|$)    # third param  (free text)
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+PATTERN_BABEL = re.compile(
+    r"""
+    {%\s*
+    (babel)\s+                          # keyword
+    ["\']([a-zA-Z0-9_-]+)["\']\s+       # first param   (namespace)
+    ["\']([a-zA-Z0-9_-]+)["\']          # second param  (identifier)
+    (?:\s+["\']([^"\']*)["\'])?         # optional third param  (placeholder)
+    \s*%}
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+PATTERN_BABELBLOCK = re.compile(
+    r"""
+    {%\s*
+    (babelblock)\s+                             # keyword
+    ["\']([a-zA-Z0-9_-]+)["\']\s+               # first param   (namespace)
+    ["\']([a-zA-Z0-9_-]+)["\']\s*%}             # second param  (identifier)
+    (.*?)(?={%\s*endbabelblock\s*%}|$)          # body          (fallback)
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+CONTENT_PATTERNS = (PATTERN_GET_CONTENT, PATTERN_BLOCKCONTENT_I18N)
+BABEL_PATTERNS = (PATTERN_BABEL, PATTERN_BABELBLOCK)
+PATTERNS = CONTENT_PATTERNS + BABEL_PATTERNS
+
+
+def match_template_tags(content):
+    """Returns the matches (tag, namespace, identifier, text) of the translation tags in the content"""
+    matches = []
+    for pattern in PATTERNS:
+        matches.extend(pattern.findall(content))
+    return matches
+
+
+def scan_template(path, previous_hash=None):
+    """
+    Reads and scans a template. Executed in the worker processes.
+    If the content hash equals the previous hash, the matches are None: the previous matches are still valid.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    stat = os.stat(path)
+    content_hash = hashlib.sha1(data, usedforsecurity=False).hexdigest()
+    matches = None
+    if content_hash != previous_hash:
+        # A template that is not valid UTF-8 must not abort the scan of all others
+        content = data.decode(errors="replace")
+        matches = [list(match) for match in match_template_tags(content)]
+    return {
+        "path": path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": len(data),
+        "hash": content_hash,
+        "matches": matches,
+    }
+
+
+def get_template_directories():
+    """Returns the template directories of the Django template engines, including the app directories"""
+    if get_django_template_directories is not None:
+        return {str(directory) for directory in get_django_template_directories()}
+    django_directory = os.path.dirname(django.__file__)
+    return {
+        str(directory)
+        for engine in engines.all()
+        for directory in engine.template_dirs
+        if not str(directory).startswith(django_directory)
+    }
+
+
+def get_template_paths():
+    """Returns {path: name relative to its template directory} of all templates"""
+    extensions = tuple(get_setting("BABELBASE_SCAN_EXTENSIONS"))
+    template_paths = {}
+    for directory in sorted(get_template_directories()):
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                if file.endswith(extensions):
+                    path = os.path.join(root, file)
+                    template_paths.setdefault(path, os.path.relpath(path, directory))
+    return template_paths
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("version") != SCANNER_VERSION:
+        return {}
+    return manifest["templates"]
+
+
+def save_manifest(manifest_path, templates):
+    temporary_path = f"{manifest_path}.tmp"
+    with open(temporary_path, "w") as file:
+        json.dump({"version": SCANNER_VERSION, "templates": templates}, file)
+    os.replace(temporary_path, manifest_path)
+
+
+class ScanResult:
+    """Matches of all templates: {path: {"name": relative name, "matches": [...]}} and statistics"""
+
+    def __init__(self, tags=None):
+        self.tags = set(get_setting("BABELBASE_SCAN_TAGS") if tags is None else tags)
+        self.templates = {}
+        self.scanned = 0
+        self.skipped = 0
+
+    def add(self, path, name, matches):
+        matches = [match for match in matches if match[0] in self.tags]
+        self.templates[path] = {"name": name, "matches": matches}
+
+
+def scan_templates(manifest_path=None, jobs=None, tags=None):
+    """
+    Scans all templates, only reading the changed ones since the last scan recorded in the manifest. Returns the
+    matches of the tags (BABELBASE_SCAN_TAGS by default).
+    """
+    if manifest_path is None:
+        manifest_path = get_cache_file("BABELBASE_SCAN_MANIFEST", "scan_manifest.json")
+    previous = load_manifest(manifest_path) if manifest_path else {}
+    current = {}
+    result = ScanResult(tags)
+
+    changed = []
+    template_paths = get_template_paths()
+    for path, name in template_paths.items():
+        entry = previous.get(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if entry and (entry["mtime_ns"], entry["size"]) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            current[path] = entry
+            result.add(path, name, entry["matches"])
+            result.skipped += 1
+        else:
+            changed.append(path)
+
+    previous_hashes = [previous.get(path, {}).get("hash") for path in changed]
+    if len(changed) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            scans = list(
+                executor.map(scan_template, changed, previous_hashes, chunksize=32)
+            )
+    else:
+        scans = list(map(scan_template, changed, previous_hashes))
+
+    for scan in scans:
+        path = scan.pop("path")
+        if scan["matches"] is None:
+            # Touched but unchanged: the previous matches are still valid
+            scan["matches"] = previous[path]["matches"]
+            result.skipped += 1
+        else:
+            result.scanned += 1
+        current[path] = scan
+        result.add(path, template_paths[path], scan["matches"])
+
+    if manifest_path:
+        save_manifest(manifest_path, current)
+    return result
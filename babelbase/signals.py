@@ -0,0 +1,137 @@
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from babelbase.bundles import bump_generations, get_bundle_cache
+from babelbase.cache import translation_cache
+from babelbase.missing import missing_key_cache
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.translate import clear_translation_buffers
+from babelbase.utils import get_fallback_chains
+
+
+def bump_generations_on_commit(namespace_ids=(), namespaces=()):
+    """Invalidates the bundles of the namespaces once the changes are visible to other workers"""
+    if get_bundle_cache() is None:
+        return
+    namespaces = set(namespaces) - {None}
+    namespace_ids = set(namespace_ids) - {None}
+    if namespace_ids:
+        namespaces.update(
+            Namespace.objects.filter(pk__in=namespace_ids).values_list(
+                "namespace", flat=True
+            )
+        )
+    transaction.on_commit(lambda: bump_generations(namespaces))
+
+
+def source_namespaces(target):
+    """Returns the namespace of the source of the target with at most one query, none if the source is loaded"""
+    if TranslationTarget.source.is_cached(target):
+        source = target.source
+        if TranslationSource.namespace.is_cached(source):
+            return [source.namespace.namespace]
+        condition = Q(pk=source.namespace_id)
+    else:
+        condition = Q(translation_source_qs__pk=target.source_id)
+    return Namespace.objects.filter(condition).values_list("namespace", flat=True)
+
+
+def invalidate_translations(namespaces=()):
+    """
+    Invalidates the caches after bulk changes of the translations of the namespaces, which do not send signals.
+    Call it after the transaction of the bulk changes.
+    """
+    translation_cache.clear()
+    missing_key_cache.clear()
+    clear_translation_buffers()
+    bump_generations_on_commit(namespaces=namespaces)
+
+
+@receiver(pre_save, sender=Namespace)
+def remember_previous_namespace(sender, instance, **kwargs):
+    # A renamed namespace invalidates the bundles of its previous name
+    instance._babelbase_previous_namespace = None
+    if instance.pk and get_bundle_cache() is not None:
+        instance._babelbase_previous_namespace = (
+            Namespace.objects.filter(pk=instance.pk)
+            .values_list("namespace", flat=True)
+            .first()
+        )
+
+
+@receiver(pre_save, sender=TranslationSource)
+def remember_previous_source_namespace(sender, instance, **kwargs):
+    # A source moved to another namespace invalidates the bundles of its previous namespace
+    instance._babelbase_previous_namespace_id = None
+    if instance.pk and get_bundle_cache() is not None:
+        instance._babelbase_previous_namespace_id = (
+            TranslationSource.objects.filter(pk=instance.pk)
+            .values_list("namespace_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=TranslationSource)
+def discard_missing_key(sender, instance, **kwargs):
+    # The key of a created or renamed source is no longer missing, without querying a namespace that is not loaded
+    if TranslationSource.namespace.is_cached(instance):
+        missing_key_cache.discard(instance.namespace.namespace, instance.identifier)
+    else:
+        missing_key_cache.discard_identifier(instance.identifier)
+
+
+@receiver(post_save, sender=TranslationSource)
+@receiver(post_delete, sender=TranslationSource)
+def invalidate_translation_source(sender, instance, **kwargs):
+    translation_cache.invalidate_source(instance.pk)
+    clear_translation_buffers()
+    previous_namespace_id = getattr(instance, "_babelbase_previous_namespace_id", None)
+    bump_generations_on_commit(
+        namespace_ids=[instance.namespace_id, previous_namespace_id]
+    )
+
+
+def deleted_with_source(origin):
+    """Returns True if the delete cascades from a source or namespace, whose own signals invalidate the caches"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (TranslationSource, Namespace)
+
+
+@receiver(post_save, sender=TranslationTarget)
+@receiver(post_delete, sender=TranslationTarget)
+def invalidate_translation_target(sender, instance, origin=None, **kwargs):
+    if deleted_with_source(origin):
+        return
+    translation_cache.invalidate_source(instance.source_id)
+    clear_translation_buffers()
+    if get_bundle_cache() is not None:
+        bump_generations_on_commit(namespaces=source_namespaces(instance))
+
+
+@receiver(post_save, sender=TranslationTarget)
+@receiver(post_delete, sender=TranslationTarget)
+def update_locale_status(sender, instance, origin=None, **kwargs):
+    # Recomputes the status of the single source, the source of a cascading delete is deleted as well
+    if deleted_with_source(origin):
+        return
+    TranslationSource.objects.recompute_locale_status(Q(pk=instance.source_id))
+
+
+@receiver(post_save, sender=Namespace)
+@receiver(post_delete, sender=Namespace)
+def invalidate_namespace(sender, instance, **kwargs):
+    # Renaming a namespace changes the keys of all its sources
+    translation_cache.clear()
+    missing_key_cache.clear()
+    clear_translation_buffers()
+    previous_namespace = getattr(instance, "_babelbase_previous_namespace", None)
+    bump_generations_on_commit(namespaces=[instance.namespace, previous_namespace])
+
+
+@receiver(setting_changed)
+def clear_fallback_chains(setting, **kwargs):
+    if setting in ("LANGUAGES", "LANGUAGE_CODE", "BABELBASE_LOCALE_FALLBACKS"):
+        get_fallback_chains.cache_clear()
@@ -0,0 +1,276 @@
+"""
+Delta sync of the translations between environments with digest (Merkle) trees.
+
+The tree of an environment has a node per namespace and locale (the source language for the source contents, the
+target locales for the translation targets) with BUCKETS children. Every row is a leaf in the bucket of its
+identifier (TranslationSource.sync_bucket), its digest covers the identifier and the synced values. A bucket digest
+combines the digests of its leaves with XOR, which does not depend on the order of the rows, so the tree is built in a
+single streaming pass. The digest of a namespace/locale node is the XOR of its buckets.
+
+The subtree of each namespace is cached in NamespaceDigest with a stamp of its rows (count and last update of the
+sources and targets, taken with one grouped query per table). Only the namespaces whose stamp changed are read and
+digested again.
+
+The environment receiving the changes writes its tree to a file (write_digest_file). The environment with the changes
+compares it with its own tree: equal nodes are skipped without looking at their buckets, only the rows in differing
+buckets are exported as JSONL (see babelbase.exchange) and applied with import_babelbase_translations. The export
+selects the sources and targets of the differing buckets and locales in the query.
+
+Rows missing in the exporting environment are reported as differing buckets but are not deleted on the other side.
+"""
+
+import hashlib
+import json
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from babelbase.exchange import export_records, write_records
+from babelbase.models import (
+    Namespace,
+    NamespaceDigest,
+    TranslationSource,
+    TranslationTarget,
+)
+from babelbase.utils import SYNC_BUCKETS, content_fingerprint
+
+DIGEST_VERSION = 1
+BUCKETS = SYNC_BUCKETS
+
+
+def digest(*values):
+    data = "\x04".join(str(value) for value in values).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=16).digest(), "big")
+
+
+def namespace_stamps(namespace_ids):
+    """Returns {namespace_id: stamp} of the namespaces, the stamp changes with every write of their rows"""
+    counts = {}
+    sources = (
+        TranslationSource.objects.filter(namespace_id__in=namespace_ids)
+        .order_by()
+        .values("namespace_id")
+        .annotate(count=Count("id"), last=Max("updated_at"))
+        .values_list("namespace_id", "count", "last")
+    )
+    targets = (
+        TranslationTarget.objects.filter(source__namespace_id__in=namespace_ids)
+        .order_by()
+        .values("source__namespace_id")
+        .annotate(count=Count("id"), last=Max("updated_at"))
+        .values_list("source__namespace_id", "count", "last")
+    )
+    for index, queryset in enumerate((sources, targets)):
+        for namespace_id, count, last in queryset:
+            counts.setdefault(namespace_id, [0, None, 0, None])[
+                2 * index : 2 * index + 2
+            ] = [count, last.isoformat()]
+    return {
+        namespace_id: json.dumps([DIGEST_VERSION, *counts.get(namespace_id, [])])
+        for namespace_id in namespace_ids
+    }
+
+
+def build_namespace_tree(namespace_id, chunk_size=5000):
+    """Returns the digest subtree {locale: {bucket: digest}} of the sources and targets of the namespace"""
+    tree = {}
+
+    def add_leaf(locale, bucket, leaf_digest):
+        buckets = tree.setdefault(locale, {})
+        buckets[bucket] = buckets.get(bucket, 0) ^ leaf_digest
+
+    sources = (
+        TranslationSource.objects.filter(namespace_id=namespace_id)
+        .order_by()
+        .values_list("identifier", "sync_bucket", "_lang", "fingerprint")
+    )
+    for identifier, bucket, locale, fingerprint in sources.iterator(chunk_size):
+        add_leaf(locale, bucket, digest(identifier, fingerprint))
+
+    targets = (
+        TranslationTarget.objects.filter(source__namespace_id=namespace_id)
+        .order_by()
+        .values_list(
+            "source__identifier",
+            "source__sync_bucket",
+            "_lang",
+            "content",
+            "translated",
+            "approved",
+            "source_fingerprint",
+        )
+    )
+    for identifier, bucket, locale, content, *status in targets.iterator(chunk_size):
+        leaf_digest = digest(identifier, content_fingerprint(content), *status)
+        add_leaf(locale, bucket, leaf_digest)
+    return tree
+
+
+def build_digest_tree(namespaces=None, chunk_size=5000):
+    """
+    Returns the digest tree {namespace: {locale: {bucket: digest}}} of the sources and targets. The cached subtrees of
+    unchanged namespaces are reused, the others are built and cached.
+    """
+    condition = Q(namespace__in=namespaces) if namespaces else Q()
+    namespaces_by_id = dict(
+        Namespace.objects.filter(condition).values_list("id", "namespace")
+    )
+    # The stamps are taken before reading the rows: a concurrent write changes the stamp for the next build
+    stamps = namespace_stamps(list(namespaces_by_id))
+    cached = {
+        namespace_id: (stamp, subtree)
+        for namespace_id, stamp, subtree in NamespaceDigest.objects.filter(
+            namespace_id__in=namespaces_by_id
+        ).values_list("namespace_id", "stamp", "tree")
+    }
+    tree = {}
+    for namespace_id, namespace in namespaces_by_id.items():
+        stamp, subtree = cached.get(namespace_id, (None, None))
+        if stamp == stamps[namespace_id]:
+            subtree = {
+                locale: {
+                    int(bucket): int(value, 16) for bucket, value in buckets.items()
+                }
+                for locale, buckets in subtree.items()
+            }
+        else:
+            subtree = build_namespace_tree(namespace_id, chunk_size)
+            with transaction.atomic():
+                NamespaceDigest.objects.update_or_create(
+                    namespace_id=namespace_id,
+                    defaults={
+                        "stamp": stamps[namespace_id],
+                        "tree": {
+                            locale: {
+                                str(bucket): f"{value:032x}"
+                                for bucket, value in buckets.items()
+                            }
+                            for locale, buckets in subtree.items()
+                        },
+                    },
+                )
+        if subtree:
+            tree[namespace] = subtree
+    return tree
+
+
+def node_digest(buckets):
+    result = 0
+    for bucket_digest in buckets.values():
+        result ^= bucket_digest
+    return result
+
+
+def write_digest_file(path, namespaces=None):
+    """Writes the digest tree of this environment as JSON. Returns the number of namespaces"""
+    tree = build_digest_tree(namespaces)
+    data = {
+        "version": DIGEST_VERSION,
+        "buckets": BUCKETS,
+        "namespaces": {
+            namespace: {
+                locale: {
+                    "digest": f"{node_digest(buckets):032x}",
+                    "buckets": {
+                        str(bucket): f"{bucket_digest:032x}"
+                        for bucket, bucket_digest in buckets.items()
+                        if bucket_digest
+                    },
+                }
+                for locale, buckets in locales.items()
+            }
+            for namespace, locales in tree.items()
+        },
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, separators=(",", ":"))
+    return len(tree)
+
+
+def read_digest_file(path):
+    """Returns the digest tree of the file as {namespace: {locale: (digest, {bucket: digest})}}"""
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    if data.get("version") != DIGEST_VERSION or data.get("buckets") != BUCKETS:
+        raise ValueError(f"{path} is not a digest file of this babelbase version")
+    return {
+        namespace: {
+            locale: (
+                int(node["digest"], 16),
+                {
+                    int(bucket): int(bucket_digest, 16)
+                    for bucket, bucket_digest in node["buckets"].items()
+                },
+            )
+            for locale, node in locales.items()
+        }
+        for namespace, locales in data["namespaces"].items()
+    }
+
+
+def compare_digest_trees(tree, remote_tree):
+    """
+    Returns the differing buckets {namespace: {locale: {bucket, ...}}} of the local tree compared to the remote tree.
+    The buckets of equal namespace/locale nodes are not compared.
+    """
+    differences = {}
+    for namespace in tree.keys() | remote_tree.keys():
+        locales = tree.get(namespace, {})
+        remote_locales = remote_tree.get(namespace, {})
+        for locale in locales.keys() | remote_locales.keys():
+            buckets = {
+                bucket: bucket_digest
+                for bucket, bucket_digest in locales.get(locale, {}).items()
+                if bucket_digest
+            }
+            remote_digest, remote_buckets = remote_locales.get(locale, (0, {}))
+            if node_digest(buckets) == remote_digest:
+                continue
+            differing = {
+                bucket
+                for bucket in buckets.keys() | remote_buckets.keys()
+                if buckets.get(bucket, 0) != remote_buckets.get(bucket, 0)
+            }
+            differences.setdefault(namespace, {})[locale] = differing
+    return differences
+
+
+def delta_records(differences, chunk_size=1000):
+    """
+    Yields the export records of the sources in differing buckets with the targets of their differing locales. The
+    buckets and locales are selected in the export queries.
+    """
+    for namespace, locales in differences.items():
+        buckets = set().union(*locales.values())
+        if not buckets:
+            continue
+        target_filter = Q(pk__in=[])
+        for locale, locale_buckets in locales.items():
+            if locale_buckets:
+                target_filter |= Q(_lang=locale, source__sync_bucket__in=locale_buckets)
+        yield from export_records(
+            [namespace],
+            chunk_size=chunk_size,
+            source_filter=Q(sync_bucket__in=buckets),
+            target_filter=target_filter,
+        )
+
+
+def export_delta(remote_digest_path, path, namespaces=None, chunk_size=1000):
+    """
+    Writes the rows differing from the remote digest file as JSONL.
+    Returns (number of differing buckets, number of exported sources).
+    """
+    differences = compare_digest_trees(
+        build_digest_tree(namespaces), read_digest_file(remote_digest_path)
+    )
+    if namespaces:
+        differences = {
+            namespace: locales
+            for namespace, locales in differences.items()
+            if namespace in namespaces
+        }
+    bucket_count = sum(
+        len(buckets) for locales in differences.values() for buckets in locales.values()
+    )
+    return bucket_count, write_records(path, delta_records(differences, chunk_size))
@@ -8,9 +8,12 @@ from django import template
 from django.conf import settings
 from django.conf.urls.i18n import is_language_prefix_patterns_used
 from django.urls import translate_url as translate_url
-from django.template import Library
+from django.template import Library, TemplateSyntaxError
+from django.template.library import SimpleNode, parse_bits
 
-from babelbase.models import TranslationSource
+from babelbase.deferred import PASS_THROUGH_TAGS, get_active_collector
+from babelbase.lookup import lookup_record
+from babelbase.templatetags.translate_content import render_snippet
 
 register = Library()
 
@@ -56,29 +59,100 @@ def internationalize_url(path, language_code):
     return reassembled_path
 
 
-@register.simple_tag(takes_context=True)
-def babel(context, namespace, identifier, placeholder=""):
-    # Fetch Translation target from source
-    translation_target = None
-    translation_source = TranslationSource.objects.get_source_or_none(
-        namespace, identifier
+def babel(context, namespace, identifier, placeholder="", deferrable=True):
+    # Deferred Resolution: emit a marker that is resolved in bulk after rendering
+    collector = get_active_collector() if deferrable else None
+    if collector is not None:
+        return collector.defer(namespace, identifier, placeholder, context.autoescape)
+    # Fetch the translation from the template manifest prefetch or in place
+    record = lookup_record(namespace, identifier, context)
+    if record:
+        return record[1]
+    return placeholder
+
+
+class BabelNode(SimpleNode):
+    """
+    The babel tag assigned to a variable or within a block tag transforming its body is resolved in place, the filters
+    need the text
+    """
+
+    def __init__(self, *args, deferrable=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deferrable = deferrable and self.target_var is None
+
+    def get_resolved_arguments(self, context):
+        args, kwargs = super().get_resolved_arguments(context)
+        kwargs["deferrable"] = self.deferrable
+        return args, kwargs
+
+
+@register.tag(name="babel")
+def babel_tag(parser, token):
+    """
+    Translates a single string, the placeholder is returned if the key is not in the database:
+
+    {% babel "namespace" "identifier" "placeholder" %} or {% babel "namespace" "identifier" as variable %}
+    """
+    bits = token.split_contents()
+    target_var = None
+    if len(bits) >= 2 and bits[-2] == "as":
+        target_var = bits[-1]
+        bits = bits[:-2]
+    args, kwargs = parse_bits(
+        parser,
+        bits[1:],
+        ["context", "namespace", "identifier", "placeholder"],
+        None,
+        None,
+        ("",),
+        [],
+        None,
+        True,
+        bits[0],
     )
-    if translation_source:
-        translation_target = translation_source.get_translation()
-    # Output Fork
-    if translation_target:
-        return translation_target.content
-    elif translation_source:
-        return translation_source.content
-    else:
-        return placeholder
+    # The command stack holds the enclosing block tags and the babel tag itself
+    deferrable = all(
+        command in PASS_THROUGH_TAGS for command, _ in parser.command_stack[:-1]
+    )
+    return BabelNode(babel, True, args, kwargs, target_var, deferrable=deferrable)
 
 
 @register.tag
 def babelblock(parser, token):
-    return BabelBlockNode()
+    """
+    Translates a block of rich text. The body of the block is compiled once at parse time and serves as source
+    fallback if the key is not in the database:
+
+    {% babelblock "namespace" "identifier" %}<p>Fallback with {{ variables }}</p>{% endbabelblock %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise TemplateSyntaxError(
+            f"{bits[0]!r} takes two arguments: the namespace and the identifier"
+        )
+    nodelist = parser.parse(("endbabelblock",))
+    parser.delete_first_token()
+    return BabelBlockNode(
+        parser.compile_filter(bits[1]), parser.compile_filter(bits[2]), nodelist
+    )
 
 
 class BabelBlockNode(template.Node):
+    """
+    Renders the translation of the key as template, otherwise the fallback nodelist. Translations are compiled once
+    per content and engine (see compile_snippet), so rendering only evaluates an already compiled nodelist.
+    """
+
+    def __init__(self, namespace, identifier, nodelist):
+        self.namespace = namespace
+        self.identifier = identifier
+        self.nodelist = nodelist
+
     def render(self, context):
-        return ""
+        namespace = self.namespace.resolve(context)
+        identifier = self.identifier.resolve(context)
+        record = lookup_record(namespace, identifier, context)
+        if record and record[1] and not record[1].isspace():
+            return render_snippet(record[1], context)
+        return self.nodelist.render(context)
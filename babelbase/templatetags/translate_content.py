@@ -1,14 +1,16 @@
-import logging
+import re
+from functools import lru_cache
 
-# import sentry_sdk
 from django import template
 from django.conf import settings
-from django.template import Library, Template, TemplateSyntaxError
+from django.template import Engine, Library, Template, TemplateSyntaxError
+from django.template.base import TokenType
 from django.urls import reverse
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
 
-from babelbase.models import Content
+from babelbase.lookup import lookup_record
+from babelbase.utils import get_setting
 
 register = Library()
 
@@ -33,10 +35,13 @@ TEMPLATE_TOKEN_ESCAPE_DICT = {
 MISSING_TRANSLATION_HTML = """
 <span style="color:red">MISSING TRANSLATION: {text}</span>
 <span><small><a style="text-decoration: underline;"
-href="{admin_add_url}?view_identifier={view_id}&key_identifier={key_id}&snippet_de={text}"
+href="{admin_add_url}?identifier={key_id}&content={text}"
 target="_blank">(CREATE)</a></small></span>
 """
 
+# Opening of a variable, block or comment tag
+TEMPLATE_SYNTAX_PATTERN = re.compile(r"{[{%#]")
+
 ADMIN_CHANGE_TRANSLATION_HTML = """
 <span><small><a style="text-decoration: underline;" href="{admin_change_url}"
 target="_blank">(EDIT)</a></small></span>
@@ -61,6 +66,20 @@ def escape_templatetags(placeholder):
     return placeholder
 
 
+@lru_cache(maxsize=get_setting("BABELBASE_SNIPPET_TEMPLATE_CACHE_SIZE"))
+def compile_snippet(text, engine):
+    """Compiles the snippet once per content and engine, bounded by BABELBASE_SNIPPET_TEMPLATE_CACHE_SIZE"""
+    return Template(text, engine=engine)
+
+
+def render_snippet(text, context):
+    """Renders the snippet in the context. Plain text without template syntax skips the template engine"""
+    if not TEMPLATE_SYNTAX_PATTERN.search(text):
+        return text
+    engine = getattr(context.template, "engine", None) or Engine.get_default()
+    return compile_snippet(text, engine).render(context)
+
+
 @register.simple_tag(takes_context=True)
 def get_content(context, view_id, key_id, placeholder=""):
     """Returns the text for a specific view_id / key_id combination.
@@ -74,6 +93,11 @@ def get_content(context, view_id, key_id, placeholder=""):
     key_id: identifier in the database lookup
     text: The text that should be used as the english version
     """
+    return render_content(context, view_id, key_id, placeholder)
+
+
+def render_content(context, view_id, key_id, placeholder="", fallback=None):
+    """Renders the content of get_content. If given, the fallback nodelist is rendered for a missing key"""
     translatable_text = None
     snippet_id = None
     if "view_identifier_list" in context and view_id in context["view_identifier_list"]:
@@ -82,38 +106,30 @@ def get_content(context, view_id, key_id, placeholder=""):
             translatable_text = context[(view_id, key_id)][1]
             snippet_id = context[(view_id, key_id)][0]
     else:
-        # Attempt to fetch view/key combination inplace
-        translatable_snippet = Content.objects.get_translatable_or_none(view_id, key_id)
-        if translatable_snippet:
-            translatable_text = translatable_snippet.snippet
-            snippet_id = translatable_snippet.id
+        # Attempt to fetch namespace/identifier from the template manifest prefetch or in place
+        record = lookup_record(view_id, key_id, context)
+        if record:
+            snippet_id, translatable_text = record
 
     # Return Rendered Text
     # Check if we have a text and not just whitespace
     if translatable_text and not translatable_text.isspace():
-        # TODO: Consider vanilla python instead of Template() rendering for performance reasons
-        translatable_text_template = Template(translatable_text)
-        rendered_translatable_text = translatable_text_template.render(context)
-
-        if user_can_edit_translations(context.request):
-            if not snippet_id:  # Potentially never called
-                snippet_id = Content.objects.get(
-                    view_identifier=view_id, key_identifier=key_id
-                ).id
-            if settings.ALLOW_DB_CONTENT_FRONTEND_EDIT:
-                # Add the edit link to the admin
-                rendered_translatable_text += ADMIN_CHANGE_TRANSLATION_HTML.format(
-                    admin_change_url=reverse(
-                        "admin:content_i18n_content_change",
-                        kwargs={"object_id": snippet_id},
-                    ),
-                )
+        rendered_translatable_text = render_snippet(translatable_text, context)
+
+        if snippet_id and user_can_edit_translations(getattr(context, "request", None)):
+            # Add the edit link to the admin
+            rendered_translatable_text += ADMIN_CHANGE_TRANSLATION_HTML.format(
+                admin_change_url=reverse(
+                    "admin:babelbase_translationsource_change",
+                    kwargs={"object_id": snippet_id},
+                ),
+            )
 
         return mark_safe(rendered_translatable_text)
 
     else:
         # translatable text is not available: give out warning or log a warning in the background
-        if user_can_edit_translations(context.request):
+        if user_can_edit_translations(getattr(context, "request", None)):
             # show key_id in case there is no placeholder
             if placeholder == "":
                 placeholder = key_id
@@ -123,25 +139,16 @@ def get_content(context, view_id, key_id, placeholder=""):
                     view_id=view_id,
                     key_id=key_id,
                     text=escape(placeholder),
-                    admin_add_url=reverse("admin:content_i18n_content_add"),
+                    admin_add_url=reverse("admin:babelbase_translationsource_add"),
                 )
             )
 
         else:
-            # If not text, and we are in production: empty string but log error in sentry
-            log_message = (
-                f"""Translatable Content is missing for {view_id}---{key_id}"""
-            )
-            # TODO: Re-enable Sentry Logging
-            # if settings.PRODUCTION:
-            #     # Only issue sentry in PRODUCTION MODE
-            #     sentry_sdk.capture_message(log_message, level="warning")
-            #
-            # # otherwise, just log the message internally
-            # else:
-            #     logging.info(log_message)
-            logging.info(log_message)
-            # use placeholder (default: "") as standard output
+            # If not text, and we are in production: empty string
+            # Missing keys are reported aggregated by the lookup (see babelbase.missing)
+            # use the fallback or the placeholder (default: "") as standard output
+            if fallback is not None:
+                return fallback.render(context)
             return mark_safe(placeholder)
 
 
@@ -168,24 +175,34 @@ def blockcontent_i18n(parser, token):
         raise TemplateSyntaxError(
             "%r takes two arguments: the view_id and key_id" % token.contents.split()[0]
         )
-    # Reverse engineer the Tokens
-    placeholder = ""
-    while parser.tokens[-1].contents != "endblockcontent_i18n":
-        placeholder += reverse_token(token=parser.tokens.pop())
+    # Capture the raw block body in a single pass, parser.tokens is in reversed order
+    end_index = len(parser.tokens) - 1
+    while end_index >= 0 and not (
+        parser.tokens[end_index].token_type == TokenType.BLOCK
+        and parser.tokens[end_index].contents == "endblockcontent_i18n"
+    ):
+        end_index -= 1
+    placeholder = "".join(
+        reverse_token(token=block_token)
+        for block_token in reversed(parser.tokens[end_index + 1 :])
+    )
+    # Compile the body once as fallback
+    nodelist = parser.parse(("endblockcontent_i18n",))
     parser.delete_first_token()
-    return BlockContentI18NNode(view_id, key_id, placeholder)
+    return BlockContentI18NNode(view_id, key_id, placeholder, nodelist)
 
 
 class BlockContentI18NNode(template.Node):
-    """Fake block node returning the output of the get_content templatetag"""
+    """Block node returning the output of the get_content templatetag, rendering the body for a missing key"""
 
-    def __init__(self, view_id, key_id, placeholder):
+    def __init__(self, view_id, key_id, placeholder, nodelist):
         # Strip potential quotes from identifier
         self.view_id = view_id.strip("\"'")
         self.key_id = key_id.strip("\"'")
         self.placeholder = placeholder
+        self.nodelist = nodelist
 
     def render(self, context):
-        # Does NOT render, just compiles and returns the get_content templatetag
-        output = get_content(context, self.view_id, self.key_id, self.placeholder)
-        return output
+        return render_content(
+            context, self.view_id, self.key_id, self.placeholder, self.nodelist
+        )
@@ -1,96 +1,172 @@
 import logging
-import re
+import threading
+import warnings
+import weakref
+from collections import OrderedDict
 
-from django.conf import settings
-from django.db.utils import ProgrammingError
+from django.db.utils import DatabaseError
 from django.utils.functional import lazy
 
+from babelbase.catalog import get_catalog
+from babelbase.lookup import resolve_records
+from babelbase.messageformat import compile_message
+from babelbase.missing import report_missing_key
 from babelbase.models import TranslationSource
-
-
-def convert_curly_braces(text):
-    """Streamlines double-curly braces syntax into a proper f-string interpolation format"""
-    pattern = r"{{\s*([\w\d]+)\s*}}"
-
-    def replace_match(match):
-        return "{" + match.group(1) + "}"
-
-    return re.sub(pattern, replace_match, text)
+from babelbase.utils import get_current_locale, get_setting
 
 
 def context_interpolation(text, context):
-    """Returns the text with the {{var}} replaced if in the context"""
-    text = convert_curly_braces(text)
-    interpolated_text = text.format(**context)
-    return interpolated_text
+    """Returns the text with the {{var}} replaced if in the context, see babelbase.messageformat"""
+    return compile_message(text).format(context)
 
 
 class DatabaseTranslationBuffer:
     """
-    Handles databased translation with view_id, key_id from within python code.
+    Handles database translations with namespace, identifier from within python code.
 
-    Initializing the class, the translation_snippets are pre-loaded. When the gettext_db is called it will lookup the
-    pre-loaded dictionary first before attempting another call to the db.
+    The buffer is partitioned per locale. On first use in a locale, up to max_entries sources of the namespaces are
+    pre-loaded with their approved translation in a single query. When db_gettext_lazy is evaluated, it will lookup the partition
+    first before resolving the key through the lookup layers (catalog, caches, database).
+
+    Partitions hold compact (source_id, text) records, are bounded by max_entries (LRU) and safe for concurrent use.
+    Buffers are cleared when translations change in this process. get_object and view_identifier_list are deprecated.
 
     Initialization:
     translation_namespace = ["user_tracks", "investor_qualification"]
-    db_trans = DatabaseTranslationManager(translation_namespace)
+    db_buffer = DatabaseTranslationBuffer(translation_namespace)
 
     DB Buffered Retrieval:
-    db_trans.gettext_lazy("view_id", "key_id", context={})
+    db_gettext_lazy(db_buffer, "namespace", "identifier", context={})
     """
 
-    translation_content = {}
-
-    def __init__(self, view_identifier_list=[]):
-        """Namespace chaining and pr-loading"""
-        generic_view_identifier = settings.DB_TRANSLATION_DEFAULT_IDENTIFIER
-        self.view_identifier_list = generic_view_identifier + view_identifier_list
-        # Pre-Loading
-        self.prefetch_translations_from_db()
-
-    def prefetch_translations_from_db(self):
+    def __init__(
+        self, namespace_list=None, max_entries=None, view_identifier_list=None
+    ):
+        """Namespace chaining, pre-loading is deferred to the first use in a locale"""
+        if view_identifier_list is not None:
+            warnings.warn(
+                "The view_identifier_list argument of DatabaseTranslationBuffer is deprecated, use namespace_list",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            namespace_list = list(namespace_list or []) + list(view_identifier_list)
+        generic_namespace_list = get_setting("DB_TRANSLATION_DEFAULT_IDENTIFIER")
+        self.namespace_list = generic_namespace_list + list(namespace_list or [])
+        self.max_entries = max_entries or get_setting("BABELBASE_BUFFER_MAX_ENTRIES")
+        self._lock = threading.Lock()
+        self._partitions = {}
+        _translation_buffers.add(self)
+
+    def prefetch_translations_from_db(self, locale):
         """
-        Fetches the translations for the view_identifiers from the database.
-        We require a try/except clause as this function is evaluated *before* django models are
+        Fetches the records of the namespaces in the locale with a single query.
+        We require a try/except clause as this function may be evaluated *before* django models are
         ready or migrated.
         """
-
+        if get_catalog(locale) is not None:
+            # The compiled catalog resolves the keys without any query
+            return {}
         try:
-            queryset = TranslationSource.objects.filter(
-                view_identifier__in=list(self.view_identifier_list)
+            # Bounded by max_entries, the partition would evict the rest anyway
+            namespace_records = TranslationSource.objects.namespace_records(
+                self.namespace_list, locale, limit=self.max_entries
             )
-            for record in queryset:
-                # add view_id, key_id as lookup keys and the translatable object
-                self.translation_content[
-                    (record.view_identifier, record.key_identifier)
-                ] = record
 
         # this clause prevents unittests to fail due to missing models at startup
-        except ProgrammingError as error:
-            # make sure it's a missing relation
-            if "relation" in str(error):
-                logging.error(
-                    "TranslationSource model not available: please run migrations first"
-                )
-                return None
+        except DatabaseError as error:
+            # e.g. a missing relation (ProgrammingError) or table (OperationalError on SQLite)
+            logging.error(
+                f"TranslationSource model not available: please run migrations first ({error})"
+            )
+            return {}
+
+        return {
+            (namespace, identifier): record
+            for namespace, records in namespace_records.items()
+            for identifier, record in records.items()
+        }
+
+    def _store(self, partition, records):
+        """Adds the records to the partition, evicting the least recently used. Requires the lock"""
+        for key, record in records.items():
+            partition[key] = record
+            partition.move_to_end(key)
+        while len(partition) > self.max_entries:
+            partition.popitem(last=False)
+
+    def get_partition(self, locale):
+        """Returns the partition of the locale, pre-loading it on first use"""
+        partition = self._partitions.get(locale)
+        if partition is None:
+            records = self.prefetch_translations_from_db(locale)
+            with self._lock:
+                partition = self._partitions.get(locale)
+                if partition is None:
+                    partition = self._partitions[locale] = OrderedDict()
+                    self._store(partition, records)
+        return partition
+
+    def get_many(self, keys, locale=None):
+        """Returns a dict {(namespace, identifier): (source_id, text)} of all keys found"""
+        if not locale:
+            locale = get_current_locale()
+        partition = self.get_partition(locale)
+        records = {}
+        missing = set()
+        with self._lock:
+            for key in keys:
+                record = partition.get(key)
+                if record is None:
+                    missing.add(key)
+                    continue
+                partition.move_to_end(key)
+                records[key] = record
+        if missing:
+            fetched = resolve_records(missing, locale)
+            with self._lock:
+                self._store(partition, fetched)
+            records.update(fetched)
+        return records
+
+    def get(self, namespace, identifier, locale=None):
+        """Returns the record (source_id, text) of the key or None"""
+        key = (namespace, identifier)
+        return self.get_many([key], locale).get(key)
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+
+    @property
+    def view_identifier_list(self):
+        """Deprecated: use namespace_list"""
+        warnings.warn(
+            "DatabaseTranslationBuffer.view_identifier_list is deprecated, use namespace_list",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.namespace_list
 
-            # otherwise, raise error
-            raise error
+    def get_object(self, view_id, key_id):
+        """Deprecated: returns the TranslationSource of the key or None, use get for the translated text"""
+        warnings.warn(
+            "DatabaseTranslationBuffer.get_object is deprecated, use get",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        record = self.get(view_id, key_id)
+        if record is None:
+            return None
+        return TranslationSource.objects.filter(pk=record[0]).first()
 
-        return len(queryset)
 
-    def get_object(self, view_id, key_id):
-        """Returns the object which is not decided on a translation yet"""
-        if (view_id, key_id) in self.translation_content:
-            translatable_content = self.translation_content[(view_id, key_id)]
-        else:
-            translatable_content = TranslationSource.objects.get_translatable_or_none(
-                view_id, key_id
-            )
-        if translatable_content:
-            return translatable_content
-        return None
+_translation_buffers = weakref.WeakSet()
+
+
+def clear_translation_buffers():
+    """Clears all buffers of this process, they are pre-loaded again on next use"""
+    for buffer in list(_translation_buffers):
+        buffer.clear()
 
 
 def get_text_from_db_translation_buffer(
@@ -99,12 +175,11 @@ def get_text_from_db_translation_buffer(
     """
     Handler for the lazily evaluated proxy db_gettext_lazy
     """
-    if type(buffer) is DatabaseTranslationBuffer:
-        translatable_content = getattr(buffer, "get_object")(view_id, key_id)
-        if translatable_content:
-            translatable_text = translatable_content.snippet
-            translatable_text = context_interpolation(translatable_text, context)
-            return translatable_text
+    if isinstance(buffer, DatabaseTranslationBuffer):
+        record = buffer.get(view_id, key_id)
+        if record:
+            return context_interpolation(record[1], context)
+        report_missing_key(view_id, key_id)
     return f"MISSING {view_id}---{key_id}: {placeholder}"
 
 
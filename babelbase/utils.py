@@ -1,11 +1,66 @@
+import functools
+import hashlib
+import os
+
 from django.conf import settings
 from django.utils.translation import get_language
 
+from babelbase import defaults
+
+
+def get_setting(name):
+    """Returns the setting from the project settings, otherwise the babelbase default"""
+    return getattr(settings, name, getattr(defaults, name))
+
+
+def get_cache_dir():
+    """Returns the directory of the files of the management commands (see BABELBASE_CACHE_DIR)"""
+    directory = get_setting("BABELBASE_CACHE_DIR")
+    if directory:
+        return str(directory)
+    if getattr(settings, "BASE_DIR", None):
+        return os.path.join(settings.BASE_DIR, ".babelbase")
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "babelbase")
+
+
+def get_cache_file(setting_name, filename):
+    """
+    Returns the path of the file of the setting, by default the filename in the cache directory (which is created).
+    An empty string disables the file.
+    """
+    path = get_setting(setting_name)
+    if path is None:
+        directory = get_cache_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, filename)
+    return str(path)
+
+
+def content_fingerprint(content):
+    """Returns the hex digest of the content to detect changes of the source content"""
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+# Number of buckets per namespace and locale of the digest trees of the delta sync (see babelbase.sync)
+SYNC_BUCKETS = 256
+
+
+def identifier_bucket(identifier):
+    """Returns the bucket of the identifier in the digest trees of the delta sync"""
+    return (
+        hashlib.blake2b(identifier.encode(), digest_size=1).digest()[0] % SYNC_BUCKETS
+    )
+
 
 def default_json_list():
     return []
 
 
+def default_json_dict():
+    return {}
+
+
 def all_locales():
     return [lang[0] for lang in settings.LANGUAGES]
 
@@ -22,3 +77,36 @@ def get_current_locale():
     if not lang:
         lang = settings.LANGUAGE_CODE
     return lang
+
+
+def build_fallback_chain(locale, fallbacks, locales):
+    chain = [locale, *fallbacks.get(locale, ())]
+    if locale not in fallbacks:
+        generic = locale.split("-")[0]
+        if generic != locale and generic in locales:
+            chain.append(generic)
+    # The source language ends the chain, its content is the final fallback
+    if settings.LANGUAGE_CODE in chain:
+        chain = chain[: chain.index(settings.LANGUAGE_CODE)]
+    return tuple(dict.fromkeys(chain))
+
+
+@functools.cache
+def get_fallback_chains():
+    """Returns the fallback chains {locale: (locale, fallback, ...)} of the locales of settings.LANGUAGES"""
+    fallbacks = get_setting("BABELBASE_LOCALE_FALLBACKS")
+    locales = all_locales()
+    return {
+        locale: build_fallback_chain(locale, fallbacks, locales)
+        for locale in {*locales, *fallbacks}
+    }
+
+
+def locale_fallback_chain(locale):
+    """Returns the locales whose approved translations are used for the locale, in order of preference"""
+    chain = get_fallback_chains().get(locale)
+    if chain is None:
+        chain = build_fallback_chain(
+            locale, get_setting("BABELBASE_LOCALE_FALLBACKS"), all_locales()
+        )
+    return chain
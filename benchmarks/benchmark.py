@@ -0,0 +1,411 @@
+"""
+Benchmark suite of babelbase against a synthetic catalog in a temporary SQLite database.
+
+The generator creates N namespaces x M sources x L locales (a share of the targets approved) and templates using the
+babel and get_content tags on these keys. Every benchmark reports the best and mean time of its repeats, the time per
+item and the number of queries of each repeat, so the JSON output of two releases can be compared. The benchmarks
+complement the test suite in tests/, they do not assert any behavior.
+
+RUN (from the repository root): python -m benchmarks.benchmark --namespaces 20 --sources 500 --locales 3
+
+The suite configures its own settings, run it outside of a project (DJANGO_SETTINGS_MODULE is ignored).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+import django
+from django.conf import settings
+
+LOCALES = ["de", "fr", "es", "it", "nl", "pt", "pl", "sv", "da", "fi", "cs", "de-at"]
+WORDS = [
+    "translation",
+    "source",
+    "target",
+    "namespace",
+    "identifier",
+    "catalog",
+    "locale",
+    "content",
+    "template",
+    "render",
+    "query",
+    "cache",
+    "bundle",
+    "buffer",
+    "prefetch",
+    "approved",
+    "fallback",
+    "message",
+    "private",
+    "market",
+    "insight",
+    "update",
+]
+
+
+def configure(directory, locales):
+    """Configures Django with a SQLite database and a template directory in the directory"""
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY="babelbase-benchmark",
+        ALLOWED_HOSTS=["*"],
+        INSTALLED_APPS=[
+            "django.contrib.admin",
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "django.contrib.sessions",
+            "django.contrib.messages",
+            "babelbase",
+        ],
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(directory, "benchmark.sqlite3"),
+            }
+        },
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+        MIDDLEWARE=[
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "django.contrib.messages.middleware.MessageMiddleware",
+        ],
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "DIRS": [os.path.join(directory, "templates")],
+                "APP_DIRS": True,
+                "OPTIONS": {
+                    "context_processors": [
+                        "django.template.context_processors.request",
+                        "django.contrib.auth.context_processors.auth",
+                        "django.contrib.messages.context_processors.messages",
+                    ]
+                },
+            }
+        ],
+        ROOT_URLCONF=types.ModuleType("babelbase_benchmark_urls"),
+        LANGUAGE_CODE="en",
+        LANGUAGES=[("en", "English"), *((locale, locale) for locale in locales)],
+        USE_I18N=True,
+        USE_TZ=True,
+        DEFAULT_AUTO_FIELD="django.db.models.BigAutoField",
+        DB_TRANSLATION_DEFAULT_IDENTIFIER=[],
+        ALLOW_DB_CONTENT_FRONTEND_EDIT=False,
+        BABELBASE_SCAN_MANIFEST=os.path.join(directory, "scan_manifest.json"),
+    )
+    django.setup()
+    from django.contrib import admin
+    from django.urls import path
+
+    settings.ROOT_URLCONF.urlpatterns = [path("admin/", admin.site.urls)]
+
+
+def generate_catalog(namespaces, sources, locales, approved_ratio=0.8, seed=0):
+    """Creates the namespaces, sources and targets. Returns the keys [(namespace, identifier), ...]"""
+    from babelbase.models import Namespace, TranslationSource, TranslationTarget
+    from babelbase.utils import content_fingerprint, identifier_bucket
+
+    rng = random.Random(seed)
+    Namespace.objects.bulk_create(
+        [Namespace(namespace=f"namespace-{index}") for index in range(namespaces)]
+    )
+    namespace_ids = dict(Namespace.objects.values_list("namespace", "id"))
+    new_sources = []
+    for namespace_id in namespace_ids.values():
+        for index in range(sources):
+            content = " ".join(rng.choices(WORDS, k=rng.randint(3, 30)))
+            if index % 5 == 0:
+                content += " {{name}}"
+            new_sources.append(
+                TranslationSource(
+                    namespace_id=namespace_id,
+                    identifier=f"key-{index}",
+                    sync_bucket=identifier_bucket(f"key-{index}"),
+                    _lang="en",
+                    content=content,
+                    fingerprint=content_fingerprint(content),
+                )
+            )
+    TranslationSource.objects.bulk_create(new_sources, batch_size=1000)
+    source_rows = TranslationSource.objects.values_list("id", "content", "fingerprint")
+    new_targets = []
+    for source_id, content, fingerprint in source_rows.iterator():
+        for locale in locales:
+            approved = rng.random() < approved_ratio
+            new_targets.append(
+                TranslationTarget(
+                    source_id=source_id,
+                    _lang=locale,
+                    content=f"[{locale}] {content}",
+                    translated=True,
+                    approved=approved,
+                    source_fingerprint=fingerprint,
+                )
+            )
+    TranslationTarget.objects.bulk_create(new_targets, batch_size=1000)
+    TranslationSource.objects.recompute_locale_status()
+    return [
+        (namespace, f"key-{index}")
+        for namespace in namespace_ids
+        for index in range(sources)
+    ]
+
+
+def generate_templates(directory, keys, templates=50, tags=40, seed=0):
+    """Writes templates using babel and get_content on sampled keys"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for index in range(templates):
+        lines = ["{% load babelbase translate_content %}"]
+        for namespace, identifier in rng.sample(keys, min(tags, len(keys))):
+            if rng.random() < 0.5:
+                lines.append(
+                    f'<p>{{% babel "{namespace}" "{identifier}" "fallback" %}}</p>'
+                )
+            else:
+                lines.append(
+                    f'<p>{{% get_content "{namespace}" "{identifier}" "fallback" %}}</p>'
+                )
+        with open(os.path.join(directory, f"page-{index}.html"), "w") as file:
+            file.write("\n".join(lines))
+
+
+def measure(name, func, items=1, repeat=5, setup=None):
+    """Runs func repeat times (after setup) and returns its timings and the query count of each repeat"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    durations = []
+    query_counts = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+        query_counts.append(len(queries.captured_queries))
+    return {
+        "name": name,
+        "items": items,
+        "repeat": repeat,
+        "seconds": min(durations),
+        "mean_seconds": statistics.mean(durations),
+        "per_item_us": min(durations) / items * 1e6,
+        "queries": query_counts,
+        # Repeats with a different query count than the first, e.g. caches warmed up by the first repeat
+        "queries_stable": len(set(query_counts)) == 1,
+    }
+
+
+def clear_caches():
+    from babelbase.cache import translation_cache
+    from babelbase.missing import missing_key_cache
+    from babelbase.translate import clear_translation_buffers
+
+    translation_cache.clear()
+    missing_key_cache.clear()
+    clear_translation_buffers()
+
+
+def render_template(keys, tag, tags, locale):
+    """Returns a function rendering a template with the tag on the keys"""
+    from django.template import engines
+    from django.utils import translation
+
+    template = engines["django"].from_string(
+        "{% load babelbase translate_content %}"
+        + "".join(
+            f'{{% {tag} "{ns}" "{identifier}" "fallback" %}}'
+            for ns, identifier in keys[:tags]
+        )
+    )
+
+    def render():
+        with translation.override(locale):
+            template.render({})
+
+    return render
+
+
+def run_benchmarks(directory, keys, locales, templates, tags=200, repeat=5):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.utils import translation
+
+    from babelbase.exchange import TranslationImport, export_translations
+    from babelbase.po import export_po
+    from babelbase.scanner import scan_templates
+    from babelbase.translate import DatabaseTranslationBuffer, db_gettext_lazy
+
+    locale = locales[0]
+    sample = random.Random(1).sample(keys, min(tags, len(keys)))
+    namespaces = sorted({namespace for namespace, _ in keys})
+    results = []
+
+    for tag in ("babel", "get_content"):
+        render = render_template(sample, tag, tags, locale)
+        results.append(
+            measure(
+                f"render_{tag}_cold", render, len(sample), repeat, setup=clear_caches
+            )
+        )
+        render()
+        results.append(measure(f"render_{tag}_warm", render, len(sample), repeat))
+
+    buffer = DatabaseTranslationBuffer(namespaces[:5])
+    results.append(
+        measure(
+            "buffer_prefetch",
+            lambda: buffer.get_partition(locale),
+            len(keys) // len(namespaces) * min(5, len(namespaces)),
+            repeat,
+            setup=buffer.clear,
+        )
+    )
+    buffer_keys = [key for key in sample if key[0] in namespaces[:5]] or sample
+
+    def evaluate():
+        with translation.override(locale):
+            for namespace, identifier in buffer_keys:
+                str(db_gettext_lazy(buffer, namespace, identifier, {"name": "Phil"}))
+
+    evaluate()
+    results.append(measure("db_gettext_lazy_eval", evaluate, len(buffer_keys), repeat))
+
+    manifest = settings.BABELBASE_SCAN_MANIFEST
+
+    def remove_manifest():
+        if os.path.exists(manifest):
+            os.remove(manifest)
+
+    results.append(
+        measure(
+            "scan_templates_cold",
+            lambda: scan_templates(manifest, jobs=1),
+            templates,
+            repeat,
+            remove_manifest,
+        )
+    )
+    results.append(
+        measure(
+            "scan_templates_incremental",
+            lambda: scan_templates(manifest),
+            templates,
+            repeat,
+        )
+    )
+
+    export_path = os.path.join(directory, "export.jsonl")
+    results.append(
+        measure(
+            "export_jsonl", lambda: export_translations(export_path), len(keys), repeat
+        )
+    )
+    results.append(
+        measure(
+            "import_jsonl_unchanged",
+            lambda: TranslationImport().run(export_path),
+            len(keys),
+            repeat,
+        )
+    )
+    po_path = os.path.join(directory, f"{locale}.po")
+    results.append(
+        measure("export_po", lambda: export_po(po_path, locale), len(keys), repeat)
+    )
+
+    user = User.objects.create_superuser("benchmark", password="benchmark")
+    client = Client()
+    client.force_login(user)
+    admin_urls = {
+        "admin_source_changelist": "/admin/babelbase/translationsource/",
+        "admin_source_search": "/admin/babelbase/translationsource/?q=namespace-0",
+        "admin_target_changelist": "/admin/babelbase/translationtarget/",
+        "admin_grid": f"/admin/babelbase/translationsource/grid/?namespace={namespaces[0]}&locale={locale}",
+    }
+
+    def get(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+    for name, url in admin_urls.items():
+        results.append(measure(name, lambda url=url: get(url), 1, repeat))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--namespaces", type=int, default=10)
+    parser.add_argument(
+        "--sources", type=int, default=500, help="Sources per namespace"
+    )
+    parser.add_argument(
+        "--locales", type=int, default=3, help=f"Target locales (max {len(LOCALES)})"
+    )
+    parser.add_argument("--approved-ratio", type=float, default=0.8)
+    parser.add_argument("--templates", type=int, default=50)
+    parser.add_argument(
+        "--tags", type=int, default=200, help="Tags per rendered template"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", default="-", help="Path of the JSON results, - for stdout"
+    )
+    args = parser.parse_args(argv)
+    locales = LOCALES[: args.locales]
+
+    with tempfile.TemporaryDirectory(prefix="babelbase-benchmark-") as directory:
+        configure(directory, locales)
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+        start = time.perf_counter()
+        keys = generate_catalog(
+            args.namespaces, args.sources, locales, args.approved_ratio, args.seed
+        )
+        generate_templates(
+            os.path.join(directory, "templates"), keys, args.templates, seed=args.seed
+        )
+        generation_seconds = time.perf_counter() - start
+        results = run_benchmarks(
+            directory, keys, locales, args.templates, args.tags, args.repeat
+        )
+
+    report = {
+        "parameters": {**vars(args), "locales": locales},
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "generation_seconds": generation_seconds,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as file:
+            file.write(output)
+        print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
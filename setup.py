@@ -3,7 +3,7 @@ from setuptools import find_packages, setup
 setup(
     name="babelbase",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests", "tests.*"]),
     include_package_data=True,
     install_requires=[
         "Django>=4.2",  # specify Django version compatible with your package
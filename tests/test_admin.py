@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from babelbase.admin.grid import grid_formset, load_grid, save_grid
+from babelbase.admin.translation import TranslationSourceAdmin
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+def grid_data(rows, **changes):
+    """Returns the POST data of the grid formset with the changes {index: {field: value}}"""
+    data = {
+        "grid-TOTAL_FORMS": str(len(rows)),
+        "grid-INITIAL_FORMS": str(len(rows)),
+    }
+    for index, row in enumerate(rows):
+        values = {
+            "source_id": row["source_id"],
+            "content": row["content"],
+            "translated": row["translated"],
+            "approved": row["approved"],
+            **changes.get(str(index), {}),
+        }
+        for field, value in values.items():
+            if value is True:
+                value = "on"
+            if value is not False:
+                data[f"grid-{index}-{field}"] = str(value)
+    return data
+
+
+class TranslationGridTest(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(namespace="general")
+        self.source = TranslationSource.objects.create(
+            namespace=self.namespace, identifier="greeting", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=self.source, _lang="de", content="Hallo", translated=True
+        )
+
+    def save(self, **changes):
+        rows, _ = load_grid(self.namespace, "de")
+        formset = grid_formset(rows, grid_data(rows, **changes))
+        self.assertTrue(formset.is_valid())
+        return save_grid(self.namespace, "de", rows, formset)
+
+    def test_approving_outdated_translation_keeps_it_outdated(self):
+        self.source.content = "Hello there"
+        self.source.save()
+        self.assertEqual(self.save(**{"0": {"approved": True}}), (0, 1))
+        target = TranslationTarget.objects.get()
+        self.assertTrue(target.approved)
+        self.assertTrue(target.outdated)
+
+    def test_changed_translation_is_up_to_date(self):
+        self.source.content = "Hello there"
+        self.source.save()
+        self.save(**{"0": {"content": "Hallo zusammen"}})
+        self.assertFalse(TranslationTarget.objects.get().outdated)
+
+    def test_target_created_concurrently_is_updated(self):
+        source = TranslationSource.objects.create(
+            namespace=self.namespace, identifier="welcome", content="Welcome"
+        )
+        rows, _ = load_grid(self.namespace, "de")
+        index = next(
+            index for index, row in enumerate(rows) if row["source_id"] == source.pk
+        )
+        formset = grid_formset(
+            rows,
+            grid_data(
+                rows, **{str(index): {"content": "Willkommen", "translated": True}}
+            ),
+        )
+        self.assertTrue(formset.is_valid())
+        # Another editor saves the same cell first
+        TranslationTarget.objects.create(source=source, _lang="de", content="Hallo")
+        self.assertEqual(save_grid(self.namespace, "de", rows, formset), (1, 0))
+        target = TranslationTarget.objects.get(source=source, _lang="de")
+        self.assertEqual((target.content, target.translated), ("Willkommen", True))
+
+
+@mock.patch.object(TranslationSourceAdmin, "list_per_page", 2)
+class KeysetChangeListTest(TestCase):
+    url = "/admin/babelbase/translationsource/"
+
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        for index in range(7):
+            TranslationSource.objects.create(
+                namespace=namespace, identifier=f"key-{index}", content="Hello"
+            )
+        self.client.force_login(User.objects.create_superuser("admin"))
+
+    def identifiers(self, response):
+        return [source.identifier for source in response.context["cl"].result_list]
+
+    def test_cursor_link_drops_the_page(self):
+        response = self.client.get(self.url, {"p": "2"})
+        self.assertEqual(self.identifiers(response), ["key-4", "key-3"])
+        next_url = response.context["cl"].next_cursor_url
+        self.assertIn("cursor=", next_url)
+        self.assertNotIn("p=", next_url)
+        response = self.client.get(self.url + next_url)
+        self.assertEqual(self.identifiers(response), ["key-2", "key-1"])
+
+    def test_cursor_ignores_the_page(self):
+        response = self.client.get(self.url)
+        cursor_url = response.context["cl"].next_cursor_url
+        response = self.client.get(self.url + cursor_url + "&p=2")
+        self.assertEqual(self.identifiers(response), ["key-4", "key-3"])
+
+
+class AdminViewsTest(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(namespace="general")
+        self.source = TranslationSource.objects.create(
+            namespace=self.namespace, identifier="greeting", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=self.source, _lang="de", content="Hallo", translated=True
+        )
+        self.client.force_login(User.objects.create_superuser("admin"))
+
+    def test_changelists(self):
+        for url in (
+            "/admin/babelbase/namespace/",
+            "/admin/babelbase/translationsource/",
+            "/admin/babelbase/translationsource/?q=greeting",
+            "/admin/babelbase/translationtarget/",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_change_views(self):
+        target = TranslationTarget.objects.get()
+        for url in (
+            f"/admin/babelbase/translationsource/{self.source.pk}/change/",
+            f"/admin/babelbase/translationtarget/{target.pk}/change/",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_grid_saves_the_changes(self):
+        url = "/admin/babelbase/translationsource/grid/?namespace=general&locale=de"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows = [row for row, form in response.context["rows"]]
+        response = self.client.post(
+            url, grid_data(rows, **{"0": {"content": "Hallo Welt", "approved": True}})
+        )
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        target = TranslationTarget.objects.get()
+        self.assertEqual((target.content, target.approved), ("Hallo Welt", True))
+
+    def test_grid_requires_the_permissions(self):
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        url = "/admin/babelbase/translationsource/grid/?namespace=general&locale=de"
+        self.assertEqual(self.client.get(url).status_code, 403)
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from babelbase.bundles import bundle_key, get_generations, resolve_records
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+@override_settings(BABELBASE_BUNDLE_CACHE="default", BABELBASE_BUNDLE_CHUNK_BYTES=200)
+class BundlesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        namespace = Namespace.objects.create(namespace="general")
+        self.sources = [
+            TranslationSource.objects.create(
+                namespace=namespace, identifier=f"key-{index}", content=f"Text {index}"
+            )
+            for index in range(20)
+        ]
+        self.keys = [("general", source.identifier) for source in self.sources]
+
+    def chunk_count(self):
+        generation = get_generations(cache, ["general"])["general"]
+        return cache.get(bundle_key("general", "de", generation))
+
+    def test_large_bundles_are_split_into_chunks(self):
+        records = resolve_records(self.keys, "de")
+        self.assertEqual(records[("general", "key-3")][1], "Text 3")
+        self.assertGreater(self.chunk_count(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_records(self.keys, "de"), records)
+
+    def test_missing_chunk_rebuilds_the_bundle(self):
+        records = resolve_records(self.keys, "de")
+        generation = get_generations(cache, ["general"])["general"]
+        cache.delete(f"{bundle_key('general', 'de', generation)}:chunk:0")
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_records(self.keys, "de"), records)
+
+    def test_saved_target_invalidates_the_bundle(self):
+        resolve_records(self.keys, "de")
+        source = self.sources[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            TranslationTarget.objects.create(
+                source=source,
+                _lang="de",
+                content="Text de",
+                translated=True,
+                approved=True,
+            )
+        records = resolve_records([("general", source.identifier)], "de")
+        self.assertEqual(records[("general", source.identifier)][1], "Text de")
+
+    def test_saving_target_of_loaded_source_does_not_query_the_namespace(self):
+        TranslationTarget.objects.create(source=self.sources[0], _lang="de")
+        target = TranslationTarget.objects.select_related("source__namespace").get()
+        target.content = "Text de"
+        target.translated = True
+        with CaptureQueriesContext(connection) as queries:
+            target.save()
+        self.assertFalse(
+            any("babelbase_namespace" in query["sql"] for query in queries)
+        )
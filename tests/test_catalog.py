@@ -0,0 +1,105 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from babelbase import catalog
+from babelbase.catalog import (
+    CompiledCatalog,
+    catalog_path,
+    compile_catalog,
+    get_catalog,
+    write_catalog,
+)
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+class CompiledCatalogTest(TestCase):
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        self.greeting = TranslationSource.objects.create(
+            namespace=namespace, identifier="greeting", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=self.greeting,
+            _lang="de",
+            content="Hallo",
+            translated=True,
+            approved=True,
+        )
+        self.farewell = TranslationSource.objects.create(
+            namespace=namespace, identifier="farewell", content="Bye"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        catalog._catalogs.clear()
+        self.addCleanup(catalog._catalogs.clear)
+        settings = override_settings(
+            BABELBASE_CATALOG_DIR=self.directory, BABELBASE_CATALOG_CHECK_INTERVAL=0
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def empty_catalog(self):
+        path = os.path.join(self.directory, "empty.bbcat")
+        write_catalog(path, [])
+        return path
+
+    def test_compiled_catalog_is_read_without_queries(self):
+        self.assertEqual(compile_catalog(self.directory, "de"), 2)
+        with self.assertNumQueries(0):
+            compiled = get_catalog("de")
+            self.assertEqual(
+                compiled.get("general", "greeting"), (self.greeting.pk, "Hallo")
+            )
+            # Sources without approved translation hold the source content
+            self.assertEqual(
+                compiled.get("general", "farewell"), (self.farewell.pk, "Bye")
+            )
+            self.assertIsNone(compiled.get("general", "missing"))
+            self.assertIsNone(compiled.get("other", "greeting"))
+        self.assertIsNone(get_catalog("fr"))
+
+    def test_non_ascii_keys_and_texts(self):
+        path = os.path.join(self.directory, "test.bbcat")
+        entries = [
+            ("général", "grüße", 1, "Grüße"),
+            ("general", "zebra", 2, "Zebra"),
+            ("general", "äpfel", 3, "Äpfel 🍎"),
+            ("general", "", 4, "Empty identifier"),
+        ]
+        self.assertEqual(write_catalog(path, entries), 4)
+        compiled = CompiledCatalog(path)
+        for namespace, identifier, source_id, text in entries:
+            self.assertEqual(compiled.get(namespace, identifier), (source_id, text))
+        self.assertIsNone(compiled.get("general", "äpfe"))
+        self.assertIsNone(CompiledCatalog(self.empty_catalog()).get("general", "x"))
+
+    def test_invalid_file_is_rejected(self):
+        path = os.path.join(self.directory, "invalid.bbcat")
+        with open(path, "wb") as file:
+            file.write(b"\x00" * 64)
+        with self.assertRaises(ValueError):
+            CompiledCatalog(path)
+
+    def test_recompiled_catalog_is_reloaded(self):
+        compile_catalog(self.directory, "de")
+        compiled = get_catalog("de")
+        self.assertIs(get_catalog("de"), compiled)
+        self.greeting.content = "Hi"
+        self.greeting.save()
+        TranslationTarget.objects.filter(source=self.greeting).delete()
+        compile_catalog(self.directory, "de")
+        reloaded = get_catalog("de")
+        self.assertIsNot(reloaded, compiled)
+        self.assertEqual(reloaded.get("general", "greeting"), (self.greeting.pk, "Hi"))
+        os.remove(catalog_path(self.directory, "de"))
+        self.assertIsNone(get_catalog("de"))
+
+    @override_settings(BABELBASE_CATALOG_CHECK_INTERVAL=60)
+    def test_catalog_is_checked_after_the_interval(self):
+        compile_catalog(self.directory, "de")
+        compiled = get_catalog("de")
+        compile_catalog(self.directory, "de")
+        self.assertIs(get_catalog("de"), compiled)
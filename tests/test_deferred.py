@@ -0,0 +1,146 @@
+from django.core import mail
+from django.http import JsonResponse
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.utils import translation
+
+from babelbase.cache import translation_cache
+from babelbase.deferred import (
+    MARKER_PATTERN,
+    decode_marker,
+    deferred_resolution,
+    substitute_markers,
+)
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+def render(template_code, context=None):
+    template = engines["django"].from_string("{% load babelbase %}" + template_code)
+    return template.render(context or {})
+
+
+class DeferredResolutionTest(TestCase):
+    def setUp(self):
+        translation_cache.clear()
+        namespace = Namespace.objects.create(namespace="general")
+        source = TranslationSource.objects.create(
+            namespace=namespace, identifier="greeting", content="Hello <you>"
+        )
+        TranslationTarget.objects.create(
+            source=source, _lang="de", content="Hallo", translated=True, approved=True
+        )
+
+    def test_markers_are_resolved_in_one_query(self):
+        with translation.override("de"), deferred_resolution() as collector:
+            output = render(
+                '{% babel "general" "greeting" %} {% babel "general" "missing" "-" %}'
+            )
+            self.assertIn("<!--babel:", output)
+            with self.assertNumQueries(1):
+                self.assertEqual(collector.substitute(output), "Hallo -")
+
+    def test_markers_escape_the_source_content(self):
+        with deferred_resolution() as collector:
+            output = collector.substitute(render('{% babel "general" "greeting" %}'))
+        self.assertEqual(output, "Hello &lt;you&gt;")
+
+    def test_cached_markers_are_resolved_by_a_later_request(self):
+        with translation.override("de"), deferred_resolution():
+            cached = render('{% babel "general" "greeting" %}')
+        # Another request replaying the cached output, in another locale
+        with deferred_resolution() as collector:
+            self.assertEqual(collector.substitute(cached), "Hallo")
+        self.assertEqual(substitute_markers(cached), "Hallo")
+
+    def test_forged_markers_are_not_resolved(self):
+        with deferred_resolution():
+            output = render('{% babel "general" "greeting" %}')
+        payload, signature = MARKER_PATTERN.match(output).groups()
+        self.assertIsNotNone(decode_marker(payload, signature))
+        forged = output.replace(signature, "0" * 16)
+        self.assertEqual(substitute_markers(forged), forged)
+        self.assertEqual(substitute_markers("<!--babel:x:y-->"), "<!--babel:x:y-->")
+
+    def test_filtered_babel_is_resolved_in_place(self):
+        with translation.override("de"), deferred_resolution():
+            output = render(
+                '{% filter upper %}{% babel "general" "greeting" %}{% endfilter %}'
+                '{% filter striptags %}{% babel "general" "greeting" %}{% endfilter %}'
+            )
+        self.assertEqual(output, "HALLOHallo")
+
+    def test_assigned_babel_is_resolved_in_place(self):
+        with translation.override("de"), deferred_resolution():
+            output = render(
+                '{% babel "general" "greeting" as greeting %}{{ greeting|upper }}'
+            )
+        self.assertEqual(output, "HALLO")
+
+    def test_babel_without_collector(self):
+        with translation.override("de"):
+            self.assertEqual(render('{% babel "general" "greeting" %}'), "Hallo")
+            self.assertEqual(render('{% babel "general" "missing" "-" %}'), "-")
+
+
+GREETING_TEMPLATE = (
+    '{% load babelbase %}{% babel "general" "greeting" %} '
+    '{% babel "general" "missing" "-" %}'
+)
+
+
+def greeting_view(request):
+    return TemplateResponse(request, engines["django"].from_string(GREETING_TEMPLATE))
+
+
+def mail_view(request):
+    body = engines["django"].from_string(GREETING_TEMPLATE).render()
+    mail.send_mail("Welcome", body, None, ["to@example.com"])
+    return greeting_view(request)
+
+
+def json_view(request):
+    greeting = engines["django"].from_string(GREETING_TEMPLATE).render()
+    return JsonResponse({"greeting": greeting})
+
+
+urlpatterns = [
+    path("greeting/", greeting_view),
+    path("mail/", mail_view),
+    path("json/", json_view),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=["babelbase.middleware.DeferredBabelMiddleware"],
+)
+class DeferredBabelMiddlewareTest(TestCase):
+    def setUp(self):
+        translation_cache.clear()
+        namespace = Namespace.objects.create(namespace="general")
+        source = TranslationSource.objects.create(
+            namespace=namespace, identifier="greeting", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=source, _lang="de", content="Hallo", translated=True, approved=True
+        )
+
+    def get(self, url):
+        with translation.override("de"):
+            return self.client.get(url)
+
+    def test_template_response_is_resolved_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.get("/greeting/")
+        self.assertEqual(response.content, b"Hallo -")
+
+    def test_email_rendered_in_a_request_is_resolved_in_place(self):
+        response = self.get("/mail/")
+        self.assertEqual(mail.outbox[0].body, "Hallo -")
+        self.assertEqual(response.content, b"Hallo -")
+
+    def test_json_response_is_resolved_in_place(self):
+        response = self.get("/json/")
+        self.assertEqual(response.json(), {"greeting": "Hallo -"})
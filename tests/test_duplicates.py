@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from django.test import TestCase
+
+from babelbase.duplicates import find_duplicates
+from babelbase.models import Namespace, TranslationSource
+
+
+class FindDuplicatesTest(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(namespace="general")
+        self.welcome = self.create("welcome", "Welcome to our shop, enjoy your stay!")
+        self.greeting = self.create(
+            "greeting", "<b>Welcome to our shop, enjoy your stay</b>"
+        )
+        self.other = self.create("other", "Completely unrelated content")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index_path = os.path.join(directory.name, "index.json")
+
+    def create(self, identifier, content):
+        return TranslationSource.objects.create(
+            namespace=self.namespace, identifier=identifier, content=content
+        )
+
+    def registry(self, source):
+        source.refresh_from_db()
+        return [entry["id"] for entry in source.duplicates_registry]
+
+    def test_finds_the_duplicates(self):
+        result = find_duplicates(index_path=self.index_path)
+        self.assertEqual(result["indexed"], 3)
+        self.assertEqual(self.registry(self.welcome), [self.greeting.pk])
+        self.assertEqual(self.registry(self.greeting), [self.welcome.pk])
+        self.assertEqual(self.registry(self.other), [])
+
+    def test_only_changed_sources_are_indexed(self):
+        find_duplicates(index_path=self.index_path)
+        self.assertEqual(find_duplicates(index_path=self.index_path)["indexed"], 0)
+
+        self.other.content = "Welcome to our shop, enjoy your stay."
+        self.other.save()
+        result = find_duplicates(index_path=self.index_path)
+        self.assertEqual(result["indexed"], 1)
+        self.assertEqual(
+            sorted(self.registry(self.welcome)),
+            sorted([self.greeting.pk, self.other.pk]),
+        )
+
+    def test_removed_sources_leave_the_registries(self):
+        find_duplicates(index_path=self.index_path)
+        self.greeting.delete()
+        result = find_duplicates(index_path=self.index_path)
+        self.assertEqual(result["removed"], 1)
+        self.assertEqual(self.registry(self.welcome), [])
+
+    def test_unreadable_index_is_rebuilt(self):
+        for data in ("not json", '{"version": 2, "sources": [], "bands": {}}', "[]"):
+            with open(self.index_path, "w") as file:
+                file.write(data)
+            result = find_duplicates(index_path=self.index_path)
+            self.assertEqual(result["indexed"], 3)
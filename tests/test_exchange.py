@@ -0,0 +1,174 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.test import TestCase
+
+from babelbase.exchange import (
+    TranslationImport,
+    export_records,
+    export_translations,
+)
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+class ExchangeTest(TestCase):
+    def setUp(self):
+        general = Namespace.objects.create(namespace="general")
+        shop = Namespace.objects.create(namespace="shop")
+        self.greeting = TranslationSource.objects.create(
+            namespace=general, identifier="greeting", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=self.greeting,
+            _lang="de",
+            content="Hallo",
+            translated=True,
+            approved=True,
+        )
+        TranslationTarget.objects.create(
+            source=self.greeting, _lang="fr", content="Bonjour", translated=True
+        )
+        self.cart = TranslationSource.objects.create(
+            namespace=shop, identifier="cart", content="Cart"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def read_lines(self, path):
+        with open(path, encoding="utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def test_export_import_round_trip(self):
+        path = self.path("translations.jsonl")
+        self.assertEqual(export_translations(path, chunk_size=1), 2)
+        records = self.read_lines(path)
+        self.assertEqual(
+            records[0],
+            {
+                "namespace": "general",
+                "identifier": "greeting",
+                "lang": "en",
+                "content": "Hello",
+                "targets": {
+                    "de": {
+                        "content": "Hallo",
+                        "translated": True,
+                        "approved": True,
+                        "source_fingerprint": self.greeting.fingerprint,
+                    },
+                    "fr": {
+                        "content": "Bonjour",
+                        "translated": True,
+                        "approved": False,
+                        "source_fingerprint": self.greeting.fingerprint,
+                    },
+                },
+            },
+        )
+        TranslationSource.objects.all().delete()
+        Namespace.objects.all().delete()
+        importer = TranslationImport().run(path)
+        self.assertEqual((importer.sources_written, importer.targets_written), (2, 2))
+        self.assertEqual(list(export_records()), records)
+
+    def test_filters(self):
+        records = list(export_records(namespaces=["general"], locales=["de"]))
+        self.assertEqual(len(records), 1)
+        self.assertEqual(list(records[0]["targets"]), ["de"])
+        self.assertEqual(next(export_records(locales=[]))["targets"], {})
+        # Lines of other namespaces and targets of other locales are not imported
+        records[0]["content"] = "Hi"
+        records[0]["targets"]["de"]["content"] = "Hi!"
+        records[0]["targets"]["fr"] = {"content": "Salut", "translated": True}
+        importer = TranslationImport(namespaces=["shop"]).import_records(records)
+        self.assertEqual((importer.sources_written, importer.targets_written), (0, 0))
+        importer = TranslationImport(locales=["fr"]).import_records(records)
+        self.assertEqual((importer.sources_written, importer.targets_written), (1, 1))
+        self.assertEqual(
+            dict(
+                TranslationTarget.objects.filter(source=self.greeting).values_list(
+                    "_lang", "content"
+                )
+            ),
+            {"de": "Hallo", "fr": "Salut"},
+        )
+
+    def test_unchanged_lines_write_nothing(self):
+        records = list(export_records())
+        importer = TranslationImport()
+        # Namespaces, sources and targets of the batch within a savepoint, no write
+        with self.assertNumQueries(5):
+            importer.import_records(records)
+        self.assertEqual((importer.sources_written, importer.targets_written), (0, 0))
+
+    def test_last_line_of_a_duplicate_key_wins(self):
+        records = [
+            {
+                "namespace": "general",
+                "identifier": "greeting",
+                "content": "Hello",
+                "targets": {"de": {"content": "Moin", "translated": True}},
+            },
+            {
+                "namespace": "general",
+                "identifier": "greeting",
+                "content": "Hello",
+                "targets": {"de": {"content": "Servus", "translated": True}},
+            },
+        ]
+        importer = TranslationImport().import_records(records)
+        self.assertEqual((importer.lines, importer.targets_written), (2, 1))
+        target = TranslationTarget.objects.get(source=self.greeting, _lang="de")
+        self.assertEqual(target.content, "Servus")
+        self.assertFalse(target.approved)
+
+    def test_only_existing_sources_without_create_sources(self):
+        records = [
+            {
+                "namespace": "general",
+                "identifier": "greeting",
+                "content": "Changed",
+                "targets": {"fr": {"content": "Salut", "translated": True}},
+            },
+            {
+                "namespace": "general",
+                "identifier": "new",
+                "content": "New",
+                "targets": {"fr": {"content": "Nouveau", "translated": True}},
+            },
+            {
+                "namespace": "new",
+                "identifier": "new",
+                "content": "New",
+                "targets": {},
+            },
+        ]
+        importer = TranslationImport(create_sources=False).import_records(records)
+        self.assertEqual(
+            (importer.skipped, importer.sources_written, importer.targets_written),
+            (2, 0, 1),
+        )
+        self.greeting.refresh_from_db()
+        self.assertEqual(self.greeting.content, "Hello")
+        self.assertFalse(TranslationSource.objects.filter(identifier="new").exists())
+        self.assertFalse(Namespace.objects.filter(namespace="new").exists())
+        importer = TranslationImport().import_records(records)
+        self.assertEqual((importer.sources_written, importer.targets_written), (3, 1))
+        self.assertTrue(Namespace.objects.filter(namespace="new").exists())
+
+    def test_gzip_files(self):
+        path = self.path("translations.jsonl.gz")
+        self.assertEqual(export_translations(path), 2)
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(records, list(export_records()))
+        TranslationTarget.objects.all().delete()
+        importer = TranslationImport().run(path)
+        self.assertEqual((importer.sources_written, importer.targets_written), (0, 2))
+        self.assertEqual(TranslationTarget.objects.count(), 2)
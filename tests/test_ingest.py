@@ -0,0 +1,107 @@
+from django.test import TestCase
+
+from babelbase.ingest import SourceIngestion, mark_stale_sources
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+def scanned(*matches, name="page.html"):
+    """Returns the scanned templates of a single template with the matches (tag, namespace, identifier, text)"""
+    return {
+        f"/templates/{name}": {
+            "name": name,
+            "matches": [list(match) for match in matches],
+        }
+    }
+
+
+class MarkStaleSourcesTest(TestCase):
+    def setUp(self):
+        SourceIngestion().run(
+            scanned(
+                ("get_content", "general", "title", "Title"),
+                ("get_content", "general", "removed", "Removed"),
+            )
+        )
+        namespace = Namespace.objects.get(namespace="general")
+        # Used from Python (db_gettext_lazy) or created in the admin
+        TranslationSource.objects.create(
+            namespace=namespace, identifier="python-only", content="Python"
+        )
+
+    def not_used(self):
+        return set(
+            TranslationSource.objects.filter(not_used=True).values_list(
+                "identifier", flat=True
+            )
+        )
+
+    def test_only_sources_of_templates_are_stale(self):
+        report = mark_stale_sources({("general", "title")})
+        self.assertEqual(report["stale"], 1)
+        self.assertEqual(report["flagged"], [["general", "removed"]])
+        self.assertEqual(self.not_used(), {"removed"})
+        # Nothing changes on the next run
+        report = mark_stale_sources({("general", "title")})
+        self.assertEqual((report["flagged"], report["unflagged"]), ([], []))
+
+    def test_reappeared_sources_are_unflagged(self):
+        mark_stale_sources({("general", "title")})
+        report = mark_stale_sources({("general", "title"), ("general", "removed")})
+        self.assertEqual(report["unflagged"], [["general", "removed"]])
+        self.assertEqual(self.not_used(), set())
+
+
+class SourceIngestionTest(TestCase):
+    def setUp(self):
+        SourceIngestion().run(scanned(("get_content", "general", "title", "Title")))
+
+    def source(self):
+        return TranslationSource.objects.get(identifier="title")
+
+    def test_changed_template_content_updates_the_source(self):
+        fingerprint = self.source().fingerprint
+        ingestion = SourceIngestion().run(
+            scanned(("get_content", "general", "title", "New title"))
+        )
+        self.assertEqual(ingestion.drifted, [("general", "title")])
+        source = self.source()
+        self.assertEqual(source.content, "New title")
+        self.assertNotEqual(source.fingerprint, fingerprint)
+        self.assertTrue(source.changed)
+
+    def test_changed_template_content_is_only_reported(self):
+        ingestion = SourceIngestion(update_content=False).run(
+            scanned(("get_content", "general", "title", "New title"))
+        )
+        self.assertEqual(ingestion.drifted, [("general", "title")])
+        self.assertEqual(self.source().content, "Title")
+
+    def test_tags_without_text_keep_the_content(self):
+        ingestion = SourceIngestion().run(
+            scanned(("babel", "general", "title", ""), name="other.html")
+        )
+        self.assertEqual(ingestion.drifted, [])
+        source = self.source()
+        self.assertEqual(source.content, "Title")
+        self.assertEqual(source.template_registry, ["other.html"])
+
+    def test_edited_content_is_kept_while_the_template_is_unchanged(self):
+        source = self.source()
+        source.content = "Edited by a translator"
+        source.save()
+        TranslationTarget.objects.create(
+            source=source, _lang="de", content="Bearbeitet", translated=True
+        )
+        ingestion = SourceIngestion().run(
+            scanned(("get_content", "general", "title", "Title"))
+        )
+        self.assertEqual(ingestion.drifted, [])
+        source = self.source()
+        self.assertEqual(source.content, "Edited by a translator")
+        self.assertFalse(TranslationTarget.objects.get(source=source).outdated)
+        # A change of the template text still updates the edited content
+        ingestion = SourceIngestion().run(
+            scanned(("get_content", "general", "title", "New title"))
+        )
+        self.assertEqual(ingestion.drifted, [("general", "title")])
+        self.assertEqual(self.source().content, "New title")
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from babelbase.messageformat import compile_message
+
+
+def render(text, **context):
+    return compile_message(text).format(context)
+
+
+class CompileMessageTest(SimpleTestCase):
+    plural = "{{ count, plural, =0 {no files} one {# file} other {# files} }}"
+
+    def test_variables(self):
+        self.assertEqual(render("Hello {{ name }}!", name="Ada"), "Hello Ada!")
+        self.assertEqual(render("Hello {{name}}!"), "Hello {{name}}!")
+
+    def test_single_brace_variables_without_icu_syntax(self):
+        self.assertEqual(
+            render("Hello {name}, {{ greeting }}", name="Ada", greeting="hi"),
+            "Hello Ada, hi",
+        )
+        self.assertEqual(render("Hello {name}!"), "Hello {name}!")
+        self.assertEqual(
+            render(
+                "{name}: {{ gender, select, other {them} }}", name="Ada", gender="x"
+            ),
+            "{name}: them",
+        )
+
+    def test_plural(self):
+        self.assertEqual(render(self.plural, count=0), "no files")
+        self.assertEqual(render(self.plural, count=1), "1 file")
+        self.assertEqual(render(self.plural, count=3), "3 files")
+        self.assertEqual(render(self.plural, count="many"), "many files")
+
+    def test_plural_normalizes_numbers(self):
+        for count in (1.0, Decimal(1), Decimal("1.00"), "1", " 1 "):
+            self.assertEqual(render(self.plural, count=count), f"{count} file")
+        self.assertEqual(render(self.plural, count="0"), "no files")
+        self.assertEqual(render(self.plural, count=1.5), "1.5 files")
+        self.assertEqual(render(self.plural, count=True), "True files")
+
+    def test_select(self):
+        message = "{{ gender, select, female {her} male {his} other {their} }} book"
+        self.assertEqual(render(message, gender="female"), "her book")
+        self.assertEqual(render(message, gender="unknown"), "their book")
+        self.assertEqual(render(message), message)
+
+    def test_nesting(self):
+        message = (
+            "{{ gender, select, female {She has {{ count, plural, one {# cat} other {# cats} }}} "
+            "other {They have {{ count, plural, one {# cat} other {# cats} }}} }}"
+        )
+        self.assertEqual(render(message, gender="female", count=1), "She has 1 cat")
+        self.assertEqual(render(message, gender="x", count=2), "They have 2 cats")
+
+    def test_escaping(self):
+        self.assertEqual(render(r"\{name} is {name}", name="Ada"), "{name} is Ada")
+        self.assertEqual(render(r"\{{ name }}", name="Ada"), "{{ name }}")
+        self.assertEqual(
+            render(r"{{ count, plural, other {# of \# \{x\}} }}", count=2), "2 of # {x}"
+        )
+
+    def test_missing_other_is_literal(self):
+        message = "{{ count, plural, one {# file} }}"
+        self.assertEqual(render(message, count=1), message)
+        message = "{{ gender, select, female {her} }}"
+        self.assertEqual(render(message, gender="female"), message)
+
+    def test_malformed_tags_are_literal(self):
+        for message in (
+            "{{ count, plural, one {# file }}",
+            "{{ 1name }}",
+            "{{ a, b }}",
+            "{{ open",
+        ):
+            self.assertEqual(render(message, count=1, a=1), message)
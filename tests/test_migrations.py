@@ -0,0 +1,11 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class MigrationsTest(TestCase):
+    def test_models_match_the_migrations(self):
+        call_command(
+            "makemigrations", "babelbase", check=True, dry_run=True, stdout=StringIO()
+        )
@@ -0,0 +1,209 @@
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import translation
+
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.utils import build_fallback_chain, locale_fallback_chain
+
+
+class TranslationTargetFingerprintTest(TestCase):
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        self.source = TranslationSource.objects.create(
+            namespace=namespace, identifier="greeting", content="Hello"
+        )
+        self.target = TranslationTarget.objects.create(
+            source=self.source, _lang="de", content="Hallo", translated=True
+        )
+
+    def change_source(self):
+        self.source.content = "Hello there"
+        self.source.save()
+
+    def test_translation_records_source_fingerprint(self):
+        self.assertEqual(self.target.source_fingerprint, self.source.fingerprint)
+        self.assertFalse(TranslationTarget.objects.outdated().exists())
+
+    def test_approving_keeps_outdated_translation_outdated(self):
+        self.change_source()
+        target = TranslationTarget.objects.get(pk=self.target.pk)
+        target.approved = True
+        target.save()
+        target.refresh_from_db()
+        self.assertTrue(target.outdated)
+        self.assertEqual(list(TranslationTarget.objects.outdated()), [target])
+
+    def test_changed_translation_records_current_fingerprint(self):
+        self.change_source()
+        target = TranslationTarget.objects.get(pk=self.target.pk)
+        target.content = "Hallo zusammen"
+        target.save()
+        self.assertFalse(target.outdated)
+
+    def test_saving_unchanged_translation_does_not_query_the_source(self):
+        target = TranslationTarget.objects.get(pk=self.target.pk)
+        target.approved = True
+        with self.assertNumQueries(0):
+            target.normalize_status()
+
+    def test_explicit_fingerprint_is_recorded(self):
+        target = TranslationTarget.objects.get(pk=self.target.pk)
+        target.normalize_status("explicit")
+        self.assertEqual(target.source_fingerprint, "explicit")
+
+    def test_approved_requires_translated_content(self):
+        target = TranslationTarget(
+            source=self.source, _lang="fr", content="", translated=True, approved=True
+        )
+        target.normalize_status()
+        self.assertFalse(target.translated)
+        self.assertFalse(target.approved)
+
+
+class LocaleStatusTest(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(namespace="general")
+        self.source = TranslationSource.objects.create(
+            namespace=self.namespace, identifier="greeting", content="Hello"
+        )
+
+    def status(self):
+        self.source.refresh_from_db()
+        return self.source.locale_status, self.source.complete
+
+    def translate(self, locale, approved=True):
+        return TranslationTarget.objects.create(
+            source=self.source,
+            _lang=locale,
+            content=f"Hello {locale}",
+            translated=True,
+            approved=approved,
+        )
+
+    def test_saved_targets_update_the_status(self):
+        self.assertEqual(self.status(), ({}, False))
+        target = self.translate("de", approved=False)
+        self.assertEqual(self.status(), ({"de": "translated"}, False))
+        target.approved = True
+        target.save()
+        self.translate("de-at")
+        self.translate("fr")
+        self.assertEqual(
+            self.status(),
+            ({"de": "approved", "de-at": "approved", "fr": "approved"}, True),
+        )
+
+    def test_deleted_target_updates_the_status(self):
+        target = self.translate("de")
+        self.translate("de-at")
+        self.translate("fr")
+        target.delete()
+        self.assertEqual(
+            self.status(), ({"de-at": "approved", "fr": "approved"}, False)
+        )
+
+    def test_cascading_delete_does_not_recompute_the_status(self):
+        for index in range(10):
+            source = TranslationSource.objects.create(
+                namespace=self.namespace, identifier=f"key-{index}", content="Hello"
+            )
+            for locale in ("de", "fr"):
+                TranslationTarget.objects.create(
+                    source=source, _lang=locale, content="Hallo", translated=True
+                )
+        with self.assertNumQueries(6):
+            self.namespace.delete()
+        self.assertFalse(TranslationTarget.objects.exists())
+
+
+class LocaleFallbackChainTest(TestCase):
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        self.source = TranslationSource.objects.create(
+            namespace=namespace, identifier="greeting", content="Hello"
+        )
+
+    def translate(self, locale, content, approved=True):
+        TranslationTarget.objects.create(
+            source=self.source,
+            _lang=locale,
+            content=content,
+            translated=True,
+            approved=approved,
+        )
+
+    def records(self, locale):
+        return list(
+            TranslationSource.objects.records_queryset(
+                Q(pk=self.source.pk), locale
+            ).values_list("content", "target_content")
+        )
+
+    def test_regional_locale_falls_back_to_the_generic_locale(self):
+        self.assertEqual(locale_fallback_chain("de-at"), ("de-at", "de"))
+        self.assertEqual(locale_fallback_chain("de"), ("de",))
+        self.assertEqual(build_fallback_chain("fr-ca", {}, ["fr-ca"]), ("fr-ca",))
+
+    def test_configured_chain_replaces_the_generic_fallback(self):
+        fallbacks = {"de-at": ["fr"], "fr": ["de", "en", "de-at"]}
+        locales = ["en", "de", "de-at", "fr"]
+        self.assertEqual(
+            build_fallback_chain("de-at", fallbacks, locales), ("de-at", "fr")
+        )
+        # The source language ends the chain
+        self.assertEqual(build_fallback_chain("fr", fallbacks, locales), ("fr", "de"))
+        self.assertEqual(build_fallback_chain("en", fallbacks, locales), ())
+
+    def test_changed_setting_clears_the_chains(self):
+        self.assertEqual(locale_fallback_chain("de-at"), ("de-at", "de"))
+        with self.settings(BABELBASE_LOCALE_FALLBACKS={"de-at": ["fr"]}):
+            self.assertEqual(locale_fallback_chain("de-at"), ("de-at", "fr"))
+        self.assertEqual(locale_fallback_chain("de-at"), ("de-at", "de"))
+
+    def test_records_of_a_chain_are_resolved_in_one_query(self):
+        self.translate("de", "Hallo")
+        self.translate("de-at", "Servus", approved=False)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.records("de-at"), [("Hello", "Hallo")])
+        self.translate("fr", "Bonjour")
+        fallbacks = {"de-at": ["fr", "de"]}
+        with (
+            self.settings(BABELBASE_LOCALE_FALLBACKS=fallbacks),
+            self.assertNumQueries(1),
+        ):
+            self.assertEqual(self.records("de-at"), [("Hello", "Bonjour")])
+        self.assertEqual(self.records("en"), [("Hello", None)])
+
+
+class ResolveManyTest(TestCase):
+    def setUp(self):
+        general = Namespace.objects.create(namespace="general")
+        shop = Namespace.objects.create(namespace="shop")
+        greeting = TranslationSource.objects.create(
+            namespace=general, identifier="greeting", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=greeting, _lang="de", content="Hallo", translated=True, approved=True
+        )
+        cart = TranslationSource.objects.create(
+            namespace=shop, identifier="cart", content="Cart"
+        )
+        TranslationTarget.objects.create(
+            source=cart, _lang="de", content="Warenkorb", translated=True
+        )
+
+    def test_keys_are_resolved_in_one_query(self):
+        keys = [("general", "greeting"), ("shop", "cart"), ("shop", "missing")]
+        with self.assertNumQueries(1):
+            texts = TranslationSource.objects.resolve_many(keys, "de")
+        # Unapproved translations fall back to the source content, missing keys are left out
+        self.assertEqual(
+            texts, {("general", "greeting"): "Hallo", ("shop", "cart"): "Cart"}
+        )
+        with translation.override("de"):
+            self.assertEqual(
+                TranslationSource.objects.resolve_many([("general", "greeting")]),
+                {("general", "greeting"): "Hallo"},
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(TranslationSource.objects.resolve_many([], "de"), {})
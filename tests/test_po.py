@@ -0,0 +1,125 @@
+import gettext
+import os
+import tempfile
+
+from django.test import TestCase
+
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.po import export_mo, export_po, import_po, parse_po
+
+
+class POTest(TestCase):
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        self.multiline = TranslationSource.objects.create(
+            namespace=namespace,
+            identifier="multiline",
+            content='First "line"\nSecond\tline\\\n',
+        )
+        self.approved = TranslationTarget.objects.create(
+            source=self.multiline,
+            _lang="de",
+            content='Erste "Zeile"\nZweite\tZeile\\\n',
+            translated=True,
+            approved=True,
+        )
+        self.unapproved = TranslationSource.objects.create(
+            namespace=namespace, identifier="unapproved", content="Hello"
+        )
+        TranslationTarget.objects.create(
+            source=self.unapproved, _lang="de", content="Hallo", translated=True
+        )
+        self.untranslated = TranslationSource.objects.create(
+            namespace=namespace, identifier="untranslated", content="Bye"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def export(self, filename="de.po"):
+        path = os.path.join(self.directory, filename)
+        self.assertEqual(export_po(path, "de"), 3)
+        return path
+
+    def entries(self, path):
+        with open(path, encoding="utf-8") as file:
+            return {entry["msgid"]: entry for entry in parse_po(file)}
+
+    def test_export_parse_round_trip(self):
+        entries = self.entries(self.export())
+        self.assertIn("Language: de", entries[""]["msgstr"])
+        multiline = entries["multiline"]
+        self.assertEqual(multiline["msgctxt"], "general")
+        self.assertEqual(multiline["msgstr"], self.approved.content)
+        self.assertEqual(multiline["fingerprint"], self.multiline.fingerprint)
+        self.assertNotIn("fuzzy", multiline)
+        self.assertTrue(entries["unapproved"]["fuzzy"])
+        self.assertEqual(entries["untranslated"]["msgstr"], "")
+
+    def test_outdated_translation_is_fuzzy(self):
+        self.multiline.content = "Changed"
+        self.multiline.save()
+        entries = self.entries(self.export())
+        self.assertTrue(entries["multiline"]["fuzzy"])
+        self.assertEqual(
+            entries["multiline"]["fingerprint"], self.multiline.fingerprint
+        )
+
+    def test_import_restores_the_translations(self):
+        path = self.export()
+        TranslationTarget.objects.filter(_lang="de").delete()
+        import_po(path, "de", approve=True)
+        targets = {
+            target.source.identifier: target
+            for target in TranslationTarget.objects.filter(_lang="de").select_related(
+                "source"
+            )
+        }
+        self.assertEqual(set(targets), {"multiline", "unapproved"})
+        self.assertEqual(targets["multiline"].content, self.approved.content)
+        self.assertTrue(targets["multiline"].approved)
+        self.assertFalse(targets["multiline"].outdated)
+        # Fuzzy entries are not approved
+        self.assertFalse(targets["unapproved"].approved)
+
+    def test_import_without_approve_keeps_unchanged_approvals(self):
+        result = import_po(self.export(), "de")
+        self.assertEqual(result.targets_written, 0)
+        self.assertTrue(TranslationTarget.objects.get(pk=self.approved.pk).approved)
+
+    def test_import_without_approve_keeps_outdated_translations_outdated(self):
+        self.multiline.content = "Changed"
+        self.multiline.save()
+        import_po(self.export(), "de")
+        target = TranslationTarget.objects.get(pk=self.approved.pk)
+        self.assertTrue(target.approved)
+        self.assertTrue(target.outdated)
+
+    def test_import_without_approve_clears_the_approval_of_changed_translations(self):
+        path = self.export()
+        with open(path, encoding="utf-8") as file:
+            data = file.read().replace("Erste", "Neue erste")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(data)
+        import_po(path, "de")
+        target = TranslationTarget.objects.get(pk=self.approved.pk)
+        self.assertTrue(target.content.startswith("Neue erste"))
+        self.assertFalse(target.approved)
+
+    def test_import_keeps_the_fingerprint_of_the_translated_source(self):
+        path = self.export()
+        self.multiline.content = "Changed"
+        self.multiline.save()
+        import_po(path, "de", approve=True)
+        self.assertTrue(TranslationTarget.objects.get(pk=self.approved.pk).outdated)
+
+    def test_mo_loads_in_gettext(self):
+        path = os.path.join(self.directory, "de.mo")
+        self.assertEqual(export_mo(path, "de"), 1)
+        with open(path, "rb") as file:
+            translations = gettext.GNUTranslations(file)
+        self.assertEqual(translations.info()["language"], "de")
+        self.assertEqual(
+            translations.pgettext("general", "multiline"), self.approved.content
+        )
+        self.assertEqual(translations.pgettext("general", "unapproved"), "unapproved")
@@ -0,0 +1,61 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from babelbase import scanner
+from babelbase.scanner import scan_templates
+
+
+class ScanTemplatesTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.templates = os.path.join(self.directory, "templates")
+        os.makedirs(self.templates)
+        self.write("page.html", b'{% babel "general" "title" "Title" %}')
+        # Latin-1 encoded umlaut
+        self.write("legacy.html", b'{% get_content "general" "legacy" "Gr\xfc\xdfe" %}')
+        settings = override_settings(
+            TEMPLATES=[
+                {
+                    "BACKEND": "django.template.backends.django.DjangoTemplates",
+                    "DIRS": [self.templates],
+                }
+            ],
+            BABELBASE_CACHE_DIR=os.path.join(self.directory, "cache"),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, name, data):
+        with open(os.path.join(self.templates, name), "wb") as file:
+            file.write(data)
+
+    def matches(self, result):
+        return {
+            template["name"]: template["matches"]
+            for template in result.templates.values()
+        }
+
+    def test_invalid_utf8_does_not_abort_the_scan(self):
+        matches = self.matches(scan_templates(manifest_path=""))
+        self.assertEqual(matches["page.html"], [["babel", "general", "title", "Title"]])
+        self.assertEqual(
+            matches["legacy.html"], [["get_content", "general", "legacy", "Gr��e"]]
+        )
+
+    def test_manifest_defaults_to_the_cache_directory(self):
+        self.assertEqual(scan_templates().scanned, 2)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, "cache", "scan_manifest.json"))
+        )
+        result = scan_templates()
+        self.assertEqual((result.scanned, result.skipped), (0, 2))
+
+    def test_template_directories_without_the_autoreloader(self):
+        with mock.patch.object(scanner, "get_django_template_directories", None):
+            self.assertEqual(scanner.get_template_directories(), {self.templates})
+            self.assertEqual(len(scan_templates(manifest_path="").templates), 2)
@@ -0,0 +1,75 @@
+from django.test import TestCase
+
+from babelbase.cache import translation_cache
+from babelbase.lookup import resolve_records
+from babelbase.missing import missing_key_cache
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+
+
+class DiscardMissingKeyTest(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(namespace="general")
+        missing_key_cache.clear()
+        self.addCleanup(missing_key_cache.clear)
+        missing_key_cache.add([("general", "greeting"), ("general", "other")], "de")
+
+    def missing(self):
+        return missing_key_cache.filter_missing(
+            [("general", "greeting"), ("general", "other")], "de"
+        )
+
+    def test_created_source_is_no_longer_missing(self):
+        TranslationSource.objects.create(
+            namespace=self.namespace, identifier="greeting", content="Hello"
+        )
+        self.assertEqual(self.missing(), {("general", "other")})
+
+    def test_saving_source_does_not_query_the_namespace(self):
+        TranslationSource.objects.create(
+            namespace=self.namespace, identifier="greeting", content="Hello"
+        )
+        source = TranslationSource.objects.get(identifier="greeting")
+        missing_key_cache.add([("general", "greeting")], "de")
+        source.identifier = "other"
+        with self.assertNumQueries(1):
+            source.save()
+        self.assertEqual(self.missing(), {("general", "greeting")})
+
+
+class InvalidateTranslationCacheTest(TestCase):
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        self.source = TranslationSource.objects.create(
+            namespace=namespace, identifier="greeting", content="Hello"
+        )
+        translation_cache.clear()
+        self.addCleanup(translation_cache.clear)
+
+    def text(self, locale="de"):
+        return resolve_records([("general", "greeting")], locale)[
+            ("general", "greeting")
+        ][1]
+
+    def test_cached_lookups_do_not_query(self):
+        self.assertEqual(self.text(), "Hello")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.text(), "Hello")
+
+    def test_saved_target_invalidates_the_lookups(self):
+        self.assertEqual(self.text(), "Hello")
+        target = TranslationTarget.objects.create(
+            source=self.source,
+            _lang="de",
+            content="Hallo",
+            translated=True,
+            approved=True,
+        )
+        self.assertEqual(self.text(), "Hallo")
+        target.delete()
+        self.assertEqual(self.text(), "Hello")
+
+    def test_saved_source_invalidates_the_lookups(self):
+        self.assertEqual(self.text(), "Hello")
+        self.source.content = "Hello there"
+        self.source.save()
+        self.assertEqual(self.text(), "Hello there")
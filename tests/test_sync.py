@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase
+
+from babelbase.models import (
+    Namespace,
+    NamespaceDigest,
+    TranslationSource,
+    TranslationTarget,
+)
+from babelbase.sync import build_digest_tree, export_delta, write_digest_file
+
+
+class DeltaSyncTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        for name in ("general", "shop"):
+            namespace = Namespace.objects.create(namespace=name)
+            for index in range(20):
+                source = TranslationSource.objects.create(
+                    namespace=namespace,
+                    identifier=f"key-{index}",
+                    content=f"Text {index}",
+                )
+                TranslationTarget.objects.create(
+                    source=source,
+                    _lang="de",
+                    content=f"Text {index} de",
+                    translated=True,
+                )
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def delta(self):
+        buckets, _ = export_delta(self.path("digest.json"), self.path("delta.jsonl"))
+        with open(self.path("delta.jsonl")) as file:
+            return buckets, [json.loads(line) for line in file]
+
+    def test_unchanged_tree_is_read_from_the_cache(self):
+        tree = build_digest_tree()
+        self.assertEqual(NamespaceDigest.objects.count(), 2)
+        # Namespaces, stamps of the sources and targets and the cached subtrees
+        with self.assertNumQueries(4):
+            self.assertEqual(build_digest_tree(), tree)
+
+    def test_changed_namespace_is_digested_again(self):
+        tree = build_digest_tree()
+        target = TranslationTarget.objects.get(
+            source__namespace__namespace="shop", source__identifier="key-3"
+        )
+        target.content = "Changed"
+        target.save()
+        changed_tree = build_digest_tree()
+        self.assertEqual(changed_tree["general"], tree["general"])
+        self.assertNotEqual(changed_tree["shop"]["de"], tree["shop"]["de"])
+        self.assertEqual(changed_tree["shop"]["en"], tree["shop"]["en"])
+
+    def test_deleted_row_changes_the_tree(self):
+        tree = build_digest_tree()
+        TranslationTarget.objects.filter(source__identifier="key-0").delete()
+        self.assertNotEqual(build_digest_tree(), tree)
+
+    def test_equal_environments_export_nothing(self):
+        write_digest_file(self.path("digest.json"))
+        self.assertEqual(self.delta(), (0, []))
+
+    def test_delta_contains_the_differing_rows(self):
+        write_digest_file(self.path("digest.json"))
+        target = TranslationTarget.objects.get(
+            source__namespace__namespace="shop", source__identifier="key-3"
+        )
+        target.content = "Changed"
+        target.save()
+        source = TranslationSource.objects.get(
+            namespace__namespace="general", identifier="key-5"
+        )
+        source.content = "Changed"
+        source.save()
+        buckets, records = self.delta()
+        self.assertEqual(buckets, 2)
+        records = {
+            (record["namespace"], record["identifier"]): record for record in records
+        }
+        self.assertIn(("shop", "key-3"), records)
+        self.assertIn(("general", "key-5"), records)
+        self.assertEqual(
+            records[("shop", "key-3")]["targets"]["de"]["content"], "Changed"
+        )
+        # The target of general/key-5 is unchanged, its locale does not differ
+        self.assertEqual(records[("general", "key-5")]["targets"], {})
+        # Only the rows of the differing buckets (identifiers sharing a bucket included)
+        self.assertLess(len(records), 40)
@@ -0,0 +1,194 @@
+from django.template import Context, Engine
+from django.test import TestCase
+from django.utils import translation
+
+from babelbase.cache import translation_cache
+from babelbase.manifest import get_template_manifest
+from babelbase.missing import missing_key_cache
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.templatetags.translate_content import (
+    BlockContentI18NNode,
+    compile_snippet,
+)
+
+
+def template_engine(templates):
+    """Returns an engine loading the babelbase tags and the templates {name: code}"""
+    return Engine(
+        loaders=[("django.template.loaders.locmem.Loader", templates)],
+        libraries={
+            "babelbase": "babelbase.templatetags.babelbase",
+            "translate_content": "babelbase.templatetags.translate_content",
+        },
+    )
+
+
+class TemplateTagTestCase(TestCase):
+    def setUp(self):
+        translation_cache.clear()
+        missing_key_cache.clear()
+        self.addCleanup(translation_cache.clear)
+        self.addCleanup(missing_key_cache.clear)
+        self.namespace = Namespace.objects.create(namespace="general")
+
+    def translate(self, identifier, content, translation=None):
+        source = TranslationSource.objects.create(
+            namespace=self.namespace, identifier=identifier, content=content
+        )
+        if translation is not None:
+            TranslationTarget.objects.create(
+                source=source,
+                _lang="de",
+                content=translation,
+                translated=True,
+                approved=True,
+            )
+        return source
+
+    def render(self, template_code, context=None):
+        engine = template_engine({"page.html": template_code})
+        with translation.override("de"):
+            return engine.get_template("page.html").render(Context(context or {}))
+
+
+MANIFEST_TEMPLATES = {
+    "base.html": (
+        '{% load babelbase %}{% babel "general" "title" %}|'
+        '{% block body %}{% endblock %}|{% include "footer.html" %}'
+    ),
+    "footer.html": '{% load babelbase %}{% babel "general" "footer" %}',
+    "page.html": (
+        '{% extends "base.html" %}{% load babelbase translate_content %}'
+        '{% block body %}{% get_content "general" "body" %} '
+        '{% babel "general" "missing" "-" %}'
+        "{% endblock %}"
+    ),
+}
+
+
+class TemplateManifestTest(TemplateTagTestCase):
+    def test_manifest_collects_the_keys_of_extends_and_includes(self):
+        template = template_engine(MANIFEST_TEMPLATES).get_template("page.html")
+        self.assertEqual(
+            get_template_manifest(template),
+            {
+                ("general", "title"),
+                ("general", "footer"),
+                ("general", "body"),
+                ("general", "missing"),
+            },
+        )
+        self.assertIs(get_template_manifest(template), template._babelbase_manifest)
+
+    def test_manifest_skips_variable_keys(self):
+        template = template_engine(
+            {"page.html": '{% load babelbase %}{% babel namespace "dynamic" %}'}
+        ).get_template("page.html")
+        self.assertEqual(get_template_manifest(template), set())
+
+    def test_manifest_is_loaded_with_one_query_per_render(self):
+        self.translate("title", "Title", "Titel")
+        self.translate("footer", "Footer")
+        self.translate("body", "Body", "Inhalt")
+        template = template_engine(MANIFEST_TEMPLATES).get_template("page.html")
+        for _ in range(2):
+            translation_cache.clear()
+            missing_key_cache.clear()
+            with self.assertNumQueries(1), translation.override("de"):
+                output = template.render(Context())
+            self.assertEqual(output, "Titel|Inhalt -|Footer")
+
+
+class BabelBlockTest(TemplateTagTestCase):
+    template_code = (
+        '{% load babelbase %}{% babelblock "general" "intro" %}'
+        "<p>Hello {{ name }}</p>{% endbabelblock %}"
+    )
+
+    def test_translation_is_rendered_as_template(self):
+        self.translate("intro", "<p>Hello {{ name }}</p>", "<p>Hallo {{ name }}</p>")
+        with self.assertNumQueries(1):
+            output = self.render(self.template_code, {"name": "Ada"})
+        self.assertEqual(output, "<p>Hallo Ada</p>")
+
+    def test_missing_key_renders_the_body(self):
+        with self.assertNumQueries(1):
+            output = self.render(self.template_code, {"name": "<Ada>"})
+        self.assertEqual(output, "<p>Hello &lt;Ada&gt;</p>")
+
+    def test_blank_translation_renders_the_body(self):
+        self.translate("intro", " ")
+        self.assertEqual(
+            self.render(self.template_code, {"name": "Ada"}), "<p>Hello Ada</p>"
+        )
+
+
+class BlockContentI18NTest(TemplateTagTestCase):
+    template_code = (
+        "{% load translate_content %}"
+        '{% blockcontent_i18n "general" "intro" %}'
+        "<p>Hello {{ name }}{% if admin %} (admin){% endif %}</p>"
+        "{% endblockcontent_i18n %}|"
+        "{% blockcontent_i18n 'general' 'outro' %}Bye {# comment #}{% endblockcontent_i18n %}"
+    )
+
+    def test_body_is_captured_as_placeholder(self):
+        template = template_engine({"page.html": self.template_code}).get_template(
+            "page.html"
+        )
+        nodes = template.nodelist.get_nodes_by_type(BlockContentI18NNode)
+        self.assertEqual(
+            [(node.view_id, node.key_id, node.placeholder) for node in nodes],
+            [
+                (
+                    "general",
+                    "intro",
+                    "<p>Hello {{ name }}{% if admin %} (admin){% endif %}</p>",
+                ),
+                ("general", "outro", "Bye {# comment #}"),
+            ],
+        )
+
+    def test_missing_keys_render_the_compiled_body(self):
+        with self.assertNumQueries(1):
+            output = self.render(self.template_code, {"name": "Ada", "admin": True})
+        self.assertEqual(output, "<p>Hello Ada (admin)</p>|Bye ")
+
+    def test_translation_is_rendered_as_template(self):
+        self.translate("intro", "<p>Hello {{ name }}</p>", "<p>Hallo {{ name }}</p>")
+        with self.assertNumQueries(1):
+            output = self.render(self.template_code, {"name": "Ada"})
+        self.assertEqual(output, "<p>Hallo Ada</p>|Bye ")
+
+
+class RenderSnippetTest(TemplateTagTestCase):
+    def setUp(self):
+        super().setUp()
+        compile_snippet.cache_clear()
+        self.addCleanup(compile_snippet.cache_clear)
+
+    def test_plain_text_skips_the_template_engine(self):
+        self.translate("greeting", "Hello", "Hallo & Tschüss")
+        with self.assertNumQueries(1):
+            output = self.render(
+                '{% load translate_content %}{% get_content "general" "greeting" %}'
+            )
+        self.assertEqual(output, "Hallo & Tschüss")
+        self.assertEqual(compile_snippet.cache_info().currsize, 0)
+
+    def test_snippets_are_compiled_once(self):
+        self.translate("greeting", "Hello {{ name }}", "Hallo {{ name }}")
+        template_code = (
+            '{% load babelbase translate_content %}{% get_content "general" "greeting" %}|'
+            '{% babelblock "general" "greeting" %}{% endbabelblock %}'
+        )
+        template = template_engine({"page.html": template_code}).get_template(
+            "page.html"
+        )
+        for name in ("Ada", "Grace"):
+            with translation.override("de"):
+                output = template.render(Context({"name": name}))
+            self.assertEqual(output, f"Hallo {name}|Hallo {name}")
+        # Compiled per content and engine
+        info = compile_snippet.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 3))
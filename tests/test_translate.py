@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.utils import translation
+
+from babelbase.models import Namespace, TranslationSource, TranslationTarget
+from babelbase.translate import DatabaseTranslationBuffer, db_gettext_lazy
+
+
+class DatabaseTranslationBufferTest(TestCase):
+    def setUp(self):
+        namespace = Namespace.objects.create(namespace="general")
+        for index in range(5):
+            source = TranslationSource.objects.create(
+                namespace=namespace, identifier=f"key-{index}", content=f"Text {index}"
+            )
+            TranslationTarget.objects.create(
+                source=source,
+                _lang="de",
+                content=f"Text {index} de",
+                translated=True,
+                approved=True,
+            )
+
+    def test_prefetch_is_bounded_by_max_entries(self):
+        buffer = DatabaseTranslationBuffer(["general"], max_entries=2)
+        self.assertEqual(len(buffer.prefetch_translations_from_db("de")), 2)
+
+    def test_resolves_keys_beyond_the_prefetch(self):
+        buffer = DatabaseTranslationBuffer(["general"], max_entries=2)
+        records = buffer.get_many(
+            [("general", f"key-{index}") for index in range(5)], "de"
+        )
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[("general", "key-4")][1], "Text 4 de")
+
+    def test_missing_table_skips_the_prefetch(self):
+        buffer = DatabaseTranslationBuffer(["general"])
+        with (
+            mock.patch.object(
+                TranslationSource.objects,
+                "namespace_records",
+                side_effect=OperationalError(
+                    "no such table: babelbase_translationsource"
+                ),
+            ),
+            self.assertLogs(level="ERROR"),
+        ):
+            self.assertEqual(buffer.prefetch_translations_from_db("de"), {})
+
+    def test_deprecated_get_object_and_view_identifier_list(self):
+        buffer = DatabaseTranslationBuffer(["general"])
+        with self.assertWarns(DeprecationWarning):
+            source = buffer.get_object("general", "key-1")
+        self.assertEqual(source.identifier, "key-1")
+        with self.assertWarns(DeprecationWarning):
+            self.assertIsNone(buffer.get_object("general", "unknown"))
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(buffer.view_identifier_list, ["general"])
+
+    def test_deprecated_view_identifier_list_argument(self):
+        with self.assertWarns(DeprecationWarning):
+            buffer = DatabaseTranslationBuffer(view_identifier_list=["general"])
+        self.assertEqual(buffer.namespace_list, ["general"])
+        self.assertEqual(buffer.get("general", "key-2", "de")[1], "Text 2 de")
+
+    def test_db_gettext_lazy(self):
+        buffer = DatabaseTranslationBuffer(["general"])
+        with translation.override("de"):
+            text = db_gettext_lazy(buffer, "general", "key-0")
+            self.assertEqual(str(text), "Text 0 de")